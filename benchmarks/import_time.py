@@ -0,0 +1,56 @@
+"""Startup import-cost regression check for the ghpush entry point.
+
+Runs ``python -X importtime -c "import ghpush.cli"`` in fresh interpreters
+and fails (exit code 1) if the cumulative import time of ``ghpush.cli``
+exceeds the budget, or if a heavy dependency that should be lazily
+imported is loaded at startup.
+
+    python benchmarks/import_time.py --budget-ms 250
+
+``tests/test_import_time.py`` runs the same check under pytest.
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+BUDGET_MS = 250.0
+
+LAZY_MODULES = ("openai", "git", "dotenv", "tiktoken", "httpx", "webbrowser", "rich.progress", "rich.table")
+
+def measure(module: str = "ghpush.cli") -> int:
+    """Cumulative import time of module in microseconds, from one fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True
+    )
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.strip() == module:
+            return int(cumulative)
+    raise RuntimeError(f"{module} not found in -X importtime output")
+
+def eagerly_imported(module: str = "ghpush.cli") -> list:
+    """Heavy modules that importing module pulls in."""
+    code = (f"import sys, json, {module}; "
+            f"print(json.dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5, help="best-of runs to smooth out noise")
+    args = parser.parse_args()
+
+    best_ms = min(measure() for _ in range(args.runs)) / 1000
+    eager = eagerly_imported()
+    print(f"ghpush.cli import: {best_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    if eager:
+        print(f"Imported at startup but should be lazy: {', '.join(eager)}")
+    return 1 if eager or best_ms > args.budget_ms else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
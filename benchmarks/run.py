@@ -0,0 +1,141 @@
+"""Benchmark ghpush's diff pipeline against synthetic repositories.
+
+Builds throwaway git repos (see synthetic_repo.py), times the git and
+analysis stages, records wall time and peak Python memory, and writes the
+results as JSON so runs can be compared across releases. No network is
+used: the AI summarizer is replaced by a stub.
+
+    python benchmarks/run.py --sizes small medium --output bench.json
+    python benchmarks/run.py --sizes medium --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+# Never read or write the user's summary cache
+os.environ["GHPUSH_CACHE"] = "0"
+
+from synthetic_repo import PRESETS, create_repo  # noqa: E402
+
+from ghpush.ai_summarizer import AISummarizer  # noqa: E402
+from ghpush.diff_analyzer import DiffAnalyzer  # noqa: E402
+from ghpush.git_backend import BACKENDS  # noqa: E402
+from ghpush.git_operations import GitOperations  # noqa: E402
+from ghpush.llm_providers import Provider  # noqa: E402
+
+class StubSummarizer(AISummarizer):
+    """AISummarizer that answers instantly and never touches the network."""
+
+    def __init__(self):
+        super().__init__()
+        self.providers = [Provider("stub")]
+
+    def _request_completion(self, prompt, max_tokens, on_delta=None, purpose="summary", deadline=None):
+        content = f"TITLE: Stub title\nDESCRIPTION:\nPrompt had {len(prompt)} characters."
+        if on_delta:
+            on_delta(content)
+        return content
+
+def measure(func, repeat: int) -> dict:
+    """Best/median wall time over repeat runs, plus peak traced memory of one run."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "best_s": min(timings),
+        "median_s": statistics.median(timings),
+        "peak_mem_bytes": peak,
+    }
+
+def bench_repo(repo: Path, repeat: int) -> dict:
+    """Run every benchmark case against one repository."""
+    results = {}
+    for backend in BACKENDS:
+        git_ops = GitOperations(repo, backend=backend)
+        results[f"get_diff[{backend}]"] = measure(lambda: git_ops.get_diff("main"), repeat)
+        results[f"get_commit_messages[{backend}]"] = measure(git_ops.get_commit_messages, repeat)
+        git_ops.close()
+
+    git_ops = GitOperations(repo)
+    analyzer = DiffAnalyzer(ai_summarizer=StubSummarizer())
+    diff_text = git_ops.get_diff("main")
+    commits = git_ops.get_commit_messages()
+    changed_files = analyzer._analyze_changed_files(diff_text)
+
+    results["get_diff_stats"] = measure(lambda: git_ops.get_diff_stats("main"), repeat)
+    results["_analyze_changed_files"] = measure(lambda: analyzer._analyze_changed_files(diff_text), repeat)
+    results["_generate_description"] = measure(
+        lambda: analyzer._generate_description(commits, changed_files), repeat)
+    results["analyze_diff[streamed]"] = measure(
+        lambda: analyzer.analyze_diff(git_ops.iter_diff_lines("main"), commits,
+                                      git_ops.get_diff_stats("main")), repeat)
+    git_ops.close()
+    return results
+
+def git_revision() -> str:
+    result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                            cwd=Path(__file__).resolve().parent)
+    return result.stdout.strip() or "unknown"
+
+def compare(current: dict, baseline_path: Path):
+    """Print the ratio of each case's best time against a previous results file."""
+    baseline = json.loads(baseline_path.read_text())["results"]
+    print(f"\nComparison against {baseline_path} (ratio > 1 is slower):")
+    for size, cases in current.items():
+        for case, result in cases.items():
+            previous = baseline.get(size, {}).get(case)
+            if previous:
+                ratio = result["best_s"] / previous["best_s"] if previous["best_s"] else float("inf")
+                print(f"  {size:>7} {case:<32} {ratio:6.2f}x")
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=["small", "medium"], choices=sorted(PRESETS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, help="write results JSON here")
+    parser.add_argument("--compare", type=Path, help="previous results JSON to compare against")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="ghpush-bench-") as tmp:
+        for size in args.sizes:
+            spec = PRESETS[size]
+            print(f"Creating {size} repository ({spec.files} files, {spec.commits} commits)...")
+            repo = create_repo(Path(tmp), spec)
+            results[size] = bench_repo(repo, args.repeat)
+            for case, result in results[size].items():
+                print(f"  {case:<32} {result['best_s'] * 1000:9.1f} ms"
+                      f"  peak {result['peak_mem_bytes'] / 1024:9.0f} KiB")
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+        "presets": {size: PRESETS[size].as_dict() for size in args.sizes},
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""Generate throwaway git repositories with a known diff shape for benchmarks."""
+import os
+import random
+import subprocess
+from pathlib import Path
+
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "ghpush-bench",
+    "GIT_AUTHOR_EMAIL": "bench@example.com",
+    "GIT_COMMITTER_NAME": "ghpush-bench",
+    "GIT_COMMITTER_EMAIL": "bench@example.com",
+    "GIT_CONFIG_NOSYSTEM": "1",
+}
+
+class RepoSpec:
+    """Shape of a synthetic repository and of the branch diff against its base."""
+
+    def __init__(self, name: str, files: int, lines_per_file: int = 60, modified: float = 0.5,
+                 binary_files: int = 0, renames: int = 0, commits: int = 5, seed: int = 1234):
+        self.name = name
+        self.files = files
+        self.lines_per_file = lines_per_file
+        self.modified = modified
+        self.binary_files = binary_files
+        self.renames = renames
+        self.commits = commits
+        self.seed = seed
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+PRESETS = {
+    "small": RepoSpec("small", files=20, commits=3),
+    "medium": RepoSpec("medium", files=500, binary_files=10, renames=20, commits=50),
+    "large": RepoSpec("large", files=5000, lines_per_file=80, binary_files=50, renames=200, commits=300),
+}
+
+def _git(repo: Path, *args: str):
+    env = dict(os.environ, **GIT_ENV)
+    subprocess.run(["git", *args], cwd=repo, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def _source_file(rng: random.Random, index: int, lines: int) -> str:
+    body = [f"def function_{index}_{line}(value):\n    return value * {rng.randint(1, 999)}\n"
+            for line in range(lines // 2)]
+    return f'"""Module {index}."""\n' + "".join(body)
+
+def create_repo(root: Path, spec: RepoSpec) -> Path:
+    """Create a repo under root with a 'main' base and a checked-out 'feature' branch.
+
+    'feature' tracks 'origin/main' (a local bare repository), so
+    ``get_commit_messages`` sees all of the branch's commits.
+    """
+    rng = random.Random(spec.seed)
+    repo = root / spec.name
+    repo.mkdir(parents=True)
+    _git(repo, "init", "-q", "-b", "main")
+
+    paths = [Path(f"pkg{index % 25}") / f"module_{index}.py" for index in range(spec.files)]
+    for index, path in enumerate(paths):
+        (repo / path.parent).mkdir(exist_ok=True)
+        (repo / path).write_text(_source_file(rng, index, spec.lines_per_file))
+    for index in range(spec.binary_files):
+        (repo / f"asset_{index}.bin").write_bytes(bytes(rng.getrandbits(8) for _ in range(2048)))
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-q", "-m", "Initial commit")
+
+    # A local bare "origin" so the feature branch can track origin/main
+    remote = root / f"{spec.name}-origin.git"
+    _git(root, "init", "-q", "--bare", str(remote))
+    _git(repo, "remote", "add", "origin", str(remote))
+    _git(repo, "push", "-q", "origin", "main")
+
+    _git(repo, "checkout", "-q", "-b", "feature")
+    _git(repo, "branch", "-q", "--set-upstream-to=origin/main")
+
+    modified = rng.sample(range(spec.files), int(spec.files * spec.modified))
+    renamed = set(rng.sample(range(spec.files), min(spec.renames, spec.files)))
+    batches = [modified[i::max(spec.commits, 1)] for i in range(max(spec.commits, 1))]
+    current = list(paths)
+    for number, batch in enumerate(batches):
+        for index in batch:
+            path = repo / current[index]
+            lines = path.read_text().splitlines(keepends=True)
+            for _ in range(max(1, len(lines) // 10)):
+                position = rng.randrange(len(lines))
+                lines[position] = f"    # changed in commit {number}: {rng.random()}\n"
+            path.write_text("".join(lines))
+        if number == 0:
+            for index in renamed:
+                current[index] = paths[index].with_name(f"renamed_{index}.py")
+                _git(repo, "mv", str(paths[index]), str(current[index]))
+            for index in range(spec.binary_files // 2):
+                (repo / f"asset_{index}.bin").write_bytes(bytes(rng.getrandbits(8) for _ in range(2048)))
+        _git(repo, "add", "-A")
+        _git(repo, "commit", "-q", "--allow-empty", "-m", f"Change batch {number}\n\nDetails for batch {number}.")
+    return repo
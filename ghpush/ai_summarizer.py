@@ -1,82 +1,631 @@
 """OpenAI integration for PR summary generation."""
-import os
-from typing import Tuple
-from openai import OpenAI
-from dotenv import load_dotenv
+import random
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 from rich.console import Console
 
-# Load environment variables from .env file
-load_dotenv()
+from .cache import SummaryCache
+from .config import get_setting
+from .context_packer import PackedContext
+from .diff_summary import DiffSummary
+from .llm_providers import CircuitOpenError, Provider, ProviderRouter, load_providers
+from .tracing import instrument, tracer
 
 console = Console()
 
+STRUCTURE_HEADER = "Structural Changes (functions and classes added, removed or modified):\n"
+
+SYSTEM_PROMPT = "You are a helpful assistant that generates clear and concise PR titles and descriptions based on git diffs and commit messages."
+
+RESPONSE_FORMAT = ("\n\nPlease provide your response in the following format:\n"
+                   "TITLE: <concise title>\n"
+                   "DESCRIPTION:\n<detailed description with markdown formatting>")
+
+TRUNCATED_NOTE = "(Only the most relevant hunks are shown; remaining files are listed with line counts.)\n"
+
+MAP_INSTRUCTIONS = ("Summarize what changed in each file of this part: for every file, write a line "
+                    "`### <path>` followed by 1-3 concise markdown bullet points. Do not write a title.")
+
+class StreamingResponseParser:
+    """Incrementally parse a streamed ``TITLE:`` / ``DESCRIPTION:`` response.
+
+    ``on_title`` fires as soon as the title line is complete and
+    ``on_description_line`` once per finished description line.
+    """
+
+    def __init__(self, on_title: Optional[Callable[[str], None]] = None,
+                 on_description_line: Optional[Callable[[str], None]] = None):
+        self.on_title = on_title
+        self.on_description_line = on_description_line
+        self.title = None
+        self.in_description = False
+        self._buffer = ""
+
+    def feed(self, delta: str):
+        """Consume the next piece of streamed text."""
+        self._buffer += delta
+        while "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            self._handle_line(line)
+
+    def close(self):
+        """Flush a trailing line that had no newline."""
+        if self._buffer:
+            line, self._buffer = self._buffer, ""
+            self._handle_line(line)
+
+    def _handle_line(self, line: str):
+        stripped = line.strip()
+        if stripped.startswith('DESCRIPTION:'):
+            self.in_description = True
+            line = stripped[len('DESCRIPTION:'):].strip()
+            if not line:
+                return
+        if self.in_description:
+            if self.on_description_line:
+                self.on_description_line(line)
+        elif self.title is None and stripped.startswith('TITLE:'):
+            self.title = stripped[len('TITLE:'):].strip()
+            if self.on_title:
+                self.on_title(self.title)
+
+def _split_file_sections(text: str) -> Dict[str, str]:
+    """The ``### <path>`` sections of a map response, by path."""
+    sections = {}
+    lines = None
+    for line in text.splitlines():
+        if line.startswith('### '):
+            lines = sections.setdefault(line[4:].strip().strip('`'), [])
+        elif lines is not None:
+            lines.append(line)
+    return {path: "\n".join(lines).strip() for path, lines in sections.items() if "\n".join(lines).strip()}
+
+class _HedgeLost(Exception):
+    """Raised in the slower of two hedged requests to abandon it."""
+
+class AIDeadlineExceeded(TimeoutError):
+    """A request, or all requests for one AI summary, ran out of time."""
+
+def _is_outage(error: Exception) -> bool:
+    """Whether error means the provider is down or unreachable (a 5xx, a
+    connection failure or a timeout), as opposed to rate limiting or a
+    bad request. Only outages count toward the circuit breaker."""
+    from openai import APIConnectionError, APIStatusError
+
+    if isinstance(error, APIStatusError):
+        return error.status_code >= 500
+    if isinstance(error, (APIConnectionError, TimeoutError, ConnectionError)):
+        return True
+    # Network errors while reading a stream come from the HTTP client
+    # unwrapped. Only look httpx up: importing it from a worker thread races
+    # with the SDK's own check for it in other requests
+    httpx = sys.modules.get('httpx')
+    return httpx is not None and isinstance(error, httpx.TransportError)
+
 class AISummarizer:
-    def __init__(self):
-        self.api_key = os.getenv('OPENAI_API_KEY')
-        self.client = None
-        if self.api_key:
-            self.client = OpenAI(api_key=self.api_key)
-
-    def generate_summary(self, diff_text: str, commit_messages: list[str]) -> Tuple[str, str]:
-        """Generate PR title and description using OpenAI"""
-        if not self.api_key or not self.client:
+    MODEL = "gpt-4o-mini"
+    TEMPERATURE = 0.5
+    MAX_ATTEMPTS = 5
+    BACKOFF_BASE = 1.0
+    BACKOFF_CAP = 30.0
+
+    def __init__(self, memory_cache_entries: int = 0):
+        self.providers = load_providers()
+        self.model = self.providers[0].model if self.providers else get_setting('model', self.MODEL)
+        self.temperature = self.TEMPERATURE
+        self.cache = None
+        if get_setting('cache', True):
+            self.cache = SummaryCache(
+                max_bytes=get_setting('cache_max_mb', 50) * 1024 * 1024,
+                max_age=get_setting('cache_max_age_days', 30) * 24 * 3600,
+                memory_entries=memory_cache_entries
+            )
+        self.hedge = get_setting('hedge', False)
+        self.request_timeout = get_setting('ai_request_timeout_s', 60.0)
+        self.deadline = get_setting('ai_deadline_s', 120.0)
+        self._router = None
+
+    @property
+    def router(self) -> ProviderRouter:
+        """Routes requests to the fastest available provider, created on first use."""
+        if self._router is None:
+            self._router = ProviderRouter(self.providers)
+        return self._router
+
+    @property
+    def enabled(self) -> bool:
+        """Whether AI summarization is available."""
+        return bool(self.providers)
+
+    def _start_deadline(self) -> float:
+        """Monotonic time by which one summary (all of its requests) must be done."""
+        return time.monotonic() + self.deadline
+
+    def _warn_fallback(self, error: Exception, fallback: str = ""):
+        if isinstance(error, CircuitOpenError):
+            console.print(f"[yellow]Warning: skipping AI summarization ({error}). {fallback}".rstrip() + "[/]")
+        else:
+            console.print(f"[yellow]Warning: AI summarization failed ({error}). {fallback}".rstrip() + "[/]")
+
+    def generate_summary(self, changed_files: DiffSummary, diff_context: str,
+                         commit_messages: List[str], truncated: bool = False,
+                         on_delta: Optional[Callable[[str], None]] = None,
+                         structure: str = None, fallback: bool = True) -> Tuple[str, str]:
+        """Generate PR title and description using OpenAI
+
+        ``on_delta`` receives the response text incrementally as it streams in.
+        ``structure`` is a list of the functions and classes that changed.
+        If the model can't be used, the basic summary is returned, or
+        ``(None, None)`` without ``fallback``.
+        """
+        if not self.enabled:
             # Fallback to basic summary when no API key
-            return self.generate_basic_summary(diff_text)
+            return self.generate_basic_summary(changed_files) if fallback else (None, None)
 
         try:
             # Prepare the prompt
-            prompt = self._create_prompt(diff_text, commit_messages)
-
-            # Get completion from OpenAI using ChatCompletion API
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that generates clear and concise PR titles and descriptions based on git diffs and commit messages."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.5,
-                max_tokens=1000
-            )
+            prompt = self._create_prompt(diff_context, commit_messages, truncated, structure)
 
-            # Parse the response
-            content = response.choices[0].message.content
+            # Get completion from OpenAI and parse the response
+            content = self._complete(prompt, on_delta=on_delta, purpose='summary',
+                                     deadline=self._start_deadline())
             title, description = self._parse_ai_response(content)
             return title, description
 
         except Exception as e:
-            console.print(f"[yellow]Warning: AI summarization failed ({str(e)}). Using basic summarization.[/]")
-            return self.generate_basic_summary(diff_text)
+            if not fallback:
+                self._warn_fallback(e)
+                return None, None
+            self._warn_fallback(e, "Using basic summarization.")
+            return self.generate_basic_summary(changed_files)
+
+    def generate_update_summary(self, previous_title: str, previous_description: str,
+                                diff_context: str, commit_messages: List[str], truncated: bool = False,
+                                on_delta: Optional[Callable[[str], None]] = None,
+                                structure: str = None) -> Tuple[str, str]:
+        """Amend an earlier title and description with the changes made since.
+
+        Returns ``(None, None)`` if the model could not be used, so the
+        caller can regenerate from the full diff instead.
+        """
+        if not self.enabled:
+            return None, None
+
+        try:
+            prompt = self._create_update_prompt(previous_title, previous_description,
+                                                diff_context, commit_messages, truncated, structure)
+            content = self._complete(prompt, on_delta=on_delta, purpose='update',
+                                     deadline=self._start_deadline())
+            return self._parse_ai_response(content)
+        except CircuitOpenError:
+            # The full summary would be skipped the same way and warns about it
+            return None, None
+        except Exception as e:
+            console.print(f"[yellow]Warning: AI update failed ({str(e)}). Regenerating the full summary.[/]")
+            return None, None
+
+    def generate_map_reduce_summary(self, changed_files: DiffSummary, chunks: Iterable[PackedContext],
+                                    commit_messages: List[str], concurrency: int = 4,
+                                    on_delta: Optional[Callable[[str], None]] = None,
+                                    structure: str = None, fallback: bool = True) -> Tuple[str, str]:
+        """Summarize diff chunks concurrently, then reduce them into one PR title and description.
+
+        ``chunks`` may be a lazy iterator; at most ``2 * concurrency`` chunks
+        are held in memory at a time. The summary of each file in a chunk
+        is cached under the digest of its patch, so a chunk whose files
+        were all summarized before needs no request, however the diff is
+        split into chunks this time. Failures are handled as in
+        ``generate_summary``.
+        """
+        if not self.enabled:
+            return self.generate_basic_summary(changed_files) if fallback else (None, None)
+
+        try:
+            deadline = self._start_deadline()
+            with tracer.span('ai.map', concurrency=concurrency) as span:
+                partials = self._map_chunks(chunks, concurrency, deadline)
+                span.set('chunks', len(partials))
+            content = self._complete(self._create_reduce_prompt(partials, commit_messages, structure),
+                                     on_delta=on_delta, purpose='reduce', deadline=deadline)
+            return self._parse_ai_response(content)
+        except Exception as e:
+            if not fallback:
+                self._warn_fallback(e)
+                return None, None
+            self._warn_fallback(e, "Using basic summarization.")
+            return self.generate_basic_summary(changed_files)
+
+    def _map_chunks(self, chunks: Iterable[PackedContext], concurrency: int, deadline: float = None) -> List[str]:
+        """Run the per-chunk summaries on a bounded thread pool.
+
+        Returns the partial summaries for the reduce step: one per file,
+        ordered by path, then the chunk summaries that couldn't be split
+        by file, in chunk order.
+        """
+        by_file = {}
+        unsplit = []
+        futures = []
+        pending = set()
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            for index, chunk in enumerate(chunks):
+                keys = self._file_keys(chunk)
+                cached = self._cached_files(keys)
+                if cached is not None:
+                    by_file.update(cached)
+                    continue
+                while len(pending) >= 2 * concurrency:
+                    _, pending = wait(pending, return_when=FIRST_COMPLETED)
+                future = pool.submit(instrument(f"ai.map_chunk.{index}", self._map_chunk), chunk, keys, deadline)
+                futures.append(future)
+                pending.add(future)
+            for future in futures:
+                files, content = future.result()
+                by_file.update(files)
+                if content is not None:
+                    unsplit.append(content)
+        return [f"### {path}\n{by_file[path]}" for path in sorted(by_file)] + unsplit
+
+    def _file_keys(self, chunk: PackedContext) -> Dict[str, str]:
+        """Cache key of the summary of each file in chunk, by path."""
+        model = self.providers[0].model_for('map') if self.providers else self.model
+        return {path: SummaryCache.make_key('file', model, self.temperature, SYSTEM_PROMPT, MAP_INSTRUCTIONS,
+                                            path, digest)
+                for path, digest in chunk.files}
+
+    def _cached_files(self, keys: Dict[str, str]) -> Optional[Dict[str, str]]:
+        """Cached summaries of the files in keys, or None unless all are cached."""
+        if self.cache is None or not keys:
+            return None
+        found = {}
+        for path, key in keys.items():
+            summary = self.cache.get(key)
+            if summary is None:
+                return None
+            found[path] = summary
+        return found
+
+    def _map_chunk(self, chunk: PackedContext, keys: Dict[str, str],
+                   deadline: float = None) -> Tuple[Dict[str, str], Optional[str]]:
+        """Summarize one chunk into per-file summaries, caching each.
+
+        Returns those summaries, or the whole response (second) when it
+        doesn't have a section for every file.
+        """
+        content = self._complete(self._create_map_prompt(chunk.text), max(400, 100 * len(keys)),
+                                 purpose='map', deadline=deadline)
+        sections = _split_file_sections(content)
+        found = {path: sections[path] for path in keys if path in sections}
+        if self.cache is not None:
+            for path, summary in found.items():
+                self.cache.put(keys[path], summary)
+        if keys and len(found) == len(keys):
+            return found, None
+        return {}, content
 
-    def generate_basic_summary(self, diff_text: str) -> Tuple[str, str]:
+    def _complete(self, prompt: str, max_tokens: int = 1000,
+                  on_delta: Optional[Callable[[str], None]] = None, purpose: str = 'summary',
+                  deadline: float = None) -> str:
+        """Run one chat completion, served from the summary cache when possible.
+
+        ``deadline`` is a ``time.monotonic()`` value shared by all requests
+        made for one summary; it defaults to ``ai_deadline_s`` from now.
+        """
+        # Keyed on the configured model rather than the provider that ends up
+        # serving the request, so routing changes don't invalidate the cache
+        model = self.providers[0].model_for(purpose) if self.providers else self.model
+        with tracer.span('ai.complete', model=model, purpose=purpose, prompt_chars=len(prompt)) as span:
+            key = None
+            if self.cache is not None:
+                key = SummaryCache.make_key(model, self.temperature, max_tokens, SYSTEM_PROMPT, prompt)
+                cached = self.cache.get(key)
+                span.set('cache_hit', cached is not None)
+                if cached is not None:
+                    if on_delta:
+                        on_delta(cached)
+                    return cached
+            content = self._request_completion(prompt, max_tokens, on_delta, purpose, deadline)
+            if key is not None and content:
+                self.cache.put(key, content)
+            return content
+
+    def _request_completion(self, prompt: str, max_tokens: int,
+                            on_delta: Optional[Callable[[str], None]] = None, purpose: str = 'summary',
+                            deadline: float = None) -> str:
+        """Call the providers, failing over and backing off on rate limits and transient errors.
+
+        Each attempt goes to the next provider in routing order (fastest
+        available first); backoff only applies once every provider has been
+        tried, and providers whose circuit another run opens meanwhile are
+        not retried. Every attempt is limited to ``ai_request_timeout_s``
+        (or the provider's own timeout) and all of them together to
+        ``deadline``. Providers whose circuit breaker is open are skipped,
+        and CircuitOpenError is raised without a request if that leaves
+        none. A provider that failed with an outage counts one failure
+        toward its circuit per call, however many attempts it took; rate
+        limits never count. With ``on_delta`` the response is streamed; a
+        stream that fails after text has been delivered is not retried,
+        since the caller has already rendered part of it.
+        """
+        if deadline is None:
+            deadline = self._start_deadline()
+        stream = on_delta is not None and get_setting('stream', True)
+        providers = self.router.ordered()
+        # Providers with an outage during this call and no success since
+        failed = {}
+        try:
+            return self._retry(prompt, max_tokens, on_delta, purpose, deadline, stream, providers, failed)
+        finally:
+            for provider in failed.values():
+                self.router.record_failure(provider)
+
+    def _retry(self, prompt: str, max_tokens: int, on_delta: Optional[Callable[[str], None]],
+               purpose: str, deadline: float, stream: bool, providers: List[Provider], failed: dict) -> str:
+        """The attempt loop of ``_request_completion``."""
+        from openai import APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise AIDeadlineExceeded(f"no response within {self.deadline:g}s")
+            offset = (attempt - 1) % len(providers)
+            rotation = providers[offset:] + providers[:offset]
+            received = []
+            try:
+                if self.hedge and len(rotation) > 1:
+                    return self._request_hedged(rotation[0], rotation[1], prompt, max_tokens, stream,
+                                                on_delta, received, attempt, purpose, deadline, failed)
+                return self._request_from(rotation[0], prompt, max_tokens, stream, on_delta, received,
+                                          attempt, purpose, self._attempt_timeout(rotation[0], deadline),
+                                          failed)
+            except (RateLimitError, APIConnectionError, APITimeoutError, APIStatusError,
+                    AIDeadlineExceeded) as e:
+                status = getattr(e, 'status_code', None)
+                retryable = not received and (status is None or status == 429 or status >= 500)
+                if not retryable or attempt == self.MAX_ATTEMPTS:
+                    raise
+                providers = self.router.closed(providers)
+                if not providers:
+                    raise
+                tracer.count('ai.retries')
+                if attempt % len(providers) == 0:
+                    delay = self._backoff_delay(attempt // len(providers), e)
+                    if time.monotonic() + delay >= deadline:
+                        raise AIDeadlineExceeded(
+                            f"no response within {self.deadline:g}s (last error: {e})") from e
+                    time.sleep(delay)
+
+    def _attempt_timeout(self, provider: Provider, deadline: float) -> float:
+        """Seconds one request to provider may take: its timeout, capped by the deadline."""
+        timeout = provider.timeout or self.request_timeout
+        return max(0.001, min(timeout, deadline - time.monotonic()))
+
+    def _request_from(self, provider: Provider, prompt: str, max_tokens: int, stream: bool,
+                      on_delta: Optional[Callable[[str], None]], received: List[str],
+                      attempt: int, purpose: str, timeout: float, failed: dict) -> str:
+        """One traced request to provider; an outage adds it to failed and a
+        success removes it."""
+        with tracer.span('ai.request', attempt=attempt, stream=stream, provider=provider.name) as span:
+            try:
+                content = self._request_once(provider, prompt, max_tokens, stream, on_delta,
+                                             received, span, purpose, timeout)
+            except Exception as e:
+                if _is_outage(e):
+                    failed[provider.name] = provider
+                raise
+            failed.pop(provider.name, None)
+            return content
+
+    def _request_hedged(self, primary: Provider, backup: Provider, prompt: str, max_tokens: int,
+                        stream: bool, on_delta: Optional[Callable[[str], None]], received: List[str],
+                        attempt: int, purpose: str, deadline: float, failed: dict) -> str:
+        """Send prompt to primary and, if it hasn't answered within its p95
+        latency, also to backup; the first to answer wins.
+
+        "Answered" means the first streamed token, or the whole response
+        when not streaming. Only the winner's text reaches ``on_delta``;
+        the other request is abandoned.
+        """
+        lock = threading.Lock()
+        answered = threading.Event()
+        winner = []
+
+        def run(provider: Provider, index: int) -> str:
+            def deliver(delta: str):
+                with lock:
+                    if not winner:
+                        winner.append(index)
+                        answered.set()
+                    elif winner[0] != index:
+                        raise _HedgeLost()
+                received.append(delta)
+                if on_delta:
+                    on_delta(delta)
+
+            try:
+                content = self._request_from(provider, prompt, max_tokens, stream, deliver, [],
+                                             attempt, purpose, self._attempt_timeout(provider, deadline),
+                                             failed)
+            finally:
+                answered.set()
+            with lock:
+                # An empty response never went through deliver
+                if not winner:
+                    winner.append(index)
+                elif winner[0] != index:
+                    raise _HedgeLost()
+            return content
+
+        pool = ThreadPoolExecutor(max_workers=2)
+        try:
+            futures = [pool.submit(run, primary, 0)]
+            if not answered.wait(min(self.router.hedge_delay(primary),
+                                     max(0, deadline - time.monotonic()))):
+                tracer.count('ai.hedged_requests')
+                futures.append(pool.submit(run, backup, 1))
+            errors = []
+            for future in as_completed(futures):
+                error = future.exception()
+                if error is None:
+                    return future.result()
+                if not isinstance(error, _HedgeLost):
+                    errors.append(error)
+            raise errors[0]
+        finally:
+            pool.shutdown(wait=False)
+
+    def _request_once(self, provider: Provider, prompt: str, max_tokens: int, stream: bool,
+                      on_delta: Optional[Callable[[str], None]], received: List[str], span,
+                      purpose: str = 'summary', timeout: float = None) -> str:
+        """Make a single API request; streamed text is collected into received.
+
+        ``timeout`` bounds connecting and each read, so a hung server fails
+        the attempt instead of stalling the run. A stream is also abandoned
+        once it has taken ``timeout`` in total, however steadily text
+        arrives, raising AIDeadlineExceeded.
+        """
+        started = time.perf_counter()
+        ends = time.monotonic() + timeout if timeout else None
+        model = provider.model_for(purpose)
+        span.set('model', model)
+        response = provider.client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=self.temperature,
+            max_tokens=max_tokens,
+            stream=stream,
+            timeout=timeout
+        )
+        if not stream:
+            content = response.choices[0].message.content
+            self.router.record_success(provider, time.perf_counter() - started)
+            if response.usage is not None:
+                span.set('prompt_tokens', response.usage.prompt_tokens)
+                span.set('completion_tokens', response.usage.completion_tokens)
+            if on_delta and content:
+                on_delta(content)
+            return content
+        try:
+            for chunk in response:
+                if ends is not None and time.monotonic() > ends:
+                    raise AIDeadlineExceeded(f"response from {provider.name} took longer than {timeout:g}s")
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if not received:
+                        first_token = time.perf_counter() - started
+                        span.set('first_token_ms', round(first_token * 1000, 1))
+                        self.router.record_success(provider, first_token)
+                    received.append(delta)
+                    on_delta(delta)
+        finally:
+            # Release the connection even if the stream was abandoned part way
+            response.close()
+        span.set('response_chars', sum(len(delta) for delta in received))
+        return "".join(received)
+
+    def _backoff_delay(self, attempt: int, error: Exception) -> float:
+        """Jittered exponential backoff that honors a Retry-After header."""
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.BACKOFF_CAP)
+            except ValueError:
+                pass
+        delay = min(self.BACKOFF_CAP, self.BACKOFF_BASE * 2 ** (attempt - 1))
+        return random.uniform(delay / 2, delay)
+
+    def generate_basic_summary(self, changed_files: DiffSummary) -> Tuple[str, str]:
         """Generate a basic summary without AI."""
         # Simple logic to create a basic summary
-        files_changed = len([line for line in diff_text.split('\n') if line.startswith('diff --git')])
-        
+        files_changed = len(changed_files)
+
         title = f"Update {files_changed} file{'s' if files_changed != 1 else ''}"
-        description = "Changes include:\n" + "\n".join([
-            line.split(' b/')[-1] 
-            for line in diff_text.split('\n') 
-            if line.startswith('diff --git')
-        ])
-        
+        description = "Changes include:\n" + "\n".join(f.path for f in changed_files)
+
         return title, description
 
-    def _create_prompt(self, diff_text: str, commit_messages: list[str]) -> str:
+    @staticmethod
+    def _context_sections(commit_messages: List[str], structure: str = None,
+                          header: str = "Commit Messages:") -> str:
+        """The commit message and structural change sections shared by the prompts."""
+        text = ""
+        if commit_messages:
+            text += f"{header}\n"
+            text += "".join(f"- {msg}\n" for msg in commit_messages)
+            text += "\n"
+        if structure:
+            text += STRUCTURE_HEADER + structure + "\n"
+        return text
+
+    def _create_prompt(self, diff_context: str, commit_messages: List[str], truncated: bool = False,
+                       structure: str = None) -> str:
         """Create the prompt for OpenAI."""
         prompt = "Please generate a Pull Request title and description based on the following information:\n\n"
 
-        if commit_messages:
-            prompt += "Commit Messages:\n"
-            for msg in commit_messages:
-                prompt += f"- {msg}\n"
-            prompt += "\n"
+        prompt += self._context_sections(commit_messages, structure)
 
         prompt += "Git Diff Summary:\n"
-        prompt += diff_text[:3000] + ("..." if len(diff_text) > 3000 else "")
+        if truncated:
+            prompt += TRUNCATED_NOTE
+        prompt += diff_context
+
+        prompt += RESPONSE_FORMAT
+
+        return prompt
+
+    def _create_map_prompt(self, chunk: str) -> str:
+        """Create the prompt summarizing one chunk of a larger diff."""
+        prompt = "The following is one part of a larger pull request.\n"
+        prompt += MAP_INSTRUCTIONS + "\n\n"
+        # Commit messages are left to the reduce step so that a chunk's
+        # prompt (and its cached summaries) only changes when its files do
+        prompt += "Git Diff:\n"
+        prompt += chunk
+        return prompt
+
+    def _create_reduce_prompt(self, partials: List[str], commit_messages: List[str],
+                              structure: str = None) -> str:
+        """Create the prompt merging file and chunk summaries into the final PR text."""
+        prompt = "Please generate a Pull Request title and description based on the following information:\n\n"
+
+        prompt += self._context_sections(commit_messages, structure)
+
+        prompt += "Summaries of the changes in each file of the diff:\n"
+        for partial in partials:
+            prompt += f"\n{partial.strip()}\n"
+
+        prompt += RESPONSE_FORMAT
+
+        return prompt
+
+    def _create_update_prompt(self, previous_title: str, previous_description: str, diff_context: str,
+                              commit_messages: List[str], truncated: bool = False,
+                              structure: str = None) -> str:
+        """Create the prompt amending an existing PR description with new commits."""
+        prompt = "A Pull Request already has the title and description below. New commits have been pushed "
+        prompt += "since it was written. Update the title and description so they describe the whole PR "
+        prompt += "including the new changes: keep what still applies, revise what the new commits changed "
+        prompt += "and add what is new.\n\n"
+
+        prompt += f"Current Title: {previous_title}\n"
+        prompt += f"Current Description:\n{previous_description}\n\n"
+
+        prompt += self._context_sections(commit_messages, structure, header="New Commit Messages:")
+
+        prompt += "Git Diff of the New Commits:\n"
+        if truncated:
+            prompt += TRUNCATED_NOTE
+        prompt += diff_context
 
-        prompt += "\n\nPlease provide your response in the following format:\n"
-        prompt += "TITLE: <concise title>\n"
-        prompt += "DESCRIPTION:\n<detailed description with markdown formatting>"
+        prompt += RESPONSE_FORMAT
 
         return prompt
 
@@ -0,0 +1,246 @@
+"""Batch PR preparation for many (repo, branch, base) tuples in one process."""
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import IO, Dict, List, Optional
+
+from rich.console import Console
+
+from .ai_summarizer import AISummarizer
+from .config import get_setting
+from .diff_analyzer import DiffAnalyzer
+from .github_api import GitHubClient, get_github_token, publish_pull_request
+from .git_operations import GitOperations
+from .tracing import tracer
+
+console = Console(stderr=True)
+
+class BatchItem:
+    """One branch to publish."""
+    __slots__ = ('repo', 'branch', 'base')
+
+    def __init__(self, repo: Path, branch: str, base: str):
+        self.repo = repo
+        self.branch = branch
+        self.base = base
+
+def load_manifest(path: Path) -> List[BatchItem]:
+    """Load a YAML or JSON manifest.
+
+    The manifest is either a list of items or a mapping with ``items`` and
+    optional ``defaults``. Each item has ``branch`` and optionally ``repo``
+    (relative to the manifest, default ".") and ``base`` (default "main")::
+
+        defaults:
+          base: main
+        items:
+          - repo: ../service-a
+            branch: feature/login
+          - repo: ../service-b
+            branch: fix/timeout
+            base: release
+    """
+    text = Path(path).read_text()
+    if Path(path).suffix in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError("Reading YAML manifests requires PyYAML (pip install ghpush[yaml]); use JSON instead.")
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+
+    defaults = {}
+    if isinstance(data, dict):
+        defaults = data.get('defaults') or {}
+        data = data.get('items') or []
+
+    root = Path(path).resolve().parent
+    items = []
+    for entry in data:
+        entry = {**defaults, **entry}
+        if not entry.get('branch'):
+            raise ValueError(f"Manifest entry without a branch: {entry}")
+        repo = Path(entry.get('repo', '.')).expanduser()
+        items.append(BatchItem(
+            repo=(root / repo).resolve() if not repo.is_absolute() else repo,
+            branch=entry['branch'],
+            base=entry.get('base', 'main'),
+        ))
+    return items
+
+class BatchRunner:
+    """Prepare PRs for many branches with shared, long-lived state.
+
+    All items share one AISummarizer (and so one pooled HTTP client for
+    the LLM), one GitHub API session and one GitOperations per repository.
+    Summaries run on a bounded worker pool and pushes (then PR creation)
+    on a separate one, so a slow push never holds up summarization. With
+    ``push_together`` each repository's branches go out in one multi-refspec
+    ``git push`` instead of one push per branch. One JSON line is written
+    per finished item.
+    """
+
+    def __init__(self, workers: int = 4, push_workers: int = 4, push: bool = True,
+                 push_together: bool = False):
+        self.workers = workers
+        self.push_workers = push_workers
+        self.push = push
+        self.push_together = push_together
+        self.summarizer = AISummarizer()
+        self.github: Optional[GitHubClient] = None
+        if push and get_setting('pr_backend', 'api') == 'api':
+            token = get_github_token()
+            if token:
+                self.github = GitHubClient(token)
+        self._repos: Dict[Path, GitOperations] = {}
+        self._analyzers: Dict[Path, DiffAnalyzer] = {}
+        self._read_locks: Dict[Path, threading.Lock] = {}
+        self._push_locks: Dict[Path, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._output_lock = threading.Lock()
+
+    def _git_ops(self, repo: Path):
+        """Shared GitOperations for repo, opened on first use."""
+        with self._lock:
+            if repo not in self._repos:
+                self._repos[repo] = git_ops = GitOperations(repo)
+                self._analyzers[repo] = DiffAnalyzer(ai_summarizer=self.summarizer,
+                                                     path_filter=git_ops.path_filter)
+                self._read_locks[repo] = threading.Lock()
+                self._push_locks[repo] = threading.Lock()
+            return self._repos[repo]
+
+    def _summarize(self, item: BatchItem):
+        git_ops = self._git_ops(item.repo)
+        with tracer.span('batch.summarize', repo=str(item.repo), branch=item.branch):
+            file_stats = git_ops.get_diff_stats(item.base, head=item.branch)
+            analyzer = self._analyzers[item.repo]
+            # Object reads through one Repo are not thread-safe
+            with self._read_locks[item.repo]:
+                commit_messages = git_ops.get_commit_messages(item.base, head=item.branch)
+                structure = analyzer.structural_diff(git_ops, item.base, file_stats, head=item.branch)
+            return analyzer.analyze_diff(
+                git_ops.iter_diff_lines(item.base, head=item.branch,
+                                        exclude=analyzer.excluded_paths(file_stats)),
+                commit_messages, file_stats, structure=structure
+            )
+
+    def _push(self, item: BatchItem):
+        git_ops = self._git_ops(item.repo)
+        with tracer.span('batch.push', repo=str(item.repo), branch=item.branch):
+            # --set-upstream writes .git/config, which git locks per repository
+            with self._push_locks[item.repo]:
+                git_ops.push_branch(item.branch, item.base)
+
+    def _push_all(self, repo: Path, items: List[BatchItem]):
+        """Push every item's branch in repo with a single `git push`."""
+        git_ops = self._git_ops(repo)
+        with tracer.span('batch.push', repo=str(repo), branch=",".join(item.branch for item in items)):
+            with self._push_locks[repo]:
+                git_ops.push_branches([item.branch for item in items])
+
+    def _publish(self, item: BatchItem, title: str, description: str):
+        """Create or update the item's PR through the shared GitHub session."""
+        return publish_pull_request(self.github, self._git_ops(item.repo), item.branch, item.base,
+                                    title, description)
+
+    def _record(self, job: '_Job') -> dict:
+        """Result record for a job whose futures are all done."""
+        item = job.item
+        record = {'repo': str(item.repo), 'branch': item.branch, 'base': item.base}
+        try:
+            title, description = job.summary.result()
+            if job.pushed is not None:
+                job.pushed.result()
+            if job.published is not None:
+                pr_url, created = job.published.result()
+                record['pr_created'] = created
+            else:
+                pr_url = self._git_ops(item.repo).create_pr_url(item.base, item.branch, title, description)
+            record.update(status='ok', title=title, description=description, pr_url=pr_url)
+        except Exception as e:
+            record.update(status='error', error=f"{type(e).__name__}: {e}")
+        record['duration_s'] = round(time.perf_counter() - job.started, 3)
+        return record
+
+    def run(self, items: List[BatchItem], output: IO) -> int:
+        """Process all items, writing one JSON line per item as it finishes; returns the failure count."""
+        failures = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as summary_pool, \
+                ThreadPoolExecutor(max_workers=self.push_workers) as push_pool:
+            # A future may be shared by several jobs (a combined push)
+            owners: Dict[Future, List[_Job]] = {}
+            pushes: Dict[Path, Future] = {}
+            if self.push and self.push_together:
+                by_repo: Dict[Path, List[BatchItem]] = {}
+                for item in items:
+                    by_repo.setdefault(item.repo, []).append(item)
+                for repo, repo_items in by_repo.items():
+                    pushes[repo] = push_pool.submit(self._push_all, repo, repo_items)
+
+            for item in items:
+                job = _Job(item, summary_pool.submit(self._summarize, item))
+                owners.setdefault(job.summary, []).append(job)
+                if self.push:
+                    job.pushed = pushes.get(item.repo) or push_pool.submit(self._push, item)
+                    owners.setdefault(job.pushed, []).append(job)
+                job.pending = 2 if self.push else 1
+
+            while owners:
+                done, _ = wait(owners, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for job in owners.pop(future):
+                        job.pending -= 1
+                        if job.pending:
+                            continue
+                        if (self.github is not None and job.published is None
+                                and job.summary.exception() is None and job.pushed.exception() is None):
+                            # PR creation needs both the content and the pushed branch
+                            job.published = push_pool.submit(self._publish, job.item, *job.summary.result())
+                            job.pending = 1
+                            owners[job.published] = [job]
+                            continue
+                        record = self._record(job)
+                        if record['status'] != 'ok':
+                            failures += 1
+                        self._write(output, record)
+                        console.print(f"{'✅' if record['status'] == 'ok' else '❌'} "
+                                      f"{job.item.repo.name}:{job.item.branch}")
+
+        for git_ops in self._repos.values():
+            git_ops.close()
+        if self.github is not None:
+            self.github.close()
+        return failures
+
+    def _write(self, output: IO, record: dict):
+        with self._output_lock:
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+
+class _Job:
+    """In-flight futures for one item."""
+    __slots__ = ('item', 'summary', 'pushed', 'published', 'pending', 'started')
+
+    def __init__(self, item: BatchItem, summary: Future):
+        self.item = item
+        self.summary = summary
+        self.pushed: Optional[Future] = None
+        self.published: Optional[Future] = None
+        self.pending = 1
+        self.started = time.perf_counter()
+
+def run_batch(manifest: Path, output: IO, workers: int = None, push_workers: int = None,
+              push: bool = True) -> int:
+    """Run a manifest and return the number of failed items."""
+    items = load_manifest(manifest)
+    runner = BatchRunner(
+        workers=workers or get_setting('batch_workers', 4),
+        push_workers=push_workers or get_setting('batch_push_workers', 4),
+        push=push,
+    )
+    console.print(f"[bold blue]GHPush batch[/] - {len(items)} branch{'es' if len(items) != 1 else ''}")
+    return runner.run(items, output)
@@ -0,0 +1,198 @@
+"""Per-branch record of the last published summary, for incremental updates,
+and summaries precomputed per commit."""
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+from .config import Config, atomic_write_json, write_temp_file
+
+# Windows process query constants, for _process_alive
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+ERROR_ACCESS_DENIED = 5
+STILL_ACTIVE = 259
+
+def _process_alive(pid: int) -> bool:
+    """Whether a process with this pid is running, without signalling it."""
+    if os.name == 'nt':
+        # os.kill(pid, 0) would send CTRL_C_EVENT to the process group
+        import ctypes
+
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            # A process we may not query is still running
+            return ctypes.get_last_error() == ERROR_ACCESS_DENIED
+        try:
+            code = ctypes.c_ulong()
+            if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+                return True
+            return code.value == STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+class BranchSummaryStore:
+    """The last title and description ghpush produced for each branch.
+
+    One JSON file per (repository, branch) under ``~/.ghpush/branches``
+    records the base and the commit the summary covered, so the next run
+    only has to summarize the commits made since. Repositories are
+    identified by their top-level directory.
+    """
+
+    def __init__(self, directory: Path = None):
+        self.directory = directory or Config().config_dir / "branches"
+
+    def _path(self, repo_path: Path, branch: str) -> Path:
+        key = hashlib.sha256(f"{Path(repo_path).resolve()}\0{branch}".encode()).hexdigest()
+        return self.directory / f"{key}.json"
+
+    def load(self, repo_path: Path, branch: str) -> Optional[dict]:
+        """The stored summary for branch, or None."""
+        try:
+            with open(self._path(repo_path, branch), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, repo_path: Path, branch: str, base: str, head_sha: str, title: str, description: str):
+        """Record the summary covering branch up to head_sha, atomically."""
+        path = self._path(repo_path, branch)
+        entry = {
+            'repo': str(Path(repo_path).resolve()),
+            'branch': branch,
+            'base': base,
+            'head_sha': head_sha,
+            'title': title,
+            'description': description,
+            'updated_at': time.time(),
+        }
+        try:
+            atomic_write_json(path, entry)
+        except OSError:
+            pass
+
+class PrecomputedSummaryStore:
+    """Titles and descriptions computed ahead of time, keyed by commit.
+
+    One JSON file per (repository, HEAD SHA) under ``~/.ghpush/precomputed``
+    records the base and the base commit the summary was made against.
+    Repositories are identified by their top-level directory, so runs from
+    a subdirectory find what the hook (run from the top level) stored.
+    While a summary is being computed a ``.pending`` file holding the
+    computing process's pid claims the commit, so it is only summarized
+    once.
+    """
+
+    # Entries are only useful until the commit is published
+    MAX_AGE = 7 * 24 * 3600
+
+    def __init__(self, directory: Path = None):
+        self.directory = directory or Config().config_dir / "precomputed"
+
+    def _path(self, repo_path: Path, head_sha: str, suffix: str = ".json") -> Path:
+        key = hashlib.sha256(f"{Path(repo_path).resolve()}\0{head_sha}".encode()).hexdigest()
+        return self.directory / f"{key}{suffix}"
+
+    def load(self, repo_path: Path, head_sha: str) -> Optional[dict]:
+        """The summary precomputed for head_sha, or None."""
+        try:
+            with open(self._path(repo_path, head_sha), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, repo_path: Path, head_sha: str, branch: str, base: str, base_sha: str,
+             title: str, description: str):
+        """Record the summary of branch at head_sha against base (at base_sha), atomically."""
+        entry = {
+            'repo': str(Path(repo_path).resolve()),
+            'branch': branch,
+            'base': base,
+            'base_sha': base_sha,
+            'head_sha': head_sha,
+            'title': title,
+            'description': description,
+            'created_at': time.time(),
+        }
+        try:
+            atomic_write_json(self._path(repo_path, head_sha), entry)
+        except OSError:
+            pass
+        self.prune()
+
+    def claim(self, repo_path: Path, head_sha: str) -> bool:
+        """Mark head_sha as being summarized by this process.
+
+        Returns False if another live process already claimed it.
+        """
+        path = self._path(repo_path, head_sha, ".pending")
+        try:
+            tmp = write_temp_file(self.directory, str(os.getpid()))
+        except OSError:
+            return True
+        try:
+            for _ in range(2):
+                # Linking publishes the claim with its pid already written
+                try:
+                    os.link(tmp, path)
+                    return True
+                except FileExistsError:
+                    if self.pending(repo_path, head_sha):
+                        return False
+                    # Left behind by a process that died
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass
+                except OSError:
+                    return True
+            return False
+        finally:
+            os.unlink(tmp)
+
+    def release(self, repo_path: Path, head_sha: str):
+        try:
+            self._path(repo_path, head_sha, ".pending").unlink()
+        except OSError:
+            pass
+
+    def pending(self, repo_path: Path, head_sha: str) -> bool:
+        """Whether a live process other than this one is summarizing head_sha."""
+        try:
+            pid = int(self._path(repo_path, head_sha, ".pending").read_text())
+        except (OSError, ValueError):
+            return False
+        return pid != os.getpid() and _process_alive(pid)
+
+    def wait(self, repo_path: Path, head_sha: str, timeout: float, interval: float = 0.2) -> Optional[dict]:
+        """The summary for head_sha, waiting up to timeout seconds if it is
+        still being computed."""
+        deadline = time.monotonic() + timeout
+        while True:
+            entry = self.load(repo_path, head_sha)
+            if entry is not None or not self.pending(repo_path, head_sha) or time.monotonic() >= deadline:
+                return entry
+            time.sleep(interval)
+
+    def prune(self):
+        """Remove entries older than MAX_AGE."""
+        cutoff = time.time() - self.MAX_AGE
+        try:
+            for entry in os.scandir(self.directory):
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        os.unlink(entry.path)
+                except OSError:
+                    pass
+        except OSError:
+            pass
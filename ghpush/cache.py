@@ -0,0 +1,130 @@
+"""Content-addressed on-disk cache for AI summaries."""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from .config import Config, atomic_write_json
+
+class SummaryCache:
+    """Cache of LLM responses keyed by a hash of everything that shaped them.
+
+    Entries live under ``~/.ghpush/cache`` as one JSON file each. Writes go
+    through a temporary file and ``os.replace`` so concurrent ghpush runs
+    never see a partial entry. Reads refresh the file's mtime, which makes
+    the size- and age-based eviction least-recently-used.
+
+    Long-lived processes (the daemon) can also keep the ``memory_entries``
+    most recently used entries in memory.
+    """
+    PRUNE_INTERVAL = 600  # seconds between eviction scans
+
+    def __init__(self, directory: Path = None, max_bytes: int = 50 * 1024 * 1024,
+                 max_age: float = 30 * 24 * 3600, memory_entries: int = 0):
+        self.directory = directory or Config().config_dir / "cache"
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._memory_lock = threading.Lock()
+
+    def _remember(self, key: str, created: float, value: str):
+        if not self.memory_entries:
+            return
+        with self._memory_lock:
+            self._memory[key] = (created, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Hash the given inputs into a cache key."""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode('utf-8', 'surrogatepass'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for key, or None on a miss."""
+        if self.memory_entries:
+            with self._memory_lock:
+                entry = self._memory.get(key)
+                if entry is not None and time.time() - entry[0] <= self.max_age:
+                    self._memory.move_to_end(key)
+                    return entry[1]
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get('created', 0) > self.max_age:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._remember(key, entry.get('created', 0), entry.get('value'))
+        return entry.get('value')
+
+    def put(self, key: str, value: str):
+        """Store value under key atomically."""
+        self._remember(key, time.time(), value)
+        path = self._path(key)
+        try:
+            atomic_write_json(path, {'created': time.time(), 'value': value})
+        except OSError:
+            return
+        self._maybe_prune()
+
+    def _maybe_prune(self):
+        """Run eviction if nobody has done so recently."""
+        marker = self.directory / ".last_prune"
+        try:
+            if time.time() - marker.stat().st_mtime < self.PRUNE_INTERVAL:
+                return
+        except OSError:
+            pass
+        try:
+            marker.touch()
+        except OSError:
+            return
+        self.prune()
+
+    def prune(self):
+        """Drop expired entries, then least recently used ones until under max_bytes."""
+        now = time.time()
+        # Temp files left behind by interrupted writes
+        for path in self.directory.glob("*/.tmp-*"):
+            try:
+                if now - path.stat().st_mtime > 3600:
+                    path.unlink(missing_ok=True)
+            except OSError:
+                continue
+
+        entries = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.max_age:
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
@@ -1,28 +1,33 @@
 """Command line interface for GHPush."""
 import click
 from pathlib import Path
-import webbrowser
-import time
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
 from rich.console import Console
 from rich.panel import Panel
-from rich.progress import (
-    Progress, SpinnerColumn, TextColumn, 
-    BarColumn, TimeElapsedColumn, TaskProgressColumn
-)
-from rich.live import Live
-from rich.table import Table
-from rich import box
-from rich.style import Style
 from rich.text import Text
 
 from .git_operations import GitOperations
+from .ai_summarizer import StreamingResponseParser
+from .branch_state import BranchSummaryStore, PrecomputedSummaryStore
+from .config import get_setting
 from .diff_analyzer import DiffAnalyzer
+from .github_api import GitHubClient, get_github_token, publish_pull_request
+from .pipeline import Task, TaskGraph
+from . import tracing
+from .tracing import start_profiling, tracer
 from .validators import validate_openai_key, validate_github_auth
 
+if TYPE_CHECKING:
+    from rich.table import Table
+
 console = Console()
 
 class StatusProgress:
     def __init__(self):
+        from rich.progress import (
+            Progress, SpinnerColumn, TextColumn,
+            BarColumn, TimeElapsedColumn, TaskProgressColumn
+        )
         self.progress = Progress(
             SpinnerColumn(),
             TextColumn("[bold blue]{task.description}"),
@@ -57,8 +62,67 @@ class StatusProgress:
             description=f"{status} {description}"
         )
 
-def create_status_table() -> Table:
+    def task_started(self, task: Task):
+        """Show a progress bar for a pipeline task that has started."""
+        self.tasks[task.name] = self.add_task(task.description)
+
+    def task_finished(self, task: Task, success: bool):
+        """Mark a pipeline task's progress bar as done."""
+        self.complete_task(self.tasks[task.name], success=success)
+
+def render_stream(status_progress: StatusProgress) -> StreamingResponseParser:
+    """Print a streamed AI title and description above the progress bars as they arrive."""
+    progress_console = status_progress.progress.console
+
+    def on_title(title: str):
+        progress_console.print(Text.from_markup("[bold cyan]Title:[/] ") + Text(title))
+
+    def on_description_line(line: str):
+        progress_console.print(Text(line, style="dim"))
+
+    return StreamingResponseParser(on_title=on_title, on_description_line=on_description_line)
+
+def build_pr_url(git_ops: GitOperations, base: str, title: str, description: str,
+                 open_url: Callable[[str], None] = None) -> str:
+    """Build the compare URL with the generated content and open it
+    (with open_url, else in the browser)."""
+    pr_url = git_ops.create_pr_url(base, title=title, description=description)
+    if open_url is None:
+        import webbrowser
+
+        open_url = webbrowser.open
+    open_url(pr_url)
+    return pr_url
+
+def create_pull_request(git_ops: GitOperations, base: str, branch: str, title: str, description: str,
+                        client: GitHubClient = None, open_url: Callable[[str], None] = None) -> str:
+    """Create or update the PR through the GitHub API, falling back to the browser.
+
+    A given client is used (and left open) instead of a new one, and a
+    given open_url opens the compare page instead of the browser.
+    """
+    if get_setting('pr_backend', 'api') == 'api':
+        token = client.token if client is not None else get_github_token()
+        if token:
+            own_client = client is None
+            if own_client:
+                client = GitHubClient(token)
+            try:
+                pr_url, created = publish_pull_request(client, git_ops, branch, base, title, description)
+            finally:
+                if own_client:
+                    client.close()
+            if not created:
+                console.print(f"[cyan]Updated the existing pull request for '{branch}'[/]")
+            return pr_url
+        console.print("[yellow]No GitHub token found; opening the PR page in the browser instead[/]")
+    return build_pr_url(git_ops, base, title, description, open_url)
+
+def create_status_table() -> "Table":
     """Create a status table for progress display."""
+    from rich import box
+    from rich.table import Table
+
     table = Table(
         box=box.ROUNDED,
         expand=True,
@@ -70,95 +134,387 @@ def create_status_table() -> Table:
     table.add_column("Progress", ratio=2)
     return table
 
-@click.command()
-@click.option('--base', default='main', help='Base branch name')
-def main(base):
-    """GHPush - AI-powered GitHub PR creation tool."""
+def find_previous_summary(git_ops: GitOperations, branch: str, base: str) -> Optional[dict]:
+    """The stored summary for branch if it can be amended, else None.
+
+    A summary is only reused if it was made against the same base and its
+    commit is still in the branch's history (i.e. nothing was rebased or
+    force-pushed over it since).
+    """
+    previous = BranchSummaryStore().load(git_ops.toplevel, branch)
+    if not previous or previous.get('base') != base:
+        return None
+    if not git_ops.is_ancestor(previous['head_sha']):
+        console.print("[yellow]Branch history was rewritten; regenerating the full summary[/]")
+        return None
+    return previous
+
+def find_precomputed_summary(git_ops: GitOperations, head_sha: str, base: str) -> Optional[dict]:
+    """The summary precomputed for head_sha against base if it still applies.
+
+    It applies while base points at the same commit and nothing is
+    uncommitted. A summary still being computed (right after a commit)
+    is waited for, up to ai_deadline_s.
+    """
+    store = PrecomputedSummaryStore()
+    entry = store.load(git_ops.toplevel, head_sha)
+    if entry is None and store.pending(git_ops.toplevel, head_sha):
+        console.print("[cyan]Waiting for the summary precomputed after your last commit...[/]")
+        entry = store.wait(git_ops.toplevel, head_sha, get_setting('ai_deadline_s', 120))
+    if entry is None or entry.get('base') != base:
+        return None
     try:
-        console.print(Panel.fit(
-            "[bold blue]GHPush[/] - GitHub PR Creation Tool",
-            style="bold white on blue"
-        ))
-        console.print()
+        if git_ops.head_sha(base) != entry.get('base_sha'):
+            return None
+    except RuntimeError:
+        return None
+    if git_ops.has_uncommitted_changes():
+        return None
+    return entry
+
+def summarize_branch(git_ops: GitOperations, diff_analyzer: DiffAnalyzer, base: str, previous: Optional[dict],
+                     file_stats: List, commit_messages: List[str],
+                     open_stream: Callable[[], StreamingResponseParser] = None,
+                     fallback: bool = True, upstream: str = None) -> Optional[Tuple[str, str, bool]]:
+    """Title and description for the current branch, and whether the
+    model wrote them.
+
+    With a previous summary, file_stats and commit_messages cover the
+    commits since it and the summary is amended; otherwise (or if that
+    fails) they cover the whole branch, whose commit messages are read
+    since upstream (default: the tracking branch). Without ``fallback``,
+    None is returned instead of a basic summary when the model can't be
+    used.
+    """
+    # Lazy: the patch text is only read if AI mode needs hunk content
+    stream = open_stream() if open_stream else StreamingResponseParser()
+    summary = None
+    if previous:
+        since = previous['head_sha']
+        summary = diff_analyzer.update_summary(
+            (previous['title'], previous['description']),
+            git_ops.iter_diff_lines(since, exclude=diff_analyzer.excluded_paths(file_stats)),
+            commit_messages, file_stats,
+            on_delta=stream.feed,
+            structure=diff_analyzer.structural_diff(git_ops, since, file_stats)
+        )
+    if summary is None:
+        if previous:
+            file_stats = git_ops.get_diff_stats(base)
+            commit_messages = git_ops.get_commit_messages(upstream)
+            stream.close()
+            stream = open_stream() if open_stream else StreamingResponseParser()
+        structure = diff_analyzer.structural_diff(git_ops, base, file_stats)
+        summary = diff_analyzer.analyze_diff(
+            git_ops.iter_diff_lines(base, exclude=diff_analyzer.excluded_paths(file_stats)),
+            commit_messages, file_stats,
+            on_delta=stream.feed,
+            structure=structure,
+            fallback=False
+        )
+    stream.close()
+    if summary is not None:
+        return (*summary, True)
+    if not fallback:
+        return None
+    if diff_analyzer.ai_summarizer.enabled:
+        console.print("[yellow]Using basic summarization.[/]")
+    return (*diff_analyzer.basic_summary(file_stats, commit_messages, structure), False)
 
+def publish_branch(git_ops: GitOperations, diff_analyzer: DiffAnalyzer, base: str, is_ai_mode: bool,
+                   full: bool = False, open_stream: Callable[[], StreamingResponseParser] = None,
+                   on_start: Callable = None, on_finish: Callable = None,
+                   file_stats: List = None, validate_gh: Callable = validate_github_auth,
+                   github: GitHubClient = None, open_url: Callable[[str], None] = None) -> dict:
+    """Push the current branch, summarize it and create its PR.
+
+    This is the work behind ``ghpush``, shared by the CLI and the daemon.
+    ``open_stream`` returns a parser for one streamed AI response;
+    ``on_start``/``on_finish`` follow the pipeline's tasks. ``file_stats``
+    may be precomputed diff stats against base, and ``github`` a
+    long-lived API client. ``open_url`` replaces the browser for PRs
+    opened from their compare page. A summary precomputed by the git
+    hook for this commit replaces the diff and AI phases. Returns the
+    branch, title, description and PR URL.
+    """
+    current_branch = git_ops.current_branch
+    head_sha = git_ops.head_sha()
+    previous = precomputed = None
+    if is_ai_mode and not full and get_setting('precompute', True):
+        precomputed = find_precomputed_summary(git_ops, head_sha, base)
+    if is_ai_mode and not full and not precomputed and get_setting('incremental', True):
+        previous = find_previous_summary(git_ops, current_branch, base)
+
+    # The push moves the tracking branch, so the commits it doesn't have
+    # yet are pinned first; without one, no commit messages are read
+    upstream = None if precomputed else git_ops.tracking_sha() or head_sha
+
+    # The gh checks, the push and the diff -> summary chain are
+    # independent, so they run concurrently
+    graph = TaskGraph()
+    graph.add('validate_gh', validate_gh,
+              description="Validating GitHub CLI...")
+    graph.add('push', lambda: git_ops.push_branch(current_branch, base),
+              description=f"Pushing branch '{current_branch}'...")
+    if precomputed:
+        graph.add('summary', lambda: (precomputed['title'], precomputed['description'], True),
+                  description="Using PR content precomputed after the last commit...")
+    else:
+        # Incremental runs only look at the commits since the last summary
+        since = previous['head_sha'] if previous else base
+        if previous or file_stats is None:
+            graph.add('file_stats', lambda: git_ops.get_diff_stats(since),
+                      description=f"Analyzing diff against {since[:12] if previous else base}...")
+        else:
+            graph.add('file_stats', lambda: file_stats, description=f"Analyzing diff against {base}...")
+        graph.add('commit_messages',
+                  lambda: git_ops.get_commit_messages(since if previous else upstream),
+                  description="Reading commit messages...")
+        graph.add('summary',
+                  lambda file_stats, commit_messages: summarize_branch(
+                      git_ops, diff_analyzer, base, previous, file_stats, commit_messages, open_stream,
+                      upstream=upstream),
+                  deps=('file_stats', 'commit_messages'),
+                  description="Generating PR content using AI...")
+    graph.add('pr_url',
+              lambda summary, push, validate_gh: create_pull_request(git_ops, base, current_branch, *summary[:2],
+                                                                     client=github, open_url=open_url),
+              deps=('summary', 'push', 'validate_gh'),
+              description="Creating pull request...")
+    store = PrecomputedSummaryStore()
+    # Keeps the pre-push hook from summarizing this commit again during the push
+    claimed = is_ai_mode and not precomputed and store.claim(git_ops.toplevel, head_sha)
+    try:
+        results = graph.run(on_start=on_start, on_finish=on_finish)
+        title, description, from_model = results['summary']
+        # Amending a basic summary would carry it into later runs
+        if from_model:
+            BranchSummaryStore().save(git_ops.toplevel, current_branch, base, head_sha, title, description)
+    finally:
+        if claimed:
+            store.release(git_ops.toplevel, head_sha)
+
+    return {'branch': current_branch, 'title': title, 'description': description,
+            'pr_url': results['pr_url']}
+
+def run(base: str, full: bool = False):
+    """Push the current branch and prepare its PR against base.
+
+    Unless full is set, a branch summarized before only has its new
+    commits summarized, amending the previous title and description.
+    """
+    try:
+        show_header()
         status_progress = StatusProgress()
         
         with status_progress.progress:
-            # Validation phase
+            # Validation phase (environment only; the gh checks run in the graph below)
             validate_task = status_progress.add_task("Validating prerequisites...")
-            
-            try:
+            with tracer.span('validate.openai_key'):
                 # Store whether we're using AI mode
                 is_ai_mode = bool(validate_openai_key())
-                status_progress.update_task(validate_task, 50, "Validating GitHub CLI...")
-                validate_github_auth()
-                status_progress.complete_task(validate_task)
-            except Exception as e:
-                status_progress.complete_task(validate_task, success=False)
-                raise e
+            status_progress.complete_task(validate_task)
 
             # Git operations phase
             git_task = status_progress.add_task("Initializing git operations...")
-            git_ops = GitOperations()
-            diff_analyzer = DiffAnalyzer()
+            with tracer.span('git.init'):
+                git_ops = GitOperations()
+                diff_analyzer = DiffAnalyzer(path_filter=git_ops.path_filter)
             status_progress.complete_task(git_task)
 
-            # Diff analysis phase
-            diff_task = status_progress.add_task(f"Analyzing diff against {base} branch...")
-            diff_text = git_ops.get_diff(base)
-            status_progress.update_task(diff_task, 50)
-            commit_messages = git_ops.get_commit_messages()
-            status_progress.complete_task(diff_task)
-
-            # AI generation phase
-            ai_task = status_progress.add_task("Generating PR content using AI...")
-            title, description = diff_analyzer.analyze_diff(diff_text, commit_messages)
-            status_progress.complete_task(ai_task)
-
-            # Push phase
-            current_branch = git_ops.repo.active_branch.name
-            push_task = status_progress.add_task(f"Pushing branch '{current_branch}'...")
-            git_ops.push_branch(current_branch, base)
-            status_progress.complete_task(push_task)
-
-            # PR creation phase
-            pr_task = status_progress.add_task("Preparing PR...")
-            pr_url = git_ops.create_pr_url(base)
-            if title and description:
-                from urllib.parse import quote
-                pr_url += f"&title={quote(title)}&body={quote(description)}"
-            
-            webbrowser.open(pr_url)
-            status_progress.complete_task(pr_task)
-
-        # Show final summary
-        console.print()
-        console.print(Panel(
-            Text.from_markup(
-                f"[bold green]✨ Success![/]\n\n"
-                f"[cyan]Branch:[/] {current_branch}\n"
-                f"[cyan]Title:[/] {title}\n"
-                f"[cyan]Description preview:[/] {description[:100]}...\n\n"
-                f"[cyan]PR URL:[/] {pr_url}"
-            ),
-            title="📦 Pull Request Ready",
-            border_style="green",
-            padding=(1, 2)
-        ))
-
-        # Pass the actual AI mode status
-        show_success_message(pr_url, is_ai_mode=is_ai_mode)
+            result = publish_branch(git_ops, diff_analyzer, base, is_ai_mode, full,
+                                    open_stream=lambda: render_stream(status_progress),
+                                    on_start=status_progress.task_started,
+                                    on_finish=status_progress.task_finished)
+
+        show_result(result, is_ai_mode)
+
+    except Exception as e:
+        show_error(e)
+
+def show_header():
+    console.print(Panel.fit(
+        "[bold blue]GHPush[/] - GitHub PR Creation Tool",
+        style="bold white on blue"
+    ))
+    console.print()
+
+def show_result(result: dict, is_ai_mode: bool):
+    """Show the final summary of a published branch."""
+    console.print()
+    console.print(Panel(
+        Text.from_markup(
+            f"[bold green]✨ Success![/]\n\n"
+            f"[cyan]Branch:[/] {result['branch']}\n"
+            f"[cyan]Title:[/] {result['title']}\n"
+            f"[cyan]Description preview:[/] {result['description'][:100]}...\n\n"
+            f"[cyan]PR URL:[/] {result['pr_url']}"
+        ),
+        title="📦 Pull Request Ready",
+        border_style="green",
+        padding=(1, 2)
+    ))
+
+    # Pass the actual AI mode status
+    show_success_message(result['pr_url'], is_ai_mode=is_ai_mode)
+
+def show_error(error):
+    console.print()
+    console.print(Panel(
+        Text.from_markup(f"[bold red]Error:[/] {str(error)}"),
+        title="❌ Error",
+        border_style="red",
+        padding=(1, 2)
+    ))
+    raise SystemExit(1)
+
+@click.group(invoke_without_command=True)
+@click.option('--base', default='main', help='Base branch name')
+@click.option('--trace-json', type=click.Path(dir_okay=False, writable=True),
+              help='Write per-phase timing spans as Chrome trace JSON to this file')
+@click.option('--profile', is_flag=True, help='Profile the run with cProfile and print the hot spots')
+@click.option('--full', is_flag=True, help='Regenerate the summary from the whole branch instead of only new commits')
+@click.option('--local', is_flag=True, help="Run in this process even if a ghpush daemon is running")
+@click.pass_context
+def main(ctx, base, trace_json, profile, full, local):
+    """GHPush - AI-powered GitHub PR creation tool."""
+    if trace_json:
+        tracer.enable()
+    if profile:
+        start_profiling()
+
+    # Subcommands such as batch keep stdout for machine-readable output
+    report = console if ctx.invoked_subcommand is None else Console(stderr=True)
+
+    def finish():
+        if profile:
+            tracing.profiler.main.disable()
+            report.print("\n[bold]Profile (top functions by cumulative time):[/]")
+            tracing.profiler.print_hotspots(stream=report.file)
+        if trace_json:
+            tracer.write_chrome_trace(trace_json)
+            report.print(f"[cyan]Trace written to {trace_json}[/]")
 
+    ctx.call_on_close(finish)
+    if ctx.invoked_subcommand is None:
+        # Profiles and traces are of this process, so those runs stay local
+        if not (local or trace_json or profile) and get_setting('daemon', False):
+            from .daemon import run_client
+
+            if run_client(base, full=full):
+                return
+        with tracer.span('ghpush.run', base=base):
+            run(base, full=full)
+
+@main.command()
+@click.option('--manifest', required=True, type=click.Path(exists=True, dir_okay=False),
+              help='YAML or JSON list of repo/branch/base entries')
+@click.option('--output', type=click.File('w'), default='-',
+              help='Write one JSON result line per branch to this file (default: stdout)')
+@click.option('--workers', type=int, help='Concurrent summaries (default: batch_workers setting)')
+@click.option('--push-workers', type=int, help='Concurrent pushes (default: batch_push_workers setting)')
+@click.option('--no-push', is_flag=True, help='Only generate titles, descriptions and PR URLs')
+def batch(manifest, output, workers, push_workers, no_push):
+    """Prepare PRs for every branch listed in a manifest."""
+    from .batch import run_batch
+
+    try:
+        if not no_push:
+            validate_github_auth()
+        with tracer.span('ghpush.batch', manifest=manifest):
+            failures = run_batch(Path(manifest), output, workers, push_workers, push=not no_push)
     except Exception as e:
-        console.print()
-        console.print(Panel(
-            Text.from_markup(f"[bold red]Error:[/] {str(e)}"),
-            title="❌ Error",
-            border_style="red",
-            padding=(1, 2)
-        ))
+        click.echo(f"Error: {e}", err=True)
+        raise SystemExit(1)
+    if failures:
         raise SystemExit(1)
 
+@main.command()
+@click.option('--top', help='Topmost branch of the stack (default: found from the current branch)')
+@click.option('--output', type=click.File('w'), default='-',
+              help='Write one JSON result line per branch to this file (default: stdout)')
+@click.option('--no-push', is_flag=True, help='Only generate titles, descriptions and PR URLs')
+@click.pass_context
+def stack(ctx, top, output, no_push):
+    """Prepare PRs for every branch in a stack, each against the one below it."""
+    from .stack import run_stack
+
+    base = ctx.parent.params['base']
+    try:
+        if not no_push:
+            validate_github_auth()
+        with tracer.span('ghpush.stack', base=base):
+            failures = run_stack(base, output, top=top, push=not no_push)
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        raise SystemExit(1)
+    if failures:
+        raise SystemExit(1)
+
+@main.command()
+@click.option('--stop', is_flag=True, help='Stop the running daemon')
+@click.option('--status', is_flag=True, help='Show whether a daemon is running')
+def daemon(stop, status):
+    """Serve ghpush runs from a long-lived background process."""
+    from .daemon import Daemon, request, socket_path
+
+    if stop or status:
+        reply = request({'command': 'stop' if stop else 'ping'})
+        if reply is None:
+            click.echo(f"No ghpush daemon is listening on {socket_path()}", err=True)
+            raise SystemExit(1)
+        if status:
+            click.echo(f"ghpush daemon running (pid {reply['pid']}), serving {len(reply['repos'])} "
+                       f"repositor{'y' if len(reply['repos']) == 1 else 'ies'}")
+        return
+    try:
+        Daemon().serve_forever()
+    except KeyboardInterrupt:
+        pass
+    except RuntimeError as e:
+        click.echo(f"Error: {e}", err=True)
+        raise SystemExit(1)
+
+@main.group()
+def hook():
+    """Precompute PR content in the background after each commit."""
+
+@hook.command()
+@click.pass_context
+def install(ctx):
+    """Add post-commit and pre-push hooks that precompute the PR for --base."""
+    from .hooks import install_hooks
+
+    base = ctx.find_root().params['base']
+    try:
+        installed = install_hooks(base)
+    except RuntimeError as e:
+        click.echo(f"Error: {e}", err=True)
+        raise SystemExit(1)
+    for path in installed:
+        click.echo(f"Installed {path} (base '{base}')")
+
+@hook.command()
+def uninstall():
+    """Remove the ghpush hooks."""
+    from .hooks import uninstall_hooks
+
+    try:
+        removed = uninstall_hooks()
+    except RuntimeError as e:
+        click.echo(f"Error: {e}", err=True)
+        raise SystemExit(1)
+    for path in removed:
+        click.echo(f"Removed ghpush from {path}")
+
+@hook.command(name='run', hidden=True)
+@click.pass_context
+def run_hook(ctx):
+    """Called by the installed hooks."""
+    from .hooks import run_hook
+
+    run_hook(ctx.find_root().params['base'])
+
 def show_success_message(url: str, is_ai_mode: bool = True):
     """Show success message with PR URL."""
     mode_text = "[green]AI-Powered[/]" if is_ai_mode else "[yellow]Basic[/]"
@@ -1,6 +1,7 @@
 """Configuration management for GHPush."""
 import json
 import os
+import tempfile
 from pathlib import Path
 
 class Config:
@@ -35,6 +36,88 @@ class Config:
         """Get GitHub token from configuration or environment."""
         return os.getenv('GITHUB_TOKEN') or self.config.get('github_token')
 
+_env_loaded = False
+
+def load_env():
+    """Load variables from a .env file once, on first use."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    load_dotenv()
+
 def get_openai_api_key():
     """Get OpenAI API key from environment."""
-    return os.getenv('OPENAI_API_KEY') 
\ No newline at end of file
+    load_env()
+    return os.getenv('OPENAI_API_KEY')
+
+def use_http2() -> bool:
+    """Whether HTTP clients should negotiate HTTP/2: on unless the ``http2``
+    setting is off, provided the optional h2 package is installed."""
+    if not get_setting('http2', True):
+        return False
+    import importlib.util
+
+    return importlib.util.find_spec('h2') is not None
+
+def get_setting(name: str, default=None):
+    """Get a tunable setting.
+
+    ``GHPUSH_<NAME>`` in the environment wins over ``name`` in
+    ``~/.ghpush/config.json``; values are coerced to the type of ``default``.
+    """
+    load_env()
+    value = os.getenv(f"GHPUSH_{name.upper()}")
+    if value is None:
+        config_file = Path.home() / ".ghpush" / "config.json"
+        try:
+            with open(config_file, 'r') as f:
+                value = json.load(f).get(name)
+        except (OSError, ValueError):
+            value = None
+    if value is None:
+        return default
+    if isinstance(default, bool) and isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    if default is not None and not isinstance(value, type(default)):
+        try:
+            return type(default)(value)
+        except (TypeError, ValueError):
+            return default
+    return value
+
+def write_temp_file(directory: Path, text: str) -> str:
+    """Write text to a new temporary file in directory and return its path.
+
+    Nothing is left behind if writing fails.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return tmp
+
+def atomic_write_json(path: Path, data):
+    """Replace path with data as JSON, through a temporary file and
+    ``os.replace`` so concurrent readers never see a partial file."""
+    tmp = write_temp_file(path.parent, json.dumps(data))
+    try:
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def mtime_ns(path: Path) -> int:
+    """Modification time of path in nanoseconds, or 0 if it doesn't exist."""
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return 0
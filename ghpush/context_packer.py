@@ -0,0 +1,236 @@
+"""Token-budgeted packing of diff hunks into an LLM prompt."""
+import heapq
+import itertools
+from collections import Counter
+from functools import lru_cache
+from pathlib import PurePosixPath
+from typing import Iterable, Iterator, List, Tuple
+
+from .path_filter import DEFAULT_FILTER
+
+# Relative value of a hunk by the kind of file it belongs to
+DOC_SUFFIXES = {'.md', '.rst', '.txt', '.adoc'}
+CONFIG_SUFFIXES = {'.json', '.yaml', '.yml', '.toml', '.ini', '.cfg', '.lock', '.xml'}
+
+STATS_HEADER = "Other changed files (stats only):\n"
+
+@lru_cache(maxsize=8)
+def _get_encoder(model: str):
+    """Load (once per model) the tiktoken encoder, or None if unavailable."""
+    try:
+        import tiktoken
+    except ImportError:  # optional dependency
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # The encodings are downloaded on first use, which fails offline
+        # or behind a proxy; the None is cached so it isn't retried
+        return None
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """Count tokens with the model's tokenizer, falling back to ~4 chars per token."""
+    encoder = _get_encoder(model)
+    if encoder is None:
+        return (len(text) + 3) // 4
+    return len(encoder.encode(text, disallowed_special=()))
+
+def file_weight(path: str) -> float:
+    """How much a change to this file is worth in the prompt."""
+    # Lockfiles and generated files, when path filtering is turned off
+    if DEFAULT_FILTER.excluded(path):
+        return 0.05
+    pure = PurePosixPath(path)
+    suffix = pure.suffix.lower()
+    if suffix in DOC_SUFFIXES:
+        return 0.6
+    if suffix in CONFIG_SUFFIXES:
+        return 0.5
+    if 'test' in pure.name.lower() or 'tests' in pure.parts:
+        return 0.8
+    return 1.0
+
+def _semantic_lines(lines: List[str]) -> int:
+    """Number of changed lines that are not whitespace-only."""
+    return sum(1 for line in lines if line[:1] in ('+', '-') and line[1:].strip())
+
+class PackedContext:
+    """Result of packing: the prompt text plus what was left out.
+
+    ``files`` lists the ``(path, digest)`` of every file packed, with the
+    digest of its whole patch (see ``FileDiff.digest``).
+    """
+    __slots__ = ('text', 'tokens', 'included_hunks', 'omitted_hunks', 'files')
+
+    def __init__(self, text: str, tokens: int, included_hunks: int, omitted_hunks: int,
+                 files: List[Tuple[str, str]] = None):
+        self.text = text
+        self.tokens = tokens
+        self.included_hunks = included_hunks
+        self.omitted_hunks = omitted_hunks
+        self.files = files or []
+
+    @property
+    def truncated(self) -> bool:
+        return self.omitted_hunks > 0
+
+class ContextPacker:
+    """Fill a token budget with the most informative whole hunks.
+
+    Hunks are ranked by file kind (source over docs/config over lockfiles
+    and generated files) and by the size of their non-whitespace change.
+    Files that contribute no hunk are listed in a compact stats table.
+    """
+
+    def __init__(self, budget: int = 6000, model: str = "gpt-4o-mini"):
+        self.budget = budget
+        self.model = model
+
+    def _stats_line(self, file_diff) -> str:
+        path = file_diff.path
+        if file_diff.old_path:
+            path = f"{file_diff.old_path} -> {path}"
+        if file_diff.binary:
+            return f"{path} (binary)"
+        if file_diff.excluded:
+            return f"{path} (+{file_diff.additions}/-{file_diff.deletions}, generated)"
+        return f"{path} (+{file_diff.additions}/-{file_diff.deletions})"
+
+    def pack(self, file_diffs: Iterable) -> PackedContext:
+        """Pack a stream of FileDiff records; each record is visited once."""
+        files = []
+        digests = []
+        # Min-heap of (score, order, tokens, file_index, hunk) kept within budget
+        selected = []
+        selected_tokens = 0
+        omitted = 0
+        order = 0
+
+        for file_index, file_diff in enumerate(file_diffs):
+            line = "- " + self._stats_line(file_diff) + "\n"
+            files.append((file_diff.path, file_diff.old_path, line, count_tokens(line, self.model)))
+            digests.append((file_diff.path, file_diff.digest()))
+            weight = file_weight(file_diff.path)
+            for hunk in file_diff.hunks:
+                text = hunk.header + "\n" + hunk.text
+                tokens = count_tokens(text, self.model)
+                score = weight * max(_semantic_lines(hunk.lines), 1)
+                order += 1
+                if tokens > self.budget:
+                    omitted += 1
+                    continue
+                heapq.heappush(selected, (score, -order, tokens, file_index, text))
+                selected_tokens += tokens
+                while selected_tokens > self.budget:
+                    dropped = heapq.heappop(selected)
+                    selected_tokens -= dropped[2]
+                    omitted += 1
+            if file_diff.truncated:
+                omitted += 1
+            # Only the stats line is needed from here on
+            file_diff.hunks = []
+
+        # Files without a packed hunk go into the stats table; make room for
+        # it by dropping the lowest-ranked hunks
+        hunks_per_file = Counter(entry[3] for entry in selected)
+        stats_tokens = sum(files[index][3] for index in range(len(files))
+                           if index not in hunks_per_file)
+        if stats_tokens:
+            stats_tokens += count_tokens(STATS_HEADER, self.model)
+        while selected and selected_tokens + stats_tokens > self.budget:
+            _, _, tokens, file_index, _ = heapq.heappop(selected)
+            selected_tokens -= tokens
+            omitted += 1
+            hunks_per_file[file_index] -= 1
+            if not hunks_per_file[file_index]:
+                del hunks_per_file[file_index]
+                if not stats_tokens:
+                    stats_tokens = count_tokens(STATS_HEADER, self.model)
+                stats_tokens += files[file_index][3]
+
+        stats_text, stats_tokens = self._stats_table(
+            [entry for index, entry in enumerate(files) if index not in hunks_per_file],
+            self.budget - selected_tokens
+        )
+
+        by_file = {}
+        for _, _, _, file_index, text in sorted(selected, key=lambda entry: -entry[1]):
+            by_file.setdefault(file_index, []).append(text)
+
+        parts = []
+        for file_index in sorted(by_file):
+            path, old_path, _, _ = files[file_index]
+            parts.append(f"diff --git a/{old_path or path} b/{path}\n")
+            parts.extend(by_file[file_index])
+        if stats_text:
+            if parts:
+                parts.append("\n")
+            parts.append(stats_text)
+
+        return PackedContext("".join(parts), selected_tokens + stats_tokens, len(selected), omitted, digests)
+
+    def _stats_table(self, entries: List[tuple], allowance: int):
+        """Render the stats table, summarising the tail if it would overflow."""
+        if not entries:
+            return "", 0
+        lines = [STATS_HEADER]
+        used = count_tokens(STATS_HEADER, self.model)
+        for shown, (_, _, line, tokens) in enumerate(entries):
+            # Keep a little room for the "... and N more" marker
+            if used + tokens > allowance - 16:
+                rest = f"- ... and {len(entries) - shown} more files\n"
+                lines.append(rest)
+                used += count_tokens(rest, self.model)
+                break
+            lines.append(line)
+            used += tokens
+        return "".join(lines), used
+
+def _group_key(path: str) -> str:
+    """Directory used to keep related files in the same chunk."""
+    parts = PurePosixPath(path).parts
+    return "/".join(parts[:2]) if len(parts) > 2 else (parts[0] if len(parts) > 1 else "")
+
+def iter_chunks(file_diffs: Iterable, chunk_budget: int = 6000, max_chunks: int = 32,
+                model: str = "gpt-4o-mini") -> Iterator[PackedContext]:
+    """Split a stream of FileDiffs into directory-grouped, budget-sized chunks.
+
+    Files are accumulated until the next one would overflow ``chunk_budget``
+    (or a new directory starts once the chunk is half full); each chunk is
+    then packed with ContextPacker. Once ``max_chunks - 1`` chunks have been
+    produced, everything left is packed into one final chunk so the number
+    of requests stays bounded.
+    """
+    packer = ContextPacker(budget=chunk_budget, model=model)
+    pending = []
+    pending_tokens = 0
+    group = None
+    produced = 0
+
+    iterator = iter(file_diffs)
+    for file_diff in iterator:
+        # Cheap ~4 chars/token estimate; the packer does the exact count
+        chars = sum(len(hunk.header) + sum(len(line) + 1 for line in hunk.lines)
+                    for hunk in file_diff.hunks)
+        tokens = chars // 4 + 16
+        key = _group_key(file_diff.path)
+        boundary = pending and (
+            pending_tokens + tokens > chunk_budget
+            or (key != group and pending_tokens > chunk_budget // 2)
+        )
+        if boundary:
+            yield packer.pack(pending)
+            produced += 1
+            pending, pending_tokens = [], 0
+            if produced >= max_chunks - 1:
+                yield packer.pack(itertools.chain([file_diff], iterator))
+                return
+        pending.append(file_diff)
+        pending_tokens += tokens
+        group = key
+
+    if pending:
+        yield packer.pack(pending)
@@ -0,0 +1,411 @@
+"""Long-lived ghpush server on a Unix socket, and the thin client that talks to it.
+
+The daemon keeps everything a ``ghpush`` run would otherwise rebuild:
+GitOperations (GitPython ``Repo`` handles) and DiffAnalyzers per
+repository, one AISummarizer with its pooled LLM connections and an
+in-memory layer over the summary cache, one GitHub API session and the
+result of the ``gh`` checks. A watcher thread notices commits and branch
+switches (``.git/HEAD``, the index and refs) in the repositories it has
+served and recomputes their diff stats before the next run asks.
+
+The daemon only serves clients whose environment (credentials, settings,
+where ghpush and gh keep their config) matches its own; other clients
+run locally.
+
+The protocol is one JSON object per line: the client sends a request and
+the daemon answers with ``accepted`` or ``environment_mismatch``, then a
+stream of events ending in ``result`` or ``error``.
+"""
+import hashlib
+import io
+import json
+import os
+import socket
+import socketserver
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from rich.console import Console
+
+from .config import Config, get_setting, load_env, mtime_ns
+
+console = Console(stderr=True)
+
+# Environment a run reads: settings, LLM and GitHub credentials, and where
+# the ghpush and gh configuration live
+ENVIRONMENT_PREFIXES = ('GHPUSH_', 'OPENAI_', 'GH_', 'GITHUB_')
+ENVIRONMENT_NAMES = ('HOME', 'XDG_CONFIG_HOME', 'APPDATA')
+
+def socket_path() -> Path:
+    return Path(get_setting('daemon_socket', str(Config().config_dir / "daemon.sock"))).expanduser()
+
+def _connect(path: Path, timeout: float = None) -> Optional[socket.socket]:
+    """A connection to the daemon, or None if none is listening."""
+    if not hasattr(socket, 'AF_UNIX') or not path.exists():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+def environment_fingerprint() -> str:
+    """Hash of the environment variables a run depends on, after loading
+    ``.env``, including those providers read their API keys from."""
+    load_env()
+    names = {name for name in os.environ
+             if name.startswith(ENVIRONMENT_PREFIXES) or name in ENVIRONMENT_NAMES}
+    entries = get_setting('providers', None)
+    try:
+        if isinstance(entries, str):
+            entries = json.loads(entries)
+        names.update(entry['api_key_env'] for entry in entries or () if entry.get('api_key_env'))
+    except (ValueError, TypeError, AttributeError):
+        pass
+    text = '\0'.join(f"{name}={os.environ.get(name, '')}" for name in sorted(names))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def _toplevel(cwd: Path) -> Path:
+    """The top level of the working tree containing cwd, which repositories are kept by."""
+    result = subprocess.run(
+        ['git', 'rev-parse', '--show-toplevel'],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Not a git repository: {cwd}")
+    return Path(result.stdout.strip()).resolve()
+
+def _send(wfile, message: dict):
+    wfile.write(json.dumps(message).encode('utf-8') + b"\n")
+    wfile.flush()
+
+class _EventWriter(io.TextIOBase):
+    """File-like object that forwards console output to the client as events."""
+
+    def __init__(self, send: Callable[[dict], None], tty: bool):
+        self._send = send
+        self._tty = tty
+
+    def isatty(self) -> bool:
+        return self._tty
+
+    def write(self, text: str) -> int:
+        if text:
+            self._send({'event': 'output', 'text': text})
+        return len(text)
+
+class _EventStream:
+    """Stands in for the client's StreamingResponseParser inside the daemon."""
+
+    def __init__(self, send: Callable[[dict], None]):
+        self._send = send
+        send({'event': 'stream_open'})
+
+    def feed(self, delta: str):
+        self._send({'event': 'delta', 'text': delta})
+
+    def close(self):
+        self._send({'event': 'stream_close'})
+
+class RepoState:
+    """What the daemon keeps for one repository between runs."""
+
+    def __init__(self, repo_path: Path, summarizer):
+        from .diff_analyzer import DiffAnalyzer
+        from .git_operations import GitOperations
+
+        self.git_ops = GitOperations(repo_path)
+        self.git_dir = self.git_ops.git_dir
+        self.diff_analyzer = DiffAnalyzer(ai_summarizer=summarizer, path_filter=self.git_ops.path_filter)
+        self.base: Optional[str] = None
+        # Diff stats against base as of the ref/index fingerprint they were computed at
+        self.stats: Optional[List] = None
+        self.stats_key = None
+        self.lock = threading.Lock()
+
+    def fingerprint(self, base: str) -> tuple:
+        """Modification times of everything the diff stats against base depend on
+        (besides uncommitted edits, which are checked separately)."""
+        head = self.git_dir / "HEAD"
+        paths = [head, self.git_dir / "index", self.git_dir / "packed-refs",
+                 self.git_dir / "refs" / "heads" / base, self.git_dir / "refs" / "remotes" / base]
+        try:
+            ref = head.read_text().strip()
+        except OSError:
+            ref = ''
+        if ref.startswith('ref: '):
+            paths.append(self.git_dir / ref[5:])
+        return (base, ref) + tuple(mtime_ns(path) for path in paths)
+
+    def precompute(self):
+        """Recompute the diff stats if the refs or index changed since last time."""
+        with self.lock:
+            base = self.base
+            if base is None:
+                return
+            key = self.fingerprint(base)
+            if key == self.stats_key:
+                return
+            try:
+                # Stats of a dirty tree would go stale without any ref changing
+                if self.git_ops.has_uncommitted_changes():
+                    self.stats, self.stats_key = None, None
+                    return
+                self.stats = self.git_ops.get_diff_stats(base)
+                self.stats_key = key
+            except Exception:
+                self.stats, self.stats_key = None, None
+
+    def cached_stats(self, base: str) -> Optional[List]:
+        """Precomputed stats if they still describe the diff against base."""
+        with self.lock:
+            if self.stats_key is None or self.stats_key != self.fingerprint(base):
+                return None
+            if self.git_ops.has_uncommitted_changes():
+                return None
+            return self.stats
+
+class Daemon:
+    """Serves ``run`` requests from thin clients with warm, shared state."""
+
+    def __init__(self, path: Path = None):
+        from .ai_summarizer import AISummarizer
+        from .github_api import GitHubClient, get_github_token
+
+        self.path = path or socket_path()
+        self.poll_interval = get_setting('daemon_poll_s', 1.0)
+        self.summarizer = AISummarizer(memory_cache_entries=get_setting('daemon_cache_entries', 256))
+        token = get_github_token() if get_setting('pr_backend', 'api') == 'api' else None
+        self.github = GitHubClient(token) if token else None
+        self._repos: Dict[Path, RepoState] = {}
+        self._repos_lock = threading.Lock()
+        # Runs share module-level consoles, so they are served one at a time
+        self._run_lock = threading.Lock()
+        self._gh_validated_at = None
+        self._server = None
+        self.environment = environment_fingerprint()
+
+    def _repo(self, repo_path: Path) -> RepoState:
+        with self._repos_lock:
+            state = self._repos.get(repo_path)
+            if state is None:
+                state = self._repos[repo_path] = RepoState(repo_path, self.summarizer)
+            return state
+
+    def _validate_gh(self):
+        """``validate_github_auth``, remembered for gh_auth_cache_ttl seconds."""
+        from .validators import validate_github_auth
+
+        ttl = get_setting('gh_auth_cache_ttl', 3600)
+        if self._gh_validated_at is not None and time.monotonic() - self._gh_validated_at < ttl:
+            return True
+        validate_github_auth()
+        self._gh_validated_at = time.monotonic()
+        return True
+
+    def _watch(self):
+        """Poll the served repositories and precompute stats after ref changes."""
+        while True:
+            time.sleep(self.poll_interval)
+            with self._repos_lock:
+                states = list(self._repos.values())
+            for state in states:
+                state.precompute()
+
+    def serve_forever(self):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise RuntimeError("The ghpush daemon needs Unix domain sockets")
+        existing = _connect(self.path, timeout=1)
+        if existing is not None:
+            existing.close()
+            raise RuntimeError(f"A ghpush daemon is already listening on {self.path}")
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                daemon._handle(self.rfile, self.wfile)
+
+        umask = os.umask(0o077)
+        try:
+            self._server = socketserver.ThreadingUnixStreamServer(str(self.path), Handler)
+        finally:
+            os.umask(umask)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._watch, name='ghpush-watch', daemon=True).start()
+        console.print(f"[bold blue]GHPush daemon[/] listening on {self.path}")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+            for state in self._repos.values():
+                state.git_ops.close()
+            if self.github is not None:
+                self.github.close()
+
+    def _handle(self, rfile, wfile):
+        send_lock = threading.Lock()
+
+        def send(message: dict):
+            with send_lock:
+                _send(wfile, message)
+
+        try:
+            request = json.loads(rfile.readline() or b'{}')
+        except ValueError:
+            return send({'event': 'error', 'message': "Malformed request"})
+        command = request.get('command')
+        if command == 'ping':
+            return send({'event': 'result', 'pid': os.getpid(), 'repos': [str(path) for path in self._repos]})
+        if command == 'stop':
+            send({'event': 'result'})
+            threading.Thread(target=self._server.shutdown).start()
+            return
+        if command != 'run':
+            return send({'event': 'error', 'message': f"Unknown command {command!r}"})
+        if request.get('environment') != self.environment:
+            return send({'event': 'environment_mismatch'})
+        send({'event': 'accepted'})
+        try:
+            send({'event': 'result', **self._run(request, send)})
+        except BrokenPipeError:
+            pass
+        except BaseException as e:
+            # SystemExit from the validators carries no message; theirs was forwarded
+            message = str(e) if not isinstance(e, SystemExit) else ""
+            try:
+                send({'event': 'error', 'message': message})
+            except OSError:
+                pass
+
+    def _run(self, request: dict, send: Callable[[dict], None]) -> dict:
+        from . import ai_summarizer, cli, validators
+
+        repo_path = _toplevel(Path(request['cwd']))
+        base = request.get('base') or 'main'
+        writer = _EventWriter(send, bool(request.get('tty')))
+        consoles = [cli.console, ai_summarizer.console, validators.console]
+        with self._run_lock:
+            state = self._repo(repo_path)
+            previous_files = [c.file for c in consoles]
+            for c in consoles:
+                c.file = writer
+            try:
+                is_ai_mode = bool(validators.validate_openai_key())
+                with state.lock:
+                    state.git_ops.refresh()
+                    state.diff_analyzer.path_filter = state.git_ops.path_filter
+                file_stats = state.cached_stats(base)
+                # The client opens the browser, on its own display
+                opened = []
+                result = cli.publish_branch(
+                    state.git_ops, state.diff_analyzer, base, is_ai_mode, request.get('full', False),
+                    open_stream=lambda: _EventStream(send),
+                    on_start=lambda task: send({'event': 'task_started', 'name': task.name,
+                                                'description': task.description}),
+                    on_finish=lambda task, success: send({'event': 'task_finished', 'name': task.name,
+                                                          'success': success}),
+                    file_stats=file_stats, validate_gh=self._validate_gh, github=self.github,
+                    open_url=opened.append,
+                )
+            finally:
+                for c, file in zip(consoles, previous_files):
+                    c.file = file
+            if state.base != base:
+                state.base = base
+            result.update(ai_mode=is_ai_mode, precomputed_stats=file_stats is not None,
+                          open_url=opened[0] if opened else None)
+            return result
+
+def request(message: dict, timeout: float = 5.0) -> Optional[dict]:
+    """Send a one-shot request (``ping``, ``stop``); None if no daemon is running."""
+    sock = _connect(socket_path(), timeout=timeout)
+    if sock is None:
+        return None
+    with sock, sock.makefile('rwb') as stream:
+        _send(stream, message)
+        line = stream.readline()
+    return json.loads(line) if line else None
+
+def run_client(base: str, full: bool = False) -> bool:
+    """Run ``ghpush`` through the daemon, rendering its progress locally.
+
+    Returns False, without side effects, when no daemon is reachable or
+    it runs with a different environment, so the caller can run locally
+    instead.
+    """
+    sock = _connect(socket_path())
+    if sock is None:
+        return False
+    from rich.text import Text
+
+    from .cli import StatusProgress, render_stream, show_error, show_header, show_result
+    from .pipeline import Task
+
+    with sock, sock.makefile('rwb') as stream:
+        try:
+            _send(stream, {'command': 'run', 'cwd': os.getcwd(), 'base': base, 'full': full,
+                           'tty': console.is_terminal, 'environment': environment_fingerprint()})
+            reply = json.loads(stream.readline() or b'{}')
+        except (OSError, ValueError):
+            return False
+        if reply.get('event') != 'accepted':
+            if reply.get('event') == 'environment_mismatch':
+                console.print("[yellow]The ghpush daemon was started with a different environment; "
+                              "running locally[/]")
+            return False
+        show_header()
+        status_progress = StatusProgress()
+        parser = None
+        result = error = None
+        with status_progress.progress:
+            for line in stream:
+                event = json.loads(line)
+                kind = event['event']
+                if kind == 'output':
+                    status_progress.progress.console.print(Text.from_ansi(event['text']), end="")
+                elif kind == 'task_started':
+                    status_progress.task_started(Task(event['name'], None, description=event['description']))
+                elif kind == 'task_finished':
+                    status_progress.task_finished(Task(event['name'], None), event['success'])
+                elif kind == 'stream_open':
+                    parser = render_stream(status_progress)
+                elif kind == 'delta':
+                    parser.feed(event['text'])
+                elif kind == 'stream_close':
+                    parser.close()
+                elif kind == 'result':
+                    result = event
+                    break
+                elif kind == 'error':
+                    error = event['message']
+                    break
+    if result is not None:
+        if result.get('open_url'):
+            import webbrowser
+
+            webbrowser.open(result['open_url'])
+        show_result(result, result['ai_mode'])
+    elif error:
+        show_error(error)
+    else:
+        # The daemon failed with its reason already printed, or went away
+        raise SystemExit(1)
+    return True
@@ -1,73 +1,236 @@
 """Analyze git diff to generate PR title and description."""
+import itertools
 import re
-from typing import Tuple, List
-from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, Tuple, List, Union
 from .ai_summarizer import AISummarizer
+from .config import get_setting
+from .context_packer import ContextPacker, PackedContext, count_tokens, iter_chunks
+from .diff_parser import FileDiff, FileStat, parse_diff
+from .diff_summary import DiffSummary
+from .path_filter import DEFAULT_FILTER, PathFilter
+from .semantic_diff import StructuralDiff, structural_diff
 
 class DiffAnalyzer:
-    MAX_TOKENS = 10000
-    
-    def __init__(self):
-        self.ai_summarizer = AISummarizer()
-    
+    # Token budget for diff context in the prompt (config: prompt_token_budget)
+    PROMPT_TOKEN_BUDGET = 6000
+    # Map-reduce limits for diffs that don't fit one prompt
+    MAX_CHUNKS = 32
+    MAP_CONCURRENCY = 4
+
+    def __init__(self, ai_summarizer: AISummarizer = None, path_filter: PathFilter = None):
+        self.ai_summarizer = ai_summarizer or AISummarizer()
+        # Generated/vendored files are summarized from their stats only
+        # (config: filter_generated)
+        self.path_filter = path_filter or DEFAULT_FILTER
+        self.filter_enabled = get_setting('filter_generated', True)
+
     @staticmethod
     def estimate_tokens(text: str) -> int:
-        """Rough estimation of tokens in text."""
-        return len(text.split())
-    
-    def analyze_diff(self, diff_text: str, commit_messages: List[str]) -> Tuple[str, str]:
-        """Analyze diff and generate PR title and description."""
-        if self.estimate_tokens(diff_text) > self.MAX_TOKENS:
-            return self._generate_large_diff_pr()
-        
-        # Try AI summarization first
-        ai_title, ai_description = self.ai_summarizer.generate_summary(diff_text, commit_messages)
+        """Count tokens in text with the summarizer model's tokenizer."""
+        return count_tokens(text)
+
+    def is_excluded(self, path: str) -> bool:
+        """Whether path is generated or vendored and kept out of the prompt."""
+        return self.filter_enabled and self.path_filter.excluded(path)
+
+    def excluded_paths(self, file_stats: Iterable[FileStat]) -> List[str]:
+        """Paths git need not produce patch text for, by the path filter."""
+        if not self.filter_enabled or file_stats is None:
+            return []
+        paths = []
+        for stat in file_stats:
+            if self.path_filter.excluded(stat.path):
+                paths.append(stat.path)
+                if stat.old_path:
+                    paths.append(stat.old_path)
+        return paths
+
+    def structural_diff(self, git_ops, base_branch: str, file_stats: List[FileStat],
+                        head: str = None) -> Optional[StructuralDiff]:
+        """Function/class-level changes of the diff's source files, read from
+        their old and new blobs (config: semantic_diff)."""
+        if not get_setting('semantic_diff', True):
+            return None
+        return structural_diff(git_ops, base_branch, file_stats, head=head, exclude=self.is_excluded)
+
+    def _iter_files(self, diff: Union[str, Iterable[str], Iterable[FileDiff], Iterable[FileStat]]) -> Iterator:
+        """Normalize a diff string, a line stream or parsed records into per-file records."""
+        exclude = self.is_excluded if self.filter_enabled else None
+        if isinstance(diff, str):
+            return parse_diff(diff.splitlines(), exclude=exclude)
+        iterator = iter(diff)
+        try:
+            first = next(iterator)
+        except StopIteration:
+            return iter(())
+        rest = itertools.chain([first], iterator)
+        if isinstance(first, (FileDiff, FileStat)):
+            return rest
+        return parse_diff(rest, exclude=exclude)
+
+    def _iter_prompt_files(self, diff, file_stats: List[FileStat] = None) -> Iterator[FileDiff]:
+        """Parsed files for the prompt, plus stats-only records for excluded
+        files whose patch git was told to skip."""
+        seen = set()
+        for file_diff in self._iter_files(diff):
+            if isinstance(file_diff, FileStat):
+                file_diff = FileDiff.from_stat(file_diff, excluded=self.is_excluded(file_diff.path))
+            elif not file_diff.excluded and self.is_excluded(file_diff.path):
+                file_diff.hunks = []
+                file_diff.excluded = True
+            seen.add(file_diff.path)
+            yield file_diff
+        for stat in file_stats or ():
+            if stat.path not in seen and self.is_excluded(stat.path):
+                yield FileDiff.from_stat(stat)
+
+    def _structure_text(self, structure: Optional[StructuralDiff], budget: int) -> str:
+        """The structural change list for the prompt, using at most half the budget."""
+        if not structure:
+            return ""
+        return structure.render(budget // 2, model=self.ai_summarizer.model)
+
+    def _consume_diff(self, diff, changed_files: Optional[DiffSummary],
+                      file_stats: List[FileStat] = None, reserved: int = 0) -> Iterator[PackedContext]:
+        """Read the diff stream once, yielding packed chunks and, if
+        changed_files is given, recording each file in it.
+
+        ``reserved`` tokens of the budget are kept free for other context
+        (the structural change list), so hunks only fill what is left.
+        """
+        def records():
+            for file_diff in self._iter_prompt_files(diff, file_stats):
+                changed_files.add(file_diff)
+                yield file_diff
+
+        files = records() if changed_files is not None else self._iter_prompt_files(diff, file_stats)
+        budget = get_setting('prompt_token_budget', self.PROMPT_TOKEN_BUDGET) - reserved
+        if not get_setting('map_reduce', True):
+            return iter([ContextPacker(budget=budget, model=self.ai_summarizer.model).pack(files)])
+        return iter_chunks(
+            files,
+            chunk_budget=budget,
+            max_chunks=get_setting('map_reduce_max_chunks', self.MAX_CHUNKS),
+            model=self.ai_summarizer.model
+        )
+
+    def analyze_diff(self, diff, commit_messages: List[str],
+                     file_stats: List[FileStat] = None,
+                     on_delta: Optional[Callable[[str], None]] = None,
+                     structure: StructuralDiff = None, fallback: bool = True) -> Tuple[str, str]:
+        """Analyze diff and generate PR title and description.
+
+        ``diff`` may be the full diff text or a lazy stream of lines (for
+        example from ``GitOperations.iter_diff_lines``); it is consumed at
+        most once. When ``file_stats`` from ``GitOperations.get_diff_stats``
+        are supplied, the patch text is only read if AI mode needs it.
+        ``on_delta`` receives the AI response as it streams in.
+        ``structure`` (from ``semantic_diff.structural_diff``) lists the
+        functions and classes that changed; it leads the prompt, and the
+        basic summary lists it per file. Without ``fallback``, None is
+        returned instead of the basic summary when the model can't be used.
+        """
+        changed_files = None
+        if file_stats is not None:
+            changed_files = self.summarize_stats(file_stats)
+
+        if not self.ai_summarizer.enabled:
+            if not fallback:
+                return None
+            if changed_files is None:
+                changed_files = self._analyze_changed_files(diff)
+            return self._generate_pr_content(changed_files, commit_messages, structure)
+
+        budget = get_setting('prompt_token_budget', self.PROMPT_TOKEN_BUDGET)
+        structure_text = self._structure_text(structure, budget)
+        # Without stats, the summary is filled in while the patch is parsed
+        parsed = DiffSummary() if changed_files is None else None
+        chunks = self._consume_diff(diff, parsed, file_stats,
+                                    reserved=self.estimate_tokens(structure_text) if structure_text else 0)
+        first = next(chunks, None)
+        second = next(chunks, None)
+        if changed_files is None:
+            changed_files = parsed
+
+        # Try AI summarization first; diffs that don't fit one prompt are
+        # summarized per chunk concurrently and then reduced
+        if second is None:
+            context = first or PackedContext("", 0, 0, 0)
+            ai_title, ai_description = self.ai_summarizer.generate_summary(
+                changed_files, context.text, commit_messages, truncated=context.truncated,
+                on_delta=on_delta, structure=structure_text, fallback=fallback
+            )
+        else:
+            ai_title, ai_description = self.ai_summarizer.generate_map_reduce_summary(
+                changed_files,
+                itertools.chain([first, second], chunks),
+                commit_messages,
+                concurrency=get_setting('map_reduce_concurrency', self.MAP_CONCURRENCY),
+                on_delta=on_delta, structure=structure_text, fallback=fallback
+            )
         if ai_title and ai_description:
             return ai_title, ai_description
-            
+
         # Fall back to basic summarization if AI fails
-        return self._generate_pr_content(diff_text, commit_messages)
-    
-    def _generate_pr_content(self, diff_text: str, commit_messages: List[str]) -> Tuple[str, str]:
-        """Generate PR title and description from diff and commits."""
-        # Get changed files
-        changed_files = self._analyze_changed_files(diff_text)
-        
+        if not fallback:
+            return None
+        return self._generate_pr_content(changed_files, commit_messages, structure)
+
+    def update_summary(self, previous: Tuple[str, str], diff, commit_messages: List[str],
+                       file_stats: List[FileStat] = None,
+                       on_delta: Optional[Callable[[str], None]] = None,
+                       structure: StructuralDiff = None) -> Optional[Tuple[str, str]]:
+        """Amend a previous (title, description) with a diff of only the new commits.
+
+        Returns None when the summary has to be regenerated from the full
+        diff instead, e.g. in basic mode or if the AI request fails.
+        """
+        if not self.ai_summarizer.enabled:
+            return None
+        if file_stats is not None and not file_stats:
+            # Nothing changed since the previous summary
+            return previous
+
+        budget = get_setting('prompt_token_budget', self.PROMPT_TOKEN_BUDGET)
+        structure_text = self._structure_text(structure, budget)
+        if structure_text:
+            budget -= self.estimate_tokens(structure_text)
+        context = ContextPacker(budget=budget, model=self.ai_summarizer.model).pack(
+            self._iter_prompt_files(diff, file_stats)
+        )
+        title, description = self.ai_summarizer.generate_update_summary(
+            *previous, context.text, commit_messages, truncated=context.truncated, on_delta=on_delta,
+            structure=structure_text
+        )
+        if title and description:
+            return title, description
+        return None
+
+    def _generate_pr_content(self, changed_files: DiffSummary, commit_messages: List[str],
+                             structure: StructuralDiff = None) -> Tuple[str, str]:
+        """Generate PR title and description from changed files and commits."""
         # Generate title
         title = self._generate_title(commit_messages, changed_files)
-        
+
         # Generate description
-        description = self._generate_description(commit_messages, changed_files, diff_text)
-        
+        description = self._generate_description(commit_messages, changed_files, structure)
+
         return title, description
-    
-    def _analyze_changed_files(self, diff_text: str) -> List[dict]:
+
+    def basic_summary(self, file_stats: List[FileStat], commit_messages: List[str],
+                      structure: StructuralDiff = None) -> Tuple[str, str]:
+        """Title and description built without the model, from diff stats."""
+        return self._generate_pr_content(self.summarize_stats(file_stats), commit_messages, structure)
+
+    def summarize_stats(self, file_stats: Iterable[FileStat]) -> DiffSummary:
+        """Build the DiffSummary from ``git diff --numstat`` stats."""
+        return DiffSummary.from_records(file_stats, self.is_excluded)
+
+    def _analyze_changed_files(self, diff) -> DiffSummary:
         """Analyze which files were changed and how."""
-        files = []
-        current_file = None
-        
-        for line in diff_text.split('\n'):
-            if line.startswith('diff --git'):
-                if current_file:
-                    files.append(current_file)
-                file_path = line.split(' b/')[-1]
-                current_file = {
-                    'path': file_path,
-                    'extension': Path(file_path).suffix,
-                    'additions': 0,
-                    'deletions': 0
-                }
-            elif current_file and line.startswith('+') and not line.startswith('+++'):
-                current_file['additions'] += 1
-            elif current_file and line.startswith('-') and not line.startswith('---'):
-                current_file['deletions'] += 1
-        
-        if current_file:
-            files.append(current_file)
-        
-        return files
-    
-    def _generate_title(self, commit_messages: List[str], changed_files: List[dict]) -> str:
+        return DiffSummary.from_records(self._iter_files(diff), self.is_excluded)
+
+    def _generate_title(self, commit_messages: List[str], changed_files: DiffSummary) -> str:
         """Generate PR title based on commits and changes."""
         if commit_messages:
             # Use the first commit message as base for the title
@@ -77,17 +240,17 @@ class DiffAnalyzer:
             return title
         
         # Fallback: Generate title based on changes
-        main_extensions = {f['extension'] for f in changed_files if f['extension']}
+        main_extensions = changed_files.extensions
         if len(main_extensions) == 1:
-            ext = main_extensions.pop().lstrip('.')
+            ext = main_extensions[0].lstrip('.')
             return f"Update {ext} files"
         elif len(changed_files) == 1:
-            return f"Update {Path(changed_files[0]['path']).name}"
+            return f"Update {changed_files[0].name}"
         else:
             return f"Update {len(changed_files)} files"
     
-    def _generate_description(self, commit_messages: List[str], 
-                            changed_files: List[dict], diff_text: str) -> str:
+    def _generate_description(self, commit_messages: List[str],
+                            changed_files: DiffSummary, structure: StructuralDiff = None) -> str:
         """Generate detailed PR description."""
         description = []
         
@@ -101,27 +264,29 @@ class DiffAnalyzer:
         description.append("## Changes")
         for file in changed_files:
             changes = []
-            if file['additions'] > 0:
-                changes.append(f"{file['additions']} addition{'s' if file['additions'] > 1 else ''}")
-            if file['deletions'] > 0:
-                changes.append(f"{file['deletions']} deletion{'s' if file['deletions'] > 1 else ''}")
+            if file.binary:
+                changes.append("binary")
+            if file.generated:
+                changes.append("generated")
+            if file.additions > 0:
+                changes.append(f"{file.additions} addition{'s' if file.additions > 1 else ''}")
+            if file.deletions > 0:
+                changes.append(f"{file.deletions} deletion{'s' if file.deletions > 1 else ''}")
             
-            description.append(f"* {file['path']} ({', '.join(changes)})")
+            path = file.path
+            if file.old_path:
+                path = f"{file.old_path} → {path}"
+            description.append(f"* {path} ({', '.join(changes)})" if changes else f"* {path}")
+            if structure is not None:
+                for change in structure.get(file.path):
+                    text = change.describe()
+                    description.append(f"  * {text[0].upper()}{text[1:]}")
         
         # Add statistics
-        total_additions = sum(f['additions'] for f in changed_files)
-        total_deletions = sum(f['deletions'] for f in changed_files)
         description.append("")
         description.append("## Statistics")
         description.append(f"* Files changed: {len(changed_files)}")
-        description.append(f"* Lines added: {total_additions}")
-        description.append(f"* Lines removed: {total_deletions}")
+        description.append(f"* Lines added: {changed_files.total_additions}")
+        description.append(f"* Lines removed: {changed_files.total_deletions}")
         
         return "\n".join(description)
-    
-    def _generate_large_diff_pr(self) -> Tuple[str, str]:
-        """Generate generic PR content for large diffs."""
-        return (
-            "Large code change",
-            "This PR contains extensive changes. Please review carefully."
-        ) 
\ No newline at end of file
@@ -0,0 +1,216 @@
+"""Streaming parser for unified git diffs."""
+import hashlib
+import re
+from typing import Callable, Iterable, Iterator, List, Optional
+
+HUNK_HEADER = re.compile(r'^@@ -\d+(?:,(\d+))? \+\d+(?:,(\d+))? @@')
+
+class Hunk:
+    """A single ``@@`` hunk of a file diff."""
+    __slots__ = ('header', 'lines', 'additions', 'deletions')
+
+    def __init__(self, header: str):
+        self.header = header
+        self.lines: List[str] = []
+        self.additions = 0
+        self.deletions = 0
+
+    @property
+    def text(self) -> str:
+        """Retained body of the hunk, header excluded."""
+        return "".join(line + "\n" for line in self.lines)
+
+class FileDiff:
+    """Per-file record produced while streaming a diff."""
+    __slots__ = ('path', 'old_path', 'additions', 'deletions', 'binary',
+                 'hunks', 'words', 'truncated', 'excluded', '_kept_chars')
+
+    def __init__(self, path: str, old_path: Optional[str] = None):
+        self.path = path
+        self.old_path = old_path
+        self.additions = 0
+        self.deletions = 0
+        self.binary = False
+        self.hunks: List[Hunk] = []
+        self.words = 0
+        self.truncated = False
+        # Generated or vendored: counted, but no hunk text is kept
+        self.excluded = False
+        self._kept_chars = 0
+
+    @classmethod
+    def from_stat(cls, stat: 'FileStat', excluded: bool = True) -> 'FileDiff':
+        """A hunk-less record carrying only a FileStat's counts."""
+        file_diff = cls(stat.path, stat.old_path)
+        file_diff.additions = stat.additions
+        file_diff.deletions = stat.deletions
+        file_diff.binary = stat.binary
+        file_diff.excluded = excluded
+        return file_diff
+
+    @property
+    def patch(self) -> str:
+        """Retained patch text for this file."""
+        return "".join(hunk.header + "\n" + hunk.text for hunk in self.hunks)
+
+    def digest(self) -> str:
+        """Hash of the file's path, counts and retained patch text."""
+        digest = hashlib.sha256(
+            f"{self.path}\0{self.old_path}\0{self.additions}\0{self.deletions}\0{self.binary}\0".encode(
+                'utf-8', 'surrogatepass'))
+        for hunk in self.hunks:
+            digest.update(hunk.header.encode('utf-8', 'surrogatepass') + b"\n")
+            digest.update(hunk.text.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+def _unquote(path: str) -> str:
+    """Strip the C-style quoting git applies to unusual paths."""
+    if len(path) >= 2 and path[0] == '"' and path[-1] == '"':
+        path = path[1:-1].encode('latin-1', 'backslashreplace').decode('unicode_escape')
+        path = path.encode('latin-1', 'replace').decode('utf-8', 'replace')
+    return path
+
+def _strip_prefix(path: str) -> Optional[str]:
+    """Turn ``a/foo`` / ``b/foo`` into ``foo`` and ``/dev/null`` into None."""
+    path = _unquote(path.rstrip('\t'))
+    if path == '/dev/null':
+        return None
+    if path[:2] in ('a/', 'b/'):
+        return path[2:]
+    return path
+
+def _paths_from_header(line: str) -> str:
+    """Best-effort path from a ``diff --git a/X b/Y`` line."""
+    rest = line[len('diff --git '):]
+    if rest.startswith('a/') and (len(rest) - 5) % 2 == 0:
+        # Same path on both sides: "a/P b/P" (works even when P has spaces)
+        size = (len(rest) - 5) // 2
+        path = rest[2:2 + size]
+        if rest[2 + size:] == ' b/' + path:
+            return path
+    return _strip_prefix(rest.split(' b/')[-1] if ' b/' in rest else rest) or rest
+
+def parse_diff(lines: Iterable[str], max_patch_chars: int = 65536,
+               exclude: Callable[[str], bool] = None) -> Iterator[FileDiff]:
+    """Yield a FileDiff for each file in a unified diff, in a single pass.
+
+    Only ``max_patch_chars`` of hunk text is retained per file; line counts
+    and word counts are always complete, so memory stays bounded by the
+    retention limit rather than by the size of the diff. Files for which
+    ``exclude(path)`` is true are marked excluded and keep no hunk text.
+    """
+    current: Optional[FileDiff] = None
+    hunk: Optional[Hunk] = None
+    old_left = new_left = 0
+
+    for line in lines:
+        line = line.rstrip('\n')
+        if hunk is not None and (old_left > 0 or new_left > 0):
+            tag = line[:1]
+            if tag == '+':
+                new_left -= 1
+                current.additions += 1
+                hunk.additions += 1
+            elif tag == '-':
+                old_left -= 1
+                current.deletions += 1
+                hunk.deletions += 1
+            elif tag == '\\':
+                pass  # "\ No newline at end of file"
+            else:
+                old_left -= 1
+                new_left -= 1
+            current.words += len(line.split())
+            if not current.truncated and not current.excluded:
+                if current._kept_chars + len(line) + 1 > max_patch_chars:
+                    current.truncated = True
+                else:
+                    hunk.lines.append(line)
+                    current._kept_chars += len(line) + 1
+            continue
+
+        if line.startswith('diff --git '):
+            if current is not None:
+                yield current
+            current = FileDiff(_paths_from_header(line))
+            current.excluded = exclude is not None and exclude(current.path)
+            hunk = None
+            current.words += len(line.split())
+            continue
+        if current is None:
+            continue
+
+        current.words += len(line.split())
+        match = HUNK_HEADER.match(line)
+        if match:
+            old_left = int(match.group(1)) if match.group(1) is not None else 1
+            new_left = int(match.group(2)) if match.group(2) is not None else 1
+            hunk = Hunk(line)
+            if not current.truncated and not current.excluded:
+                current.hunks.append(hunk)
+                current._kept_chars += len(line) + 1
+        elif line.startswith('--- '):
+            old = _strip_prefix(line[4:])
+            if old is not None and old != current.path:
+                current.old_path = old
+        elif line.startswith('+++ '):
+            new = _strip_prefix(line[4:])
+            if new is not None:
+                current.path = new
+                if current.old_path == new:
+                    current.old_path = None
+        elif line.startswith('rename from '):
+            current.old_path = _unquote(line[len('rename from '):])
+        elif line.startswith('rename to '):
+            current.path = _unquote(line[len('rename to '):])
+        elif line.startswith('Binary files ') or line == 'GIT binary patch':
+            current.binary = True
+
+    if current is not None:
+        yield current
+
+class FileStat:
+    """Compact per-file statistics as reported by ``git diff --numstat``."""
+    __slots__ = ('path', 'old_path', 'additions', 'deletions', 'binary')
+
+    def __init__(self, path: str, old_path: Optional[str], additions: int,
+                 deletions: int, binary: bool = False):
+        self.path = path
+        self.old_path = old_path
+        self.additions = additions
+        self.deletions = deletions
+        self.binary = binary
+
+    def __repr__(self) -> str:
+        return (f"FileStat({self.path!r}, old_path={self.old_path!r}, "
+                f"+{self.additions}/-{self.deletions}, binary={self.binary})")
+
+def parse_numstat(output: str) -> List[FileStat]:
+    """Parse ``git diff --numstat -z`` output.
+
+    Each entry is ``adds<TAB>dels<TAB>path<NUL>``; renames and copies leave
+    the path empty and follow it with ``old<NUL>new<NUL>``. Binary files
+    report ``-`` for both counts.
+    """
+    stats = []
+    fields = output.split('\0')
+    index = 0
+    while index < len(fields):
+        entry = fields[index]
+        index += 1
+        if not entry:
+            continue
+        adds, dels, path = entry.split('\t', 2)
+        old_path = None
+        if not path:
+            old_path, path = fields[index], fields[index + 1]
+            index += 2
+        binary = adds == '-' and dels == '-'
+        stats.append(FileStat(
+            path,
+            old_path,
+            0 if binary else int(adds),
+            0 if binary else int(dels),
+            binary
+        ))
+    return stats
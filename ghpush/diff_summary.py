@@ -0,0 +1,107 @@
+"""Compact per-file change records with precomputed aggregates."""
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional
+
+_extensions: Dict[str, str] = {}
+
+def file_extension(path: str) -> str:
+    """``Path(path).suffix``, without building a Path, interned so that
+    all files with the same extension share one string."""
+    name = path[path.rfind('/') + 1:]
+    dot = name.rfind('.')
+    if dot <= 0 or dot == len(name) - 1 or name.strip('.') == '':
+        return ''
+    suffix = name[dot:]
+    cached = _extensions.get(suffix)
+    if cached is None:
+        cached = _extensions[suffix] = sys.intern(suffix)
+    return cached
+
+class FileChange:
+    """One changed file."""
+    __slots__ = ('path', 'old_path', 'extension', 'additions', 'deletions', 'binary', 'generated')
+
+    def __init__(self, path: str, old_path: Optional[str], additions: int, deletions: int,
+                 binary: bool = False, generated: bool = False):
+        self.path = path
+        self.old_path = old_path
+        self.extension = file_extension(path)
+        self.additions = additions
+        self.deletions = deletions
+        self.binary = binary
+        self.generated = generated
+
+    @property
+    def name(self) -> str:
+        return self.path[self.path.rfind('/') + 1:]
+
+class ExtensionStats:
+    """Aggregate counts for all changed files sharing an extension."""
+    __slots__ = ('files', 'additions', 'deletions')
+
+    def __init__(self):
+        self.files = 0
+        self.additions = 0
+        self.deletions = 0
+
+class DiffSummary:
+    """All changed files of a diff plus totals that are kept up to date as
+    files are added, so consumers never re-scan the file list.
+
+    Built once per run (from ``git diff --numstat`` stats or while the
+    patch is parsed) and shared by the title, description and basic
+    summary generators.
+    """
+    __slots__ = ('files', 'total_additions', 'total_deletions', 'binary_files',
+                 'generated_files', 'by_extension')
+
+    def __init__(self):
+        self.files: List[FileChange] = []
+        self.total_additions = 0
+        self.total_deletions = 0
+        self.binary_files = 0
+        self.generated_files = 0
+        self.by_extension: Dict[str, ExtensionStats] = {}
+
+    @classmethod
+    def from_records(cls, records: Iterable, is_generated=None) -> 'DiffSummary':
+        """Summarize FileStat or FileDiff records."""
+        summary = cls()
+        for record in records:
+            summary.add(record, is_generated)
+        return summary
+
+    def add(self, record, is_generated=None) -> FileChange:
+        """Record a FileStat or FileDiff (anything with path, old_path,
+        additions, deletions and binary)."""
+        generated = getattr(record, 'excluded', False) or (
+            is_generated is not None and is_generated(record.path))
+        change = FileChange(record.path, record.old_path, record.additions,
+                            record.deletions, record.binary, generated)
+        self.files.append(change)
+        self.total_additions += change.additions
+        self.total_deletions += change.deletions
+        self.binary_files += change.binary
+        self.generated_files += generated
+        stats = self.by_extension.get(change.extension)
+        if stats is None:
+            stats = self.by_extension[change.extension] = ExtensionStats()
+        stats.files += 1
+        stats.additions += change.additions
+        stats.deletions += change.deletions
+        return change
+
+    @property
+    def extensions(self) -> List[str]:
+        """Extensions of the changed files, most changed files first."""
+        return sorted((ext for ext in self.by_extension if ext),
+                      key=lambda ext: -self.by_extension[ext].files)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def __iter__(self) -> Iterator[FileChange]:
+        return iter(self.files)
+
+    def __getitem__(self, index: int) -> FileChange:
+        return self.files[index]
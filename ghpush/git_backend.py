@@ -0,0 +1,207 @@
+"""Interchangeable backends for the git reads and writes GitOperations needs."""
+import subprocess
+import threading
+from functools import cached_property
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+BACKENDS = ('gitpython', 'plumbing')
+
+class GitPythonBackend:
+    """Backend built on GitPython's ``Repo``."""
+    name = 'gitpython'
+
+    def __init__(self, repo_path: Path):
+        # GitPython is imported lazily; it is a large part of startup time
+        from git import Repo
+
+        self.repo_path = repo_path
+        self.repo = Repo(repo_path, search_parent_directories=True)
+
+    def current_branch(self) -> str:
+        return self.repo.active_branch.name
+
+    def refresh(self):
+        """Nothing is cached beyond what GitPython re-reads itself."""
+
+    def head_sha(self) -> Optional[str]:
+        try:
+            return self.repo.head.commit.hexsha
+        except ValueError:
+            # No commits yet
+            return None
+
+    def tracking_branch(self) -> Optional[str]:
+        tracking = self.repo.active_branch.tracking_branch()
+        return tracking.name if tracking else None
+
+    def create_branch(self, branch_name: str) -> str:
+        current = self.repo.active_branch
+        new_branch = self.repo.create_head(branch_name)
+        new_branch.checkout()
+        return current.name
+
+    def diff(self, base_branch: str) -> str:
+        return self.repo.git.diff(base_branch)
+
+    def commit_messages(self, rev_range: str) -> List[str]:
+        return [commit.message.strip() for commit in self.repo.iter_commits(rev_range)]
+
+    def remote_url(self, remote: str = 'origin') -> str:
+        return self.repo.remote(remote).url
+
+    def push(self, refspecs: List[str], remote: str = 'origin', set_upstream: bool = True):
+        self.repo.remote(remote).push(refspec=refspecs, set_upstream=set_upstream)
+
+    def read_blob(self, rev: str, path: str) -> Optional[bytes]:
+        from git import BadName
+
+        try:
+            return (self.repo.commit(rev).tree / path).data_stream.read()
+        except (KeyError, ValueError, BadName):
+            return None
+
+    def close(self):
+        self.repo.close()
+
+class CatFile:
+    """A long-lived ``git cat-file --batch`` process for object reads."""
+
+    def __init__(self, repo_path: Path):
+        self.repo_path = repo_path
+        self._process = None
+        self._lock = threading.Lock()
+
+    def _ensure_process(self):
+        if self._process is None or self._process.poll() is not None:
+            self._process = subprocess.Popen(
+                ['git', 'cat-file', '--batch'],
+                cwd=self.repo_path,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        return self._process
+
+    def read(self, spec: str) -> Optional[Tuple[str, bytes]]:
+        """Return (type, content) for an object name like ``HEAD:path``, or None if missing."""
+        with self._lock:
+            process = self._ensure_process()
+            process.stdin.write(spec.encode('utf-8') + b'\n')
+            process.stdin.flush()
+            header = process.stdout.readline().decode('utf-8', 'replace').rstrip('\n')
+            if not header or header.endswith(' missing') or header.endswith(' ambiguous'):
+                return None
+            _, obj_type, size = header.rsplit(' ', 2)
+            content = process.stdout.read(int(size))
+            process.stdout.read(1)  # trailing newline
+            return obj_type, content
+
+    def close(self):
+        with self._lock:
+            if self._process is not None:
+                self._process.stdin.close()
+                self._process.wait()
+                self._process.stdout.close()
+                self._process = None
+
+class PlumbingBackend:
+    """Backend that talks to git plumbing commands directly.
+
+    Refs are resolved once and cached for the lifetime of the backend,
+    object reads share one ``git cat-file --batch`` process, and commit
+    messages come from a single ``git log -z`` call.
+    """
+    name = 'plumbing'
+
+    def __init__(self, repo_path: Path):
+        self.repo_path = repo_path
+        self.cat_file = CatFile(repo_path)
+
+    def _git(self, *args: str, check: bool = True) -> str:
+        result = subprocess.run(
+            ['git', *args],
+            cwd=self.repo_path,
+            capture_output=True,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+        )
+        if check and result.returncode != 0:
+            raise RuntimeError(f"git {args[0]} failed: {result.stderr.strip()}")
+        return result.stdout if result.returncode == 0 else ""
+
+    @cached_property
+    def _refs(self) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        """(HEAD sha, branch name, tracking branch), resolved once.
+
+        The branch and tracking branch are None for a detached HEAD, and
+        the sha is None before the first commit.
+        """
+        branch = self._git('symbolic-ref', '-q', '--short', 'HEAD', check=False).strip()
+        if not branch:
+            head = self._git('rev-parse', '--verify', '--quiet', 'HEAD^{commit}', check=False).strip()
+            return head or None, None, None
+        line = self._git('for-each-ref', '--format=%(objectname)%00%(upstream:short)',
+                         f'refs/heads/{branch}').rstrip('\n')
+        head, _, upstream = line.partition('\0')
+        return head or None, branch, upstream or None
+
+    def _branch_refs(self) -> Tuple[Optional[str], str, Optional[str]]:
+        """The refs, requiring a checked-out branch like GitPython's active_branch."""
+        if self._refs[1] is None:
+            raise TypeError("HEAD is a detached symbolic reference")
+        return self._refs
+
+    def refresh(self):
+        """Forget the resolved refs, e.g. after another process committed."""
+        self.__dict__.pop('_refs', None)
+
+    def head_sha(self) -> Optional[str]:
+        return self._refs[0]
+
+    def current_branch(self) -> str:
+        return self._branch_refs()[1]
+
+    def tracking_branch(self) -> Optional[str]:
+        return self._branch_refs()[2]
+
+    def create_branch(self, branch_name: str) -> str:
+        current = self.current_branch()
+        self._git('checkout', '-q', '-b', branch_name)
+        self.refresh()
+        return current
+
+    def diff(self, base_branch: str) -> str:
+        return self._git('diff', base_branch).rstrip('\n')
+
+    def commit_messages(self, rev_range: str) -> List[str]:
+        output = self._git('log', '-z', '--format=%B', rev_range)
+        return [message.strip() for message in output.split('\0') if message.strip()]
+
+    def remote_url(self, remote: str = 'origin') -> str:
+        return self._git('config', '--get', f'remote.{remote}.url').strip()
+
+    def push(self, refspecs: List[str], remote: str = 'origin', set_upstream: bool = True):
+        args = ['push', '--porcelain']
+        if set_upstream:
+            args.append('--set-upstream')
+        self._git(*args, remote, *refspecs)
+
+    def read_blob(self, rev: str, path: str) -> Optional[bytes]:
+        obj = self.cat_file.read(f'{rev}:{path}')
+        if obj is None or obj[0] != 'blob':
+            return None
+        return obj[1]
+
+    def close(self):
+        self.cat_file.close()
+
+def create_backend(repo_path: Path, name: str = None):
+    """Instantiate the backend called name (default: 'gitpython')."""
+    name = name or 'gitpython'
+    if name == 'plumbing':
+        return PlumbingBackend(repo_path)
+    if name == 'gitpython':
+        return GitPythonBackend(repo_path)
+    raise ValueError(f"Unknown git backend '{name}' (expected one of: {', '.join(BACKENDS)})")
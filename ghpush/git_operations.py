@@ -1,42 +1,289 @@
 """Git operations handler."""
 import subprocess
-from typing import List, Tuple
-from git import Repo
+from functools import cached_property, lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from pathlib import Path
-import webbrowser
+
+from .config import get_setting
+from .diff_parser import FileDiff, FileStat, parse_diff, parse_numstat
+from .git_backend import create_backend
+from .path_filter import PathFilter
+from .tracing import tracer
+
+# Stay well below the Windows command line limit
+MAX_PATHSPEC_CHARS = 24000
+
+@lru_cache(maxsize=16)
+def _configured_backend(repo_path: str) -> str:
+    """The repo's `ghpush.backend` git config, read once per repository."""
+    result = subprocess.run(
+        ['git', 'config', '--get', 'ghpush.backend'],
+        cwd=repo_path,
+        capture_output=True,
+        text=True,
+    )
+    return result.stdout.strip()
 
 class GitOperations:
-    def __init__(self, repo_path: Path = None):
+    def __init__(self, repo_path: Path = None, backend: str = None):
         self.repo_path = repo_path or Path.cwd()
-        self.repo = Repo(self.repo_path)
+        self.backend = create_backend(self.repo_path, backend or self._configured_backend())
+
+    def _configured_backend(self) -> str:
+        """Backend from the repo's `ghpush.backend` git config, else the ghpush settings."""
+        return (_configured_backend(str(Path(self.repo_path).resolve()))
+                or get_setting('git_backend', 'gitpython'))
+
+    @property
+    def repo(self):
+        """The GitPython Repo (only available with the gitpython backend)."""
+        if not hasattr(self.backend, 'repo'):
+            raise RuntimeError(f"GitOperations.repo needs the gitpython backend, "
+                               f"not '{self.backend.name}'")
+        return self.backend.repo
+
+    @property
+    def current_branch(self) -> str:
+        """Name of the checked-out branch."""
+        return self.backend.current_branch()
+
+    def head_sha(self, rev: str = 'HEAD') -> str:
+        """Full commit SHA that rev resolves to.
+
+        HEAD comes from the backend, which may cache it until refresh().
+        """
+        if rev == 'HEAD':
+            sha = self.backend.head_sha()
+            if not sha:
+                raise RuntimeError("Cannot resolve 'HEAD' to a commit")
+            return sha
+        result = subprocess.run(
+            ['git', 'rev-parse', '--verify', '--quiet', f'{rev}^{{commit}}'],
+            cwd=self.repo_path,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Cannot resolve '{rev}' to a commit")
+        return result.stdout.strip()
+
+    def tracking_sha(self) -> Optional[str]:
+        """Commit the current branch's tracking branch points at, if any."""
+        tracking = self.backend.tracking_branch()
+        if not tracking:
+            return None
+        try:
+            return self.head_sha(tracking)
+        except RuntimeError:
+            # Configured, but not fetched or deleted on the remote
+            return None
+
+    def is_ancestor(self, ancestor: str, rev: str = 'HEAD') -> bool:
+        """Whether ancestor is reachable from rev (false if it no longer exists)."""
+        result = subprocess.run(
+            ['git', 'merge-base', '--is-ancestor', ancestor, rev],
+            cwd=self.repo_path,
+            capture_output=True,
+        )
+        return result.returncode == 0
+
+    def refresh(self):
+        """Drop state cached by the backend so a long-lived instance sees new commits."""
+        self.backend.refresh()
+
+    @property
+    def git_dir(self) -> Path:
+        """The repository's .git directory (which may be elsewhere for worktrees)."""
+        result = subprocess.run(
+            ['git', 'rev-parse', '--absolute-git-dir'],
+            cwd=self.repo_path,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Not a git repository: {self.repo_path}")
+        return Path(result.stdout.strip())
+
+    @cached_property
+    def toplevel(self) -> Path:
+        """The working tree's top-level directory, which diff paths are relative to."""
+        result = subprocess.run(
+            ['git', 'rev-parse', '--show-toplevel'],
+            cwd=self.repo_path,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Not a git repository: {self.repo_path}")
+        return Path(result.stdout.strip())
+
+    def has_uncommitted_changes(self) -> bool:
+        """Whether tracked files differ from HEAD (staged or not)."""
+        result = subprocess.run(
+            ['git', 'diff', '--quiet', 'HEAD', '--'],
+            cwd=self.repo_path,
+            capture_output=True,
+        )
+        return result.returncode != 0
 
     def create_branch(self, branch_name: str):
         """Create and checkout a new branch."""
-        current = self.repo.active_branch
-        new_branch = self.repo.create_head(branch_name)
-        new_branch.checkout()
-        return current.name
+        return self.backend.create_branch(branch_name)
 
     def get_diff(self, base_branch: str) -> str:
         """Get git diff between current branch and base branch."""
-        return self.repo.git.diff(base_branch)
+        with tracer.span('git.diff', backend=self.backend.name) as span:
+            diff = self.backend.diff(base_branch)
+            span.set('bytes_read', len(diff))
+            return diff
+
+    @staticmethod
+    def _diff_target(base_branch: str, head: str = None) -> str:
+        """The working tree against base, or head's changes since it forked from base."""
+        return f'{base_branch}...{head}' if head else base_branch
+
+    def get_diff_stats(self, base_branch: str, head: str = None) -> List[FileStat]:
+        """Get per-file addition/deletion counts without fetching patch text."""
+        with tracer.span('git.diff_stats') as span:
+            result = subprocess.run(
+                ['git', 'diff', '--numstat', '-z', '--find-renames', '--no-ext-diff',
+                 self._diff_target(base_branch, head), '--'],
+                cwd=self.repo_path,
+                capture_output=True,
+                text=True,
+                encoding='utf-8',
+                errors='replace',
+            )
+            if result.returncode != 0:
+                raise RuntimeError(f"git diff --numstat failed: {result.stderr.strip()}")
+            stats = parse_numstat(result.stdout)
+            span.set('bytes_read', len(result.stdout))
+            span.set('files', len(stats))
+            return stats
+
+    @property
+    def path_filter(self) -> PathFilter:
+        """Generated/vendored path rules for this repository."""
+        return PathFilter.for_repo(self.toplevel)
+
+    @staticmethod
+    def _exclude_pathspecs(paths: Iterable[str]) -> List[str]:
+        """Pathspecs leaving paths (relative to the top level) out of a diff."""
+        paths = list(paths)
+        if not paths or sum(len(path) + 20 for path in paths) > MAX_PATHSPEC_CHARS:
+            # The parser still drops their hunks; this only saves git the work
+            return []
+        return [':(top)'] + [f':(top,exclude,literal){path}' for path in paths]
+
+    def iter_diff_lines(self, base_branch: str, head: str = None, exclude: Iterable[str] = ()) -> Iterator[str]:
+        """Stream `git diff` output line by line from a subprocess pipe.
+
+        Paths in exclude (e.g. generated files) get no patch text at all.
+        """
+        with tracer.span('git.diff_stream') as span:
+            process = subprocess.Popen(
+                ['git', 'diff', '--no-color', '--no-ext-diff', '--find-renames',
+                 self._diff_target(base_branch, head), '--', *self._exclude_pathspecs(exclude)],
+                cwd=self.repo_path,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                encoding='utf-8',
+                errors='replace',
+            )
+            bytes_read = 0
+            try:
+                for line in process.stdout:
+                    bytes_read += len(line)
+                    yield line
+            finally:
+                process.stdout.close()
+                stderr = process.stderr.read()
+                process.stderr.close()
+                returncode = process.wait()
+                span.set('bytes_read', bytes_read)
+            if returncode != 0:
+                raise RuntimeError(f"git diff failed: {stderr.strip()}")
+
+    def iter_diff(self, base_branch: str, head: str = None, max_patch_chars: int = 65536,
+                  exclude: Iterable[str] = ()) -> Iterator[FileDiff]:
+        """Stream per-file diff records against the base branch.
+
+        Paths in exclude are marked excluded and keep no hunk text.
+        """
+        exclude = set(exclude)
+        return parse_diff(self.iter_diff_lines(base_branch, head, exclude), max_patch_chars=max_patch_chars,
+                          exclude=exclude.__contains__ if exclude else None)
 
     def push_branch(self, branch_name: str, base_branch: str):
         """Push branch to remote with upstream tracking."""
-        remote = self.repo.remote()
-        remote.push(refspec=f'{branch_name}:refs/heads/{branch_name}', set_upstream=True)
+        self.push_branches([branch_name])
 
-    def get_commit_messages(self) -> List[str]:
-        """Get commit messages since branching from base."""
-        base_branch = self.repo.active_branch.tracking_branch()
-        if not base_branch:
-            return []
-        commits = list(self.repo.iter_commits(f'{base_branch.name}..HEAD'))
-        return [commit.message.strip() for commit in commits]
+    def push_branches(self, branch_names: List[str]):
+        """Push several branches with upstream tracking in a single `git push`."""
+        with tracer.span('git.push', branch=",".join(branch_names), backend=self.backend.name):
+            self.backend.push([f'{name}:refs/heads/{name}' for name in branch_names], set_upstream=True)
+
+    def branch_tips(self, contains: str = None) -> Dict[str, str]:
+        """Local branch names mapped to their commit SHAs, optionally only
+        those whose history contains the given revision."""
+        args = ['git', 'for-each-ref', '--format=%(refname:short)%00%(objectname)']
+        if contains:
+            args.append(f'--contains={contains}')
+        result = subprocess.run(args + ['refs/heads'], cwd=self.repo_path, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"git for-each-ref failed: {result.stderr.strip()}")
+        return dict(line.split('\0', 1) for line in result.stdout.splitlines() if line)
+
+    def merge_base(self, base_branch: str, head: str = 'HEAD') -> str:
+        """SHA of the commit head forked from base_branch at."""
+        result = subprocess.run(
+            ['git', 'merge-base', base_branch, head],
+            cwd=self.repo_path,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"No common ancestor of '{base_branch}' and '{head}'")
+        return result.stdout.strip()
+
+    def first_parent_commits(self, base_branch: str, head: str) -> List[str]:
+        """SHAs of head's first-parent commits that are not in base, oldest first."""
+        result = subprocess.run(
+            ['git', 'rev-list', '--first-parent', '--reverse', f'{base_branch}..{head}'],
+            cwd=self.repo_path,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"git rev-list failed: {result.stderr.strip()}")
+        return result.stdout.split()
+
+    def get_commit_messages(self, base_branch: str = None, head: str = 'HEAD') -> List[str]:
+        """Get commit messages since branching from base.
+
+        Without an explicit base_branch, the current branch's tracking
+        branch is used.
+        """
+        with tracer.span('git.commit_messages', backend=self.backend.name) as span:
+            base_branch = base_branch or self.backend.tracking_branch()
+            if not base_branch:
+                return []
+            messages = self.backend.commit_messages(f'{base_branch}..{head}')
+            span.set('commits', len(messages))
+            return messages
+
+    def read_blob(self, rev: str, path: str) -> bytes:
+        """Read a file's content at a revision, or None if it does not exist there."""
+        return self.backend.read_blob(rev, path)
+
+    def close(self):
+        """Release backend resources such as long-lived git processes."""
+        self.backend.close()
 
     def get_remote_url(self) -> str:
         """Get the remote URL and convert to HTTPS if needed."""
-        remote_url = self.repo.remotes.origin.url
+        remote_url = self.backend.remote_url('origin')
         if remote_url.startswith('git@github.com:'):
             # Convert SSH URL to HTTPS URL
             remote_url = remote_url.replace('git@github.com:', 'https://github.com/')
@@ -44,13 +291,20 @@ class GitOperations:
             remote_url = remote_url[:-4]
         return remote_url
 
-    def create_pr_url(self, base_branch: str) -> str:
-        """Create the URL for opening a new PR on GitHub."""
+    def create_pr_url(self, base_branch: str, branch_name: str = None,
+                      title: str = None, description: str = None) -> str:
+        """Create the URL for opening a new PR on GitHub, prefilled with title and body if given."""
         remote_url = self.get_remote_url()
-        current_branch = self.repo.active_branch.name
-        return f"{remote_url}/compare/{base_branch}...{current_branch}?expand=1"
+        current_branch = branch_name or self.current_branch
+        pr_url = f"{remote_url}/compare/{base_branch}...{current_branch}?expand=1"
+        if title and description:
+            from urllib.parse import quote
+            pr_url += f"&title={quote(title)}&body={quote(description)}"
+        return pr_url
 
     def open_pr_in_browser(self, base_branch: str):
         """Open the PR creation page in the default browser."""
+        import webbrowser
+
         pr_url = self.create_pr_url(base_branch)
         webbrowser.open(pr_url) 
\ No newline at end of file
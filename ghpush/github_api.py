@@ -0,0 +1,144 @@
+"""Pull request creation through the GitHub REST API."""
+import re
+import subprocess
+import threading
+from typing import Optional, Tuple
+
+from .config import Config, get_setting, use_http2
+from .tracing import tracer
+
+DEFAULT_API_URL = "https://api.github.com"
+
+class GitHubAPIError(RuntimeError):
+    """A GitHub API request failed."""
+
+    def __init__(self, message: str, status_code: int = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+def get_github_token() -> Optional[str]:
+    """Token from the ghpush config or GITHUB_TOKEN, else from `gh auth token`."""
+    token = Config().get_github_token()
+    if token:
+        return token
+    try:
+        result = subprocess.run(['gh', 'auth', 'token'], capture_output=True, text=True)
+    except FileNotFoundError:
+        return None
+    return result.stdout.strip() or None
+
+def parse_repo_slug(remote_url: str) -> Tuple[str, str]:
+    """(owner, repo) from an HTTPS or SSH GitHub remote URL."""
+    match = re.search(r'[:/]([^/:]+)/([^/]+?)(?:\.git)?/?$', remote_url)
+    if not match:
+        raise GitHubAPIError(f"Cannot determine the GitHub repository from remote '{remote_url}'")
+    return match.group(1), match.group(2)
+
+class GitHubClient:
+    """Minimal GitHub REST client on one pooled, keep-alive HTTP session.
+
+    The session is created on first use and shared by every request (and
+    thread), so creating several PRs reuses the same TLS connections.
+    ``api_url`` defaults to the ``github_api_url`` setting, which also
+    allows pointing ghpush at GitHub Enterprise or a local mock server.
+    """
+
+    TIMEOUT = 30.0
+
+    def __init__(self, token: str, api_url: str = None):
+        self.token = token
+        self.api_url = (api_url or get_setting('github_api_url', DEFAULT_API_URL)).rstrip('/')
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        """The shared httpx.Client, created on first use."""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import httpx
+
+                    self._session = httpx.Client(
+                        base_url=self.api_url,
+                        headers={
+                            'Authorization': f'Bearer {self.token}',
+                            'Accept': 'application/vnd.github+json',
+                            'X-GitHub-Api-Version': '2022-11-28',
+                            'User-Agent': 'ghpush',
+                        },
+                        timeout=self.TIMEOUT,
+                        transport=httpx.HTTPTransport(retries=2, http2=use_http2()),
+                    )
+        return self._session
+
+    def _request(self, method: str, path: str, **kwargs):
+        with tracer.span('github.request', method=method, path=path) as span:
+            response = self.session.request(method, path, **kwargs)
+            span.set('status', response.status_code)
+        if response.status_code >= 400:
+            try:
+                payload = response.json()
+            except ValueError:
+                payload = {}
+            details = "; ".join(
+                error.get('message') or error.get('code', '')
+                for error in payload.get('errors', []) if isinstance(error, dict)
+            )
+            message = payload.get('message') or response.reason_phrase
+            raise GitHubAPIError(
+                f"GitHub API {method} {path} failed ({response.status_code}): "
+                f"{message}{f' - {details}' if details else ''}",
+                status_code=response.status_code,
+            )
+        return response.json() if response.content else None
+
+    def find_pull_request(self, owner: str, repo: str, branch: str) -> Optional[dict]:
+        """The open PR whose head is branch, if any."""
+        pulls = self._request('GET', f'/repos/{owner}/{repo}/pulls',
+                              params={'head': f'{owner}:{branch}', 'state': 'open'})
+        return pulls[0] if pulls else None
+
+    def create_pull_request(self, owner: str, repo: str, branch: str, base: str,
+                            title: str, body: str, draft: bool = False) -> dict:
+        return self._request('POST', f'/repos/{owner}/{repo}/pulls', json={
+            'title': title, 'body': body, 'head': branch, 'base': base, 'draft': draft,
+        })
+
+    def update_pull_request(self, owner: str, repo: str, number: int, **fields) -> dict:
+        return self._request('PATCH', f'/repos/{owner}/{repo}/pulls/{number}', json=fields)
+
+    def create_or_update_pull_request(self, owner: str, repo: str, branch: str, base: str,
+                                      title: str, body: str) -> Tuple[dict, bool]:
+        """Open a PR for branch, or update the one that is already open.
+
+        Safe to repeat: running it again for the same branch edits the
+        existing PR in place. Returns the PR and whether it was created.
+        """
+        with tracer.span('github.create_or_update_pr', branch=branch):
+            existing = self.find_pull_request(owner, repo, branch)
+            if existing is None:
+                try:
+                    return self.create_pull_request(owner, repo, branch, base, title, body), True
+                except GitHubAPIError as e:
+                    # Another run created it between our lookup and create
+                    if e.status_code != 422:
+                        raise
+                    existing = self.find_pull_request(owner, repo, branch)
+                    if existing is None:
+                        raise
+            pull = self.update_pull_request(owner, repo, existing['number'],
+                                            title=title, body=body, base=base)
+            return pull, False
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+def publish_pull_request(client: GitHubClient, git_ops, branch: str, base: str,
+                         title: str, body: str) -> Tuple[str, bool]:
+    """Create or update the PR for a pushed branch; returns its URL and whether it is new."""
+    owner, repo = parse_repo_slug(git_ops.get_remote_url())
+    pull, created = client.create_or_update_pull_request(owner, repo, branch, base, title, body)
+    return pull['html_url'], created
@@ -0,0 +1,174 @@
+"""Git hooks that precompute PR content in the background after each commit."""
+import os
+import shlex
+import stat
+import subprocess
+import sys
+from pathlib import Path
+from typing import List
+
+from rich.console import Console
+
+from .config import get_setting
+
+console = Console(stderr=True)
+
+HOOK_NAMES = ('post-commit', 'pre-push')
+BEGIN_MARKER = "# >>> ghpush precompute >>>"
+END_MARKER = "# <<< ghpush precompute <<<"
+
+def hook_script(base: str) -> str:
+    """The lines added to a hook: start ``ghpush hook run`` in the
+    background and return at once, so git never waits for it."""
+    command = " ".join(shlex.quote(part) for part in
+                       [sys.executable, '-m', 'ghpush.cli', '--base', base, 'hook', 'run'])
+    return (f"{BEGIN_MARKER}\n"
+            f"{command} </dev/null >/dev/null 2>&1 &\n"
+            f"{END_MARKER}\n")
+
+def hooks_dir(repo_path: Path = None) -> Path:
+    """Directory git runs the repository's hooks from (honours core.hooksPath)."""
+    repo_path = repo_path or Path.cwd()
+    result = subprocess.run(
+        ['git', 'rev-parse', '--git-path', 'hooks'],
+        cwd=repo_path,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Not a git repository: {repo_path}")
+    return (Path(repo_path) / result.stdout.strip()).resolve()
+
+def _strip_block(text: str) -> str:
+    """text without a previously installed ghpush block."""
+    start = text.find(BEGIN_MARKER)
+    end = text.find(END_MARKER)
+    if start == -1 or end == -1:
+        return text
+    return text[:start] + text[end + len(END_MARKER):].lstrip('\n')
+
+def install_hooks(base: str, repo_path: Path = None) -> List[Path]:
+    """Add the precompute block to the post-commit and pre-push hooks.
+
+    Existing shell hooks keep their content and get the block appended;
+    hooks in other languages are left alone. Reinstalling replaces the
+    block (e.g. to change the base). Returns the hooks written.
+    """
+    directory = hooks_dir(repo_path)
+    directory.mkdir(parents=True, exist_ok=True)
+    installed = []
+    for name in HOOK_NAMES:
+        path = directory / name
+        try:
+            text = _strip_block(path.read_text())
+        except FileNotFoundError:
+            text = "#!/bin/sh\n"
+        first_line = text.split('\n', 1)[0]
+        if not (first_line.startswith('#!') and first_line.rstrip().endswith('sh')):
+            console.print(f"[yellow]Skipping {path}: not a shell script; add `{hook_script(base).splitlines()[1]}` "
+                          f"to it yourself[/]")
+            continue
+        if not text.endswith('\n'):
+            text += '\n'
+        path.write_text(text + hook_script(base))
+        path.chmod(path.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+        installed.append(path)
+    return installed
+
+def uninstall_hooks(repo_path: Path = None) -> List[Path]:
+    """Remove the precompute block, and hooks left with nothing else in
+    them. Returns the hooks changed."""
+    directory = hooks_dir(repo_path)
+    removed = []
+    for name in HOOK_NAMES:
+        path = directory / name
+        try:
+            text = path.read_text()
+        except FileNotFoundError:
+            continue
+        stripped = _strip_block(text)
+        if stripped == text:
+            continue
+        if stripped.strip() in ("", "#!/bin/sh"):
+            path.unlink()
+        else:
+            path.write_text(stripped)
+        removed.append(path)
+    return removed
+
+def _detach():
+    """Leave the terminal's session and drop to a low priority."""
+    if hasattr(os, 'setsid'):
+        try:
+            os.setsid()
+        except OSError:
+            pass
+    if hasattr(os, 'nice'):
+        try:
+            os.nice(get_setting('hook_nice', 10))
+        except OSError:
+            pass
+
+def precompute(base: str, repo_path: Path = None) -> bool:
+    """Summarize the current branch against base and store the result
+    under the HEAD commit for the next ``ghpush`` to pick up.
+
+    Does nothing (and returns False) in basic mode, on the base branch or
+    a detached HEAD, with uncommitted changes, or when the commit is
+    already summarized or being summarized.
+    """
+    from .branch_state import BranchSummaryStore, PrecomputedSummaryStore
+    from .cli import find_previous_summary, summarize_branch
+    from .diff_analyzer import DiffAnalyzer
+    from .git_operations import GitOperations
+    from .llm_providers import load_providers
+
+    if not load_providers():
+        return False
+    git_ops = GitOperations(repo_path)
+    store = PrecomputedSummaryStore()
+    try:
+        try:
+            branch = git_ops.current_branch
+        except TypeError:
+            # Detached HEAD
+            return False
+        head_sha = git_ops.head_sha()
+        if branch == base or git_ops.has_uncommitted_changes():
+            return False
+        published = BranchSummaryStore().load(git_ops.toplevel, branch)
+        if published and published.get('head_sha') == head_sha and published.get('base') == base:
+            return False
+        if store.load(git_ops.toplevel, head_sha) or not store.claim(git_ops.toplevel, head_sha):
+            return False
+        try:
+            base_sha = git_ops.head_sha(base)
+            previous = find_previous_summary(git_ops, branch, base) if get_setting('incremental', True) else None
+            since = previous['head_sha'] if previous else base
+            file_stats = git_ops.get_diff_stats(since)
+            commit_messages = git_ops.get_commit_messages(since) if previous else git_ops.get_commit_messages()
+            # A newer commit's hook will do the work
+            git_ops.refresh()
+            if git_ops.head_sha() != head_sha:
+                return False
+            summary = summarize_branch(git_ops, DiffAnalyzer(path_filter=git_ops.path_filter), base,
+                                       previous, file_stats, commit_messages, fallback=False)
+            if not summary:
+                return False
+            store.save(git_ops.toplevel, head_sha, branch, base, base_sha, *summary[:2])
+            return True
+        finally:
+            store.release(git_ops.toplevel, head_sha)
+    finally:
+        git_ops.close()
+
+def run_hook(base: str) -> bool:
+    """Entry point of the installed hooks."""
+    if not get_setting('precompute', True):
+        return False
+    _detach()
+    try:
+        return precompute(base)
+    except Exception:
+        # Nobody is watching; ghpush will simply compute the summary itself
+        return False
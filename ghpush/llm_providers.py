@@ -0,0 +1,276 @@
+"""OpenAI-compatible LLM providers, latency tracking and routing."""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .config import Config, atomic_write_json, get_openai_api_key, get_setting, use_http2
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+class Provider:
+    """One OpenAI-compatible chat completions endpoint.
+
+    ``base_url`` may point at OpenAI (the default), a proxy, or a local
+    llama.cpp / Ollama / vLLM server. ``models`` optionally maps a request
+    purpose ('summary', 'map', 'reduce', 'update') to a different model,
+    e.g. a smaller one for per-chunk summaries.
+    """
+
+    def __init__(self, name: str, model: str = DEFAULT_MODEL, base_url: str = None,
+                 api_key: str = None, models: Dict[str, str] = None, timeout: float = None):
+        self.name = name
+        self.model = model
+        self.base_url = base_url
+        self.api_key = api_key
+        self.models = models or {}
+        self.timeout = timeout
+        self._client = None
+        self._lock = threading.Lock()
+
+    def model_for(self, purpose: str) -> str:
+        return self.models.get(purpose, self.model)
+
+    @property
+    def client(self):
+        """OpenAI client for this endpoint, created on first use."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from openai import OpenAI
+
+                    kwargs = {}
+                    if self.timeout:
+                        kwargs['timeout'] = self.timeout
+                    if use_http2():
+                        import httpx
+
+                        # One multiplexed connection per endpoint instead of one per request
+                        kwargs['http_client'] = httpx.Client(http2=True, follow_redirects=True)
+                    # Local servers usually ignore the key, but the client requires one
+                    # Retries are handled by AISummarizer so backoff is applied once
+                    self._client = OpenAI(api_key=self.api_key or "not-needed", base_url=self.base_url,
+                                          max_retries=0, **kwargs)
+        return self._client
+
+    def __repr__(self) -> str:
+        return f"Provider({self.name!r}, model={self.model!r}, base_url={self.base_url!r})"
+
+def load_providers() -> List[Provider]:
+    """Providers from the ``providers`` setting, else OpenAI via OPENAI_API_KEY.
+
+    Each entry in ``providers`` (a list in ``~/.ghpush/config.json``, or
+    JSON in ``GHPUSH_PROVIDERS``) has a ``name`` and optionally
+    ``base_url``, ``model``, ``models``, ``timeout`` and ``api_key`` or
+    ``api_key_env`` (the variable to read the key from). Entries for
+    hosted endpoints without a key are skipped.
+    """
+    model = get_setting('model', DEFAULT_MODEL)
+    entries = get_setting('providers', None)
+    if isinstance(entries, str):
+        entries = json.loads(entries)
+    if not entries:
+        api_key = get_openai_api_key()
+        return [Provider('openai', model=model, api_key=api_key)] if api_key else []
+
+    providers = []
+    for index, entry in enumerate(entries):
+        api_key = entry.get('api_key')
+        if not api_key and entry.get('api_key_env'):
+            api_key = os.getenv(entry['api_key_env'])
+        if not api_key and not entry.get('base_url'):
+            api_key = get_openai_api_key()
+            if not api_key:
+                continue
+        providers.append(Provider(
+            name=entry.get('name') or f"provider{index}",
+            model=entry.get('model', model),
+            base_url=entry.get('base_url'),
+            api_key=api_key,
+            models=entry.get('models'),
+            timeout=entry.get('timeout'),
+        ))
+    return providers
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class LatencyStats:
+    """Per-provider response latencies, shared across runs via ``~/.ghpush``.
+
+    Latency is time to the first token for streamed requests and to the
+    full response otherwise, i.e. how long until the provider "answered".
+    The last ``MAX_SAMPLES`` successes, the current run of consecutive
+    failures and the provider's circuit breaker state are kept per provider.
+    """
+    MAX_SAMPLES = 100
+    MIN_SAMPLES = 5
+
+    def __init__(self, path: Path = None):
+        self.path = path or Config().config_dir / "provider_stats.json"
+        self._lock = threading.Lock()
+        self.data = self._load()
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def reload(self):
+        """Re-read the file for what other runs recorded since."""
+        with self._lock:
+            self.data = self._load()
+
+    def record_success(self, name: str, seconds: float = None):
+        with self._lock:
+            self._update(name, latency=None if seconds is None else round(seconds, 4),
+                         failures=0, opened_at=0, probe_at=0)
+
+    def record_failure(self, name: str, open_circuit_after: int = 3) -> bool:
+        """Count a failure; the provider's circuit opens (again) once
+        open_circuit_after consecutive failures have been seen.
+
+        Returns whether this failure opened the circuit.
+        """
+        with self._lock:
+            now = time.time()
+            failures = self._load().get(name, {}).get('failures', 0) + 1
+            fields = {'failures': failures, 'last_failure': now}
+            opened = failures >= open_circuit_after
+            if opened:
+                fields.update(opened_at=now, probe_at=0)
+            self._update(name, **fields)
+            return opened
+
+    def claim_probe(self, name: str, window: float) -> bool:
+        """Record that this process sends the half-open trial request, unless
+        another run already did within window seconds."""
+        with self._lock:
+            entry = self._load().get(name, {})
+            if time.time() - entry.get('probe_at', 0) < window:
+                return False
+            self._update(name, probe_at=time.time())
+            return True
+
+    def percentile(self, name: str, fraction: float) -> Optional[float]:
+        """Latency percentile in seconds, or None without enough samples."""
+        samples = self.data.get(name, {}).get('latencies', [])
+        if len(samples) < self.MIN_SAMPLES:
+            return None
+        return _percentile(samples, fraction)
+
+    def _update(self, name: str, latency: float = None, **fields):
+        """Apply one result on top of the file on disk (other runs may have
+        written it since we loaded it) and replace the file atomically."""
+        self.data = self._load()
+        entry = self.data.setdefault(name, {'latencies': [], 'failures': 0, 'last_failure': 0,
+                                            'opened_at': 0, 'probe_at': 0})
+        if latency is not None:
+            entry['latencies'] = (entry['latencies'] + [latency])[-self.MAX_SAMPLES:]
+        entry.update(fields)
+        try:
+            atomic_write_json(self.path, self.data)
+        except OSError:
+            pass
+
+class CircuitOpenError(RuntimeError):
+    """Every provider's circuit is open, so no request was attempted."""
+
+class CircuitBreaker:
+    """Per-provider circuit breaker, with its state shared across runs.
+
+    After ``threshold`` consecutive failed requests a provider's circuit
+    opens and it is skipped outright. Only outages count as failures (see
+    ``AISummarizer``): rate limiting means the provider is up. Once
+    ``reset_after`` seconds have passed the circuit is half-open: a single
+    trial request (across all concurrent ghpush runs) is let through, which
+    closes the circuit on success and re-opens it on failure.
+    """
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, stats: LatencyStats, threshold: int = None, reset_after: float = None):
+        self.stats = stats
+        self.threshold = threshold or get_setting('circuit_failure_threshold', 3)
+        self.reset_after = reset_after or get_setting('circuit_reset_s', 60)
+
+    def state(self, name: str) -> str:
+        opened_at = self.stats.data.get(name, {}).get('opened_at', 0)
+        if not opened_at:
+            return self.CLOSED
+        if time.time() - opened_at < self.reset_after:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def allow(self, name: str) -> bool:
+        """Whether a request to the provider may be sent now."""
+        state = self.state(name)
+        if state == self.CLOSED:
+            return True
+        if state == self.OPEN:
+            return False
+        return self.stats.claim_probe(name, self.reset_after)
+
+    def record_success(self, name: str, seconds: float = None):
+        self.stats.record_success(name, seconds)
+
+    def record_failure(self, name: str) -> bool:
+        return self.stats.record_failure(name, self.threshold)
+
+class ProviderRouter:
+    """Orders the providers whose circuit allows a request, fastest first."""
+
+    def __init__(self, providers: List[Provider], stats: LatencyStats = None):
+        self.providers = providers
+        self.stats = stats if stats is not None else LatencyStats()
+        self.breaker = CircuitBreaker(self.stats)
+        # Circuits opened by this router's own failures
+        self._opened = set()
+
+    def ordered(self) -> List[Provider]:
+        """Available providers by median latency; providers without enough
+        samples yet follow in their configured order.
+
+        Raises CircuitOpenError when every provider's circuit is open.
+        """
+        self.stats.reload()
+
+        def key(item):
+            index, provider = item
+            median = self.stats.percentile(provider.name, 0.5)
+            return (float('inf') if median is None else median, index)
+        available = [item for item in enumerate(self.providers) if self.breaker.allow(item[1].name)]
+        if not available:
+            names = ", ".join(provider.name for provider in self.providers)
+            raise CircuitOpenError(f"circuit open for {names} after repeated failures; "
+                                   f"retrying in up to {self.breaker.reset_after:.0f}s")
+        return [provider for _, provider in sorted(available, key=key)]
+
+    def closed(self, providers: List[Provider]) -> List[Provider]:
+        """providers, minus those whose circuit another run opened since they
+        were ordered. Circuits this run's own failed requests opened don't
+        stop requests already in progress from retrying."""
+        self.stats.reload()
+        return [provider for provider in providers
+                if provider.name in self._opened
+                or self.breaker.state(provider.name) != CircuitBreaker.OPEN]
+
+    def record_success(self, provider: Provider, seconds: float = None):
+        self._opened.discard(provider.name)
+        self.breaker.record_success(provider.name, seconds)
+
+    def record_failure(self, provider: Provider):
+        if self.breaker.record_failure(provider.name):
+            self._opened.add(provider.name)
+
+    def hedge_delay(self, provider: Provider) -> float:
+        """Seconds to wait for provider before hedging: its p95 latency."""
+        p95 = self.stats.percentile(provider.name, 0.95)
+        if p95 is None:
+            return get_setting('hedge_delay_ms', 3000) / 1000
+        return p95
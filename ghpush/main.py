@@ -1,15 +1,22 @@
-import os
+"""Programmatic PR creation for the checked-out branch."""
+from pathlib import Path
 
-def create_pr(summarizer, diff_text, commit_messages):
-    title, description = summarizer.generate_summary(diff_text, commit_messages)
-    
-    if title and description:
-        # Escape quotes in title and description to prevent command injection
-        title = title.replace('"', '\\"')
-        description = description.replace('"', '\\"')
-        
-        # Create PR with generated title and description
-        os.system(f'gh pr create --title "{title}" --body "{description}"')
-    else:
-        # Fallback to basic PR creation
-        os.system('gh pr create') 
\ No newline at end of file
+from .git_operations import GitOperations
+from .github_api import GitHubAPIError, GitHubClient, get_github_token, publish_pull_request
+
+def create_pr(title: str, description: str, base: str = 'main', repo_path: Path = None) -> str:
+    """Create (or update) the PR for the current branch and return its URL.
+
+    The branch must already be pushed.
+    """
+    token = get_github_token()
+    if not token:
+        raise GitHubAPIError("No GitHub token: set GITHUB_TOKEN or run `gh auth login`")
+    git_ops = GitOperations(repo_path)
+    client = GitHubClient(token)
+    try:
+        pr_url, _ = publish_pull_request(client, git_ops, git_ops.current_branch, base, title, description)
+        return pr_url
+    finally:
+        client.close()
+        git_ops.close()
@@ -0,0 +1,152 @@
+"""Classify changed paths as generated or vendored before reading their diffs."""
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, List, Tuple
+
+from .config import mtime_ns
+
+# Files whose patches say little about a change: lockfiles, minified and
+# generated code, snapshots and vendored dependencies (gitignore syntax).
+# Build output is only excluded at the top level; src/build/ may be source
+DEFAULT_PATTERNS = (
+    'poetry.lock', 'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml', 'Cargo.lock',
+    'Gemfile.lock', 'composer.lock', 'go.sum', 'Pipfile.lock', 'uv.lock',
+    '*.min.js', '*.min.css', '*.map', '*.snap', '__snapshots__/',
+    '*_pb2.py', '*_pb2_grpc.py', '*.pb.go', '*.generated.*',
+    'vendor/', 'node_modules/', '/dist/', '/build/',
+)
+
+GENERATED_ATTRIBUTES = ('linguist-generated', 'linguist-vendored')
+
+def glob_to_regex(pattern: str) -> str:
+    """Translate one gitignore-style pattern into a regex over repo-relative paths."""
+    directory = pattern.endswith('/')
+    pattern = pattern.rstrip('/')
+    # Without a leading or inner slash the pattern matches at any depth
+    anchored = '/' in pattern
+    pattern = pattern.lstrip('/')
+
+    out = []
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if pattern.startswith('**/', index):
+            out.append('(?:.*/)?')
+            index += 3
+            continue
+        if pattern.startswith('**', index):
+            out.append('.*')
+            index += 2
+            continue
+        if char == '*':
+            out.append('[^/]*')
+        elif char == '?':
+            out.append('[^/]')
+        elif char == '[':
+            end = pattern.find(']', index + 1)
+            if end == -1:
+                out.append(re.escape(char))
+            else:
+                body = pattern[index + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append(f'[{body}]')
+                index = end
+        elif char == '\\' and index + 1 < len(pattern):
+            index += 1
+            out.append(re.escape(pattern[index]))
+        else:
+            out.append(re.escape(char))
+        index += 1
+
+    regex = ''.join(out)
+    if not anchored:
+        regex = '(?:.*/)?' + regex
+    # A match on a directory covers everything below it
+    return regex + ('/.*' if directory else '(?:/.*)?')
+
+def parse_gitattributes(text: str) -> List[Tuple[str, bool]]:
+    """(pattern, excluded) rules from linguist-generated/-vendored attributes."""
+    rules = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        pattern, *attributes = line.split()
+        for attribute in attributes:
+            name, _, value = attribute.lstrip('-!').partition('=')
+            if name not in GENERATED_ATTRIBUTES:
+                continue
+            unset = attribute[0] in '-!' or value.lower() in ('false', '0')
+            rules.append((pattern, not unset))
+    return rules
+
+def parse_ignore_file(text: str) -> List[Tuple[str, bool]]:
+    """(pattern, excluded) rules from a gitignore-style file; ``!`` re-includes."""
+    rules = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line or line.startswith('#'):
+            continue
+        if line.startswith('!'):
+            rules.append((line[1:], False))
+        else:
+            rules.append((line[1:] if line.startswith('\\') else line, True))
+    return rules
+
+class PathFilter:
+    """One precompiled matcher over every exclusion rule.
+
+    Rules are (pattern, excluded) pairs in increasing precedence, as in
+    gitignore where the last matching rule wins. They are compiled into a
+    single alternation with the highest-precedence rule first, so one
+    ``fullmatch`` per path decides it and the winning group says whether
+    the path is excluded.
+    """
+
+    def __init__(self, rules: Iterable[Tuple[str, bool]]):
+        rules = list(rules)
+        self.rules = rules
+        self._excluded_groups = set()
+        alternatives = []
+        for index in range(len(rules) - 1, -1, -1):
+            pattern, excluded = rules[index]
+            group = f'r{index}'
+            alternatives.append(f'(?P<{group}>{glob_to_regex(pattern)})')
+            if excluded:
+                self._excluded_groups.add(group)
+        self._regex = re.compile('|'.join(alternatives), re.DOTALL) if alternatives else None
+
+    @classmethod
+    def for_repo(cls, repo_path: Path) -> 'PathFilter':
+        """Built-in defaults, then the repo's .gitattributes, then .ghpushignore."""
+        repo_path = Path(repo_path)
+        return _cached_filter(
+            str(repo_path.resolve()),
+            mtime_ns(repo_path / '.gitattributes'),
+            mtime_ns(repo_path / '.ghpushignore'),
+        )
+
+    def excluded(self, path: str) -> bool:
+        """Whether path is generated, vendored or ignored for summaries."""
+        if self._regex is None:
+            return False
+        match = self._regex.fullmatch(path)
+        return match is not None and match.lastgroup in self._excluded_groups
+
+def _read(path: Path) -> str:
+    try:
+        return path.read_text(encoding='utf-8', errors='replace')
+    except OSError:
+        return ''
+
+@lru_cache(maxsize=16)
+def _cached_filter(repo_path: str, attributes_mtime: int, ignore_mtime: int) -> PathFilter:
+    root = Path(repo_path)
+    rules = [(pattern, True) for pattern in DEFAULT_PATTERNS]
+    rules += parse_gitattributes(_read(root / '.gitattributes'))
+    rules += parse_ignore_file(_read(root / '.ghpushignore'))
+    return PathFilter(rules)
+
+DEFAULT_FILTER = PathFilter((pattern, True) for pattern in DEFAULT_PATTERNS)
@@ -0,0 +1,74 @@
+"""Minimal dependency-aware task runner for the CLI pipeline."""
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from .tracing import instrument
+
+class Task:
+    """A unit of work that runs once all of its dependencies have finished."""
+    __slots__ = ('name', 'func', 'deps', 'description')
+
+    def __init__(self, name: str, func: Callable, deps: Iterable[str] = (), description: str = None):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.description = description or name
+
+class TaskGraph:
+    """Run tasks on a thread pool as soon as their dependencies are satisfied.
+
+    Each task function is called with the results of its dependencies as
+    keyword arguments. The first failure stops new tasks from being
+    scheduled; tasks already running are allowed to finish and the error
+    is re-raised from ``run``.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self.tasks: Dict[str, Task] = {}
+
+    def add(self, name: str, func: Callable, deps: Iterable[str] = (), description: str = None) -> Task:
+        """Register a task; dependencies must already be registered."""
+        task = Task(name, func, deps, description)
+        for dep in task.deps:
+            if dep not in self.tasks:
+                raise ValueError(f"Task '{name}' depends on unknown task '{dep}'")
+        self.tasks[name] = task
+        return task
+
+    def run(self, on_start: Optional[Callable[[Task], None]] = None,
+            on_finish: Optional[Callable[[Task, bool], None]] = None) -> Dict[str, Any]:
+        """Execute the graph and return a mapping of task name to result."""
+        results: Dict[str, Any] = {}
+        waiting = dict(self.tasks)
+        running = {}
+        error: Optional[BaseException] = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while waiting or running:
+                if error is None:
+                    for name, task in list(waiting.items()):
+                        if all(dep in results for dep in task.deps):
+                            del waiting[name]
+                            if on_start:
+                                on_start(task)
+                            kwargs = {dep: results[dep] for dep in task.deps}
+                            func = instrument(f"task.{task.name}", task.func)
+                            running[pool.submit(func, **kwargs)] = task
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    exc = future.exception()
+                    if on_finish:
+                        on_finish(task, exc is None)
+                    if exc is None:
+                        results[task.name] = future.result()
+                    elif error is None:
+                        error = exc
+
+        if error is not None:
+            raise error
+        return results
@@ -0,0 +1,220 @@
+"""Symbol-level changes (functions, classes, signatures) between two versions of a file."""
+import ast
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .context_packer import count_tokens
+from .diff_summary import file_extension
+from .tracing import tracer
+
+# Larger files are left to the line-based diff
+MAX_SOURCE_BYTES = 512 * 1024
+
+class Symbol:
+    """A function, method or class as found in one version of a file."""
+    __slots__ = ('kind', 'signature', 'fingerprint')
+
+    def __init__(self, kind: str, signature: str, fingerprint: int):
+        self.kind = kind
+        self.signature = signature
+        # Equal fingerprints mean an unchanged definition (ignoring positions)
+        self.fingerprint = fingerprint
+
+class SymbolChange:
+    """One added, removed or changed symbol.
+
+    ``change`` is 'added', 'removed', 'signature' (the parameters, return
+    annotation or base classes changed) or 'modified' (only the body did).
+    """
+    __slots__ = ('name', 'kind', 'change', 'old_signature', 'new_signature')
+
+    def __init__(self, name: str, kind: str, change: str,
+                 old_signature: str = None, new_signature: str = None):
+        self.name = name
+        self.kind = kind
+        self.change = change
+        self.old_signature = old_signature
+        self.new_signature = new_signature
+
+    def describe(self) -> str:
+        if self.change == 'added':
+            return f"added {self.kind} `{self.name}{self.new_signature}`"
+        if self.change == 'removed':
+            return f"removed {self.kind} `{self.name}`"
+        if self.change == 'signature':
+            what = "bases" if self.kind == 'class' else "signature"
+            return (f"changed {what} of {self.kind} `{self.name}`: "
+                    f"`{self.old_signature or '()'}` → `{self.new_signature or '()'}`")
+        return f"modified {self.kind} `{self.name}`"
+
+# Language hooks: file extension -> function returning a file's symbols by
+# qualified name (in source order), or None if the source can't be parsed
+Extractor = Callable[[str], Optional[Dict[str, Symbol]]]
+_EXTRACTORS: Dict[str, Extractor] = {}
+
+def register_language(extensions: Iterable[str], extractor: Extractor):
+    """Use extractor for files with any of the given extensions (e.g. '.py')."""
+    for extension in extensions:
+        _EXTRACTORS[extension] = extractor
+
+def extractor_for(path: str) -> Optional[Extractor]:
+    return _EXTRACTORS.get(file_extension(path))
+
+def _unparse(node) -> str:
+    # ast.unparse needs Python 3.9; older versions show names only
+    unparse = getattr(ast, 'unparse', None)
+    return unparse(node) if unparse is not None else ''
+
+def _python_arguments(args: ast.arguments) -> str:
+    def param(arg: ast.arg, default=None) -> str:
+        text = arg.arg
+        if arg.annotation is not None and _unparse(arg.annotation):
+            text += f": {_unparse(arg.annotation)}"
+        if default is not None:
+            # PEP 8 spacing: "x=1" but "x: int = 1"
+            separator = " = " if ": " in text else "="
+            text += f"{separator}{_unparse(default) or '...'}"
+        return text
+
+    positional = getattr(args, 'posonlyargs', []) + args.args
+    defaults = [None] * (len(positional) - len(args.defaults)) + list(args.defaults)
+    params = [param(arg, default) for arg, default in zip(positional, defaults)]
+    if getattr(args, 'posonlyargs', None):
+        params.insert(len(args.posonlyargs), '/')
+    if args.vararg is not None:
+        params.append('*' + param(args.vararg))
+    elif args.kwonlyargs:
+        params.append('*')
+    params.extend(param(arg, default) for arg, default in zip(args.kwonlyargs, args.kw_defaults))
+    if args.kwarg is not None:
+        params.append('**' + param(args.kwarg))
+    return ", ".join(params)
+
+def python_symbols(source: str) -> Optional[Dict[str, Symbol]]:
+    """Top-level functions and classes of a Python module, plus methods
+    and classes nested in classes (as ``Class.method``)."""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+
+    symbols: Dict[str, Symbol] = {}
+
+    def visit(body: List[ast.stmt], prefix: str, in_class: bool):
+        for node in body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                signature = f"({_python_arguments(node.args)})"
+                if node.returns is not None and _unparse(node.returns):
+                    signature += f" -> {_unparse(node.returns)}"
+                symbols[prefix + node.name] = Symbol(
+                    'method' if in_class else 'function', signature, hash(ast.dump(node)))
+            elif isinstance(node, ast.ClassDef):
+                bases = ", ".join(_unparse(base) for base in node.bases + node.keywords)
+                # Methods are compared on their own; the class itself changes
+                # with its bases, decorators and other statements
+                own = node.decorator_list + [
+                    statement for statement in node.body
+                    if not isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+                ]
+                symbols[prefix + node.name] = Symbol(
+                    'class', f"({bases})" if bases else "", hash(tuple(ast.dump(part) for part in own)))
+                visit(node.body, f"{prefix}{node.name}.", True)
+
+    visit(tree.body, "", False)
+    return symbols
+
+register_language(('.py', '.pyi'), python_symbols)
+
+def diff_symbols(old: Dict[str, Symbol], new: Dict[str, Symbol]) -> List[SymbolChange]:
+    """Changes from old to new, in the new file's order, removals last.
+
+    Members of an added or removed class are not listed separately.
+    """
+    changes = []
+    for name, symbol in new.items():
+        before = old.get(name)
+        if before is None:
+            changes.append(SymbolChange(name, symbol.kind, 'added', new_signature=symbol.signature))
+        elif before.signature != symbol.signature:
+            changes.append(SymbolChange(name, symbol.kind, 'signature',
+                                        before.signature, symbol.signature))
+        elif before.fingerprint != symbol.fingerprint:
+            changes.append(SymbolChange(name, symbol.kind, 'modified'))
+    changes.extend(SymbolChange(name, symbol.kind, 'removed', old_signature=symbol.signature)
+                   for name, symbol in old.items() if name not in new)
+
+    whole = {change.name for change in changes if change.kind == 'class'
+             and change.change in ('added', 'removed')}
+    return [change for change in changes
+            if not any(change.name.startswith(name + '.') for name in whole)]
+
+class StructuralDiff:
+    """Symbol-level changes per file, for files with a language hook."""
+
+    def __init__(self):
+        self.files: Dict[str, List[SymbolChange]] = {}
+
+    def get(self, path: str) -> List[SymbolChange]:
+        return self.files.get(path, [])
+
+    def __len__(self) -> int:
+        return sum(len(changes) for changes in self.files.values())
+
+    def render(self, max_tokens: int, model: str = "gpt-4o-mini") -> str:
+        """Compact change list for the prompt, cut off at max_tokens."""
+        lines = []
+        used = 0
+        remaining = len(self)
+        for path, changes in self.files.items():
+            for index, change in enumerate(changes):
+                line = (f"{path}\n" if index == 0 else "") + f"  - {change.describe()}\n"
+                tokens = count_tokens(line, model)
+                if used + tokens > max_tokens - 16:
+                    lines.append(f"- ... and {remaining} more changes\n")
+                    return "".join(lines)
+                lines.append(line)
+                used += tokens
+                remaining -= 1
+        return "".join(lines)
+
+def _symbols(extractor: Extractor, content: Optional[bytes]) -> Optional[Dict[str, Symbol]]:
+    """Symbols in content; none if the file doesn't exist, None if it
+    can't be compared (too large, binary or unparseable)."""
+    if content is None:
+        return {}
+    if len(content) > MAX_SOURCE_BYTES or b'\0' in content[:8000]:
+        return None
+    return extractor(content.decode('utf-8', errors='replace'))
+
+def structural_diff(git_ops, base_branch: str, file_stats: Iterable, head: str = None,
+                    exclude: Callable[[str], bool] = None) -> StructuralDiff:
+    """Compare the old and new version of every changed file with a language hook.
+
+    Matches ``GitOperations.iter_diff_lines``: without head the working
+    tree is compared with base_branch, otherwise head with the commit it
+    forked from base_branch at.
+    """
+    result = StructuralDiff()
+    stats = [stat for stat in file_stats if not stat.binary and extractor_for(stat.path)
+             and not (exclude is not None and exclude(stat.path))]
+    if not stats:
+        return result
+    with tracer.span('semantic_diff', files=len(stats)) as span:
+        old_rev = git_ops.merge_base(base_branch, head) if head else base_branch
+        for stat in stats:
+            extractor = extractor_for(stat.path)
+            old = _symbols(extractor, git_ops.read_blob(old_rev, stat.old_path or stat.path))
+            if head:
+                new_content = git_ops.read_blob(head, stat.path)
+            else:
+                try:
+                    new_content = (git_ops.toplevel / stat.path).read_bytes()
+                except OSError:
+                    new_content = None
+            new = _symbols(extractor, new_content)
+            if old is None or new is None:
+                continue
+            changes = diff_symbols(old, new)
+            if changes:
+                result.files[stat.path] = changes
+        span.set('changes', len(result))
+    return result
@@ -0,0 +1,71 @@
+"""Stacked branches: find the chain and publish every layer at once."""
+from pathlib import Path
+from typing import IO, List
+
+from .batch import BatchItem, BatchRunner, console
+from .config import get_setting
+from .git_operations import GitOperations
+
+def find_stack(git_ops: GitOperations, base: str, top: str = None) -> List[BatchItem]:
+    """The local branches stacked between base and top, bottom first.
+
+    Each layer's base is the branch below it (the lowest layer's is
+    base). Without top the stack is found from the current branch, and
+    continues upward as long as every local branch built on it lies on a
+    single line of history. Layers are the branches on top's first-parent
+    history; of several branches pointing at the same commit only one is
+    used.
+    """
+    tips = git_ops.branch_tips()
+    if top is None:
+        top = _highest_descendant(git_ops, base, git_ops.current_branch, tips)
+    elif top not in tips:
+        raise ValueError(f"'{top}' is not a local branch")
+
+    commits = git_ops.first_parent_commits(base, top)
+    if not commits:
+        raise ValueError(f"'{top}' has no commits on top of '{base}'")
+    names = {}
+    for name, sha in sorted(tips.items()):
+        names.setdefault(sha, name)
+    names[tips[top]] = top
+
+    repo = Path(git_ops.repo_path).resolve()
+    layers = []
+    parent = base
+    for sha in commits:
+        name = names.get(sha)
+        if name is not None:
+            layers.append(BatchItem(repo=repo, branch=name, base=parent))
+            parent = name
+    return layers
+
+def _highest_descendant(git_ops: GitOperations, base: str, branch: str, tips) -> str:
+    """The topmost branch stacked on branch, or branch itself if there is
+    none or the branches built on it fork."""
+    descendants = {name: sha for name, sha in git_ops.branch_tips(contains=branch).items()
+                   if sha != tips[branch]}
+    if not descendants:
+        return branch
+    lines = {name: git_ops.first_parent_commits(base, name) for name in descendants}
+    highest = max(lines, key=lambda name: len(lines[name]))
+    if not set(descendants.values()) <= set(lines[highest]):
+        console.print(f"[yellow]Branches built on '{branch}' fork; stacking up to '{branch}' only[/]")
+        return branch
+    return highest
+
+def run_stack(base: str, output: IO, top: str = None, push: bool = True, repo_path: Path = None) -> int:
+    """Summarize every layer of the stack concurrently, push all of them with
+    one `git push` and create or update each PR against the layer below.
+
+    Returns the number of failed layers.
+    """
+    git_ops = GitOperations(repo_path)
+    try:
+        layers = find_stack(git_ops, base, top)
+    finally:
+        git_ops.close()
+    workers = max(len(layers), get_setting('batch_workers', 4))
+    runner = BatchRunner(workers=workers, push_workers=workers, push=push, push_together=True)
+    console.print(f"[bold blue]GHPush stack[/] - {' → '.join([base] + [layer.branch for layer in layers])}")
+    return runner.run(layers, output)
@@ -0,0 +1,186 @@
+"""Lightweight spans, counters and profiling for attributing ghpush latency."""
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+class Span:
+    """A timed operation with attributes; counters accumulate with ``add``."""
+    __slots__ = ('name', 'start_ns', 'end_ns', 'thread_id', 'attributes')
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.name = name
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns = None
+        self.thread_id = threading.get_ident()
+        self.attributes = attributes
+
+    def set(self, key: str, value: Any):
+        """Set an attribute on the span."""
+        self.attributes[key] = value
+
+    def add(self, key: str, amount: int = 1):
+        """Increment a numeric attribute on the span."""
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+class _NoopSpan:
+    """Stand-in returned while tracing is disabled."""
+    __slots__ = ()
+
+    def set(self, key: str, value: Any):
+        pass
+
+    def add(self, key: str, amount: int = 1):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+class Tracer:
+    """Collects spans from every thread and exports them as a Chrome trace.
+
+    Disabled by default, in which case ``span`` costs one attribute check.
+    While enabled, an audit hook counts every subprocess spawned (including
+    GitPython's) against the innermost span of the spawning thread.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.spans: List[Span] = []
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._origin_ns = time.perf_counter_ns()
+        self._hook_installed = False
+
+    def enable(self):
+        """Start recording spans."""
+        self.enabled = True
+        self._origin_ns = time.perf_counter_ns()
+        if not self._hook_installed:
+            sys.addaudithook(self._audit)
+            self._hook_installed = True
+
+    def _audit(self, event: str, args):
+        if event == 'subprocess.Popen' and self.enabled:
+            self.count('subprocesses')
+            stack = getattr(self._local, 'stack', None)
+            if stack:
+                stack[-1].add('subprocesses')
+
+    def count(self, key: str, amount: int = 1):
+        """Increment a run-wide counter."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Time the enclosed block as a span named name."""
+        if not self.enabled:
+            yield NOOP_SPAN
+            return
+        span = Span(name, attributes)
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set('error', f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            span.end_ns = time.perf_counter_ns()
+            # Not necessarily the top: spans held open by generators can
+            # interleave with their consumer's spans
+            stack.remove(span)
+            with self._lock:
+                self.spans.append(span)
+
+    def to_chrome_trace(self) -> dict:
+        """Spans as Chrome trace events (chrome://tracing, Perfetto)."""
+        pid = os.getpid()
+        events = [{
+            'name': span.name,
+            'ph': 'X',
+            'ts': (span.start_ns - self._origin_ns) / 1000,
+            'dur': (span.end_ns - span.start_ns) / 1000,
+            'pid': pid,
+            'tid': span.thread_id,
+            'args': {key: _jsonable(value) for key, value in span.attributes.items()},
+        } for span in sorted(self.spans, key=lambda span: span.start_ns)]
+        return {
+            'traceEvents': events,
+            'displayTimeUnit': 'ms',
+            'otherData': {'counters': dict(self.counters)},
+        }
+
+    def write_chrome_trace(self, path: Path):
+        """Write the Chrome trace JSON to path."""
+        with open(path, 'w') as f:
+            json.dump(self.to_chrome_trace(), f, indent=1)
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+class ThreadProfiler:
+    """cProfile across threads: each instrumented task gets its own profile,
+    and all of them are merged into one report at the end."""
+
+    def __init__(self):
+        import cProfile
+
+        self._cprofile = cProfile
+        self.profiles = []
+        self._lock = threading.Lock()
+        self.main = cProfile.Profile()
+
+    def wrap(self, func: Callable) -> Callable:
+        """Profile func when it runs (typically on a worker thread)."""
+        def profiled(*args, **kwargs):
+            profile = self._cprofile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Newer Pythons allow only one active profiler at a time
+                return func(*args, **kwargs)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.disable()
+                with self._lock:
+                    self.profiles.append(profile)
+        return profiled
+
+    def print_hotspots(self, stream=None, limit: int = 25):
+        """Print the top functions by cumulative time across all threads."""
+        import pstats
+
+        stats = pstats.Stats(self.main, stream=stream or sys.stdout)
+        for profile in self.profiles:
+            stats.add(profile)
+        stats.sort_stats('cumulative').print_stats(limit)
+
+tracer = Tracer()
+profiler: Optional[ThreadProfiler] = None
+
+def start_profiling() -> ThreadProfiler:
+    """Enable cProfile for the main thread and for instrumented tasks."""
+    global profiler
+    profiler = ThreadProfiler()
+    profiler.main.enable()
+    return profiler
+
+def instrument(name: str, func: Callable) -> Callable:
+    """Wrap func so each call is traced as a span (and profiled if enabled)."""
+    def traced(*args, **kwargs):
+        with tracer.span(name):
+            return func(*args, **kwargs)
+    return profiler.wrap(traced) if profiler is not None else traced
@@ -1,15 +1,25 @@
 """Validation utilities for GHPush."""
+import hashlib
+import json
 import os
+import shutil
 import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Optional
 from rich.console import Console
-from .config import get_openai_api_key
+from .config import Config, atomic_write_json, get_setting, mtime_ns
+from .llm_providers import load_providers
+from .tracing import tracer
 
 console = Console()
 
 def validate_openai_key():
-    """Check for OpenAI API key and return whether AI features are available."""
-    api_key = get_openai_api_key()
-    if not api_key:
+    """Check for an OpenAI API key (or other configured LLM providers) and
+    return whether AI features are available."""
+    providers = load_providers()
+    if not providers:
         console.print("\n[yellow]╭─ Mode: Basic Summary ──────────────────────────╮[/]")
         console.print("[yellow]│[/]  🤖 AI features are currently disabled          [yellow]│[/]")
         console.print("[yellow]│[/]  ℹ️  Operating in basic summary mode           [yellow]│[/]")
@@ -18,28 +28,135 @@ def validate_openai_key():
         console.print("  🔑 Set the [bold]OPENAI_API_KEY[/] environment variable")
         console.print("  💡 Restart ghpush after setting the key\n")
         return None
-    return api_key
+    return providers
+
+class GhAuthCache:
+    """Remembers a successful `gh auth status` in ``~/.ghpush/gh_auth.json``.
+
+    The entry is keyed on everything that can change the answer: the gh
+    binary (path and mtime), gh's auth config (hosts.yml mtime), the host
+    and any token passed through the environment. A hit skips both gh
+    subprocesses. Once an entry is older than half its TTL it is still
+    used, but gh is re-checked on a background thread and the entry is
+    dropped if authentication has been revoked.
+    """
+
+    def __init__(self, path: Path = None, ttl: float = None):
+        self.path = path or Config().config_dir / "gh_auth.json"
+        self.ttl = ttl if ttl is not None else get_setting('gh_auth_cache_ttl', 3600)
+
+    @staticmethod
+    def host() -> Optional[str]:
+        return os.getenv('GH_HOST')
+
+    @staticmethod
+    def _hosts_file() -> Path:
+        if os.getenv('GH_CONFIG_DIR'):
+            return Path(os.environ['GH_CONFIG_DIR']) / "hosts.yml"
+        if os.name == 'nt' and os.getenv('AppData'):
+            return Path(os.environ['AppData']) / "GitHub CLI" / "hosts.yml"
+        config_home = Path(os.getenv('XDG_CONFIG_HOME') or Path.home() / ".config")
+        return config_home / "gh" / "hosts.yml"
+
+    def key(self, gh_path: str) -> str:
+        """Fingerprint of the gh binary, its auth config, the host and env tokens."""
+        parts = [gh_path, mtime_ns(Path(gh_path)), mtime_ns(self._hosts_file()), self.host() or '']
+        for name in ('GH_TOKEN', 'GITHUB_TOKEN', 'GH_ENTERPRISE_TOKEN'):
+            token = os.getenv(name)
+            parts.append(hashlib.sha256(token.encode()).hexdigest() if token else '')
+        return hashlib.sha256('\0'.join(map(str, parts)).encode()).hexdigest()
+
+    def age(self, key: str) -> Optional[float]:
+        """Seconds since key was validated, or None if it is missing or expired."""
+        try:
+            with open(self.path, 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get('key') != key:
+            return None
+        age = time.time() - entry.get('validated_at', 0)
+        return age if 0 <= age <= self.ttl else None
+
+    def store(self, key: str):
+        try:
+            atomic_write_json(self.path, {'key': key, 'validated_at': time.time()})
+        except OSError:
+            pass
+
+    def invalidate(self):
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
+
+def _gh_auth_status(gh_path: str) -> subprocess.CompletedProcess:
+    command = [gh_path, 'auth', 'status']
+    if GhAuthCache.host():
+        command += ['--hostname', GhAuthCache.host()]
+    return subprocess.run(command, capture_output=True, text=True, timeout=30)
+
+def _gh_authenticated(gh_path: str) -> bool:
+    """Whether `gh auth status` succeeds; a hanging gh counts as a failure."""
+    try:
+        return _gh_auth_status(gh_path).returncode == 0
+    except subprocess.TimeoutExpired:
+        return False
+
+def _recheck_github_auth(cache: GhAuthCache, gh_path: str, key: str):
+    """Re-run `gh auth status` and refresh or drop the cached result."""
+    try:
+        authenticated = _gh_authenticated(gh_path)
+    except OSError:
+        return
+    if authenticated:
+        cache.store(key)
+    else:
+        cache.invalidate()
 
 def validate_github_auth():
     """Validate GitHub CLI authentication."""
+    with tracer.span('validate.github_auth') as span:
+        gh_path = shutil.which('gh')
+        if gh_path is None:
+            _report_gh_missing()
+        cache = GhAuthCache()
+        if cache.ttl > 0:
+            key = cache.key(gh_path)
+            age = cache.age(key)
+            if age is not None:
+                span.set('cached', True)
+                if age > cache.ttl / 2:
+                    # A daemon, so a hanging gh can't hold up exit; if the run
+                    # ends first, the next one past half the TTL checks again
+                    threading.Thread(target=_recheck_github_auth, args=(cache, gh_path, key),
+                                     name='gh-auth-recheck', daemon=True).start()
+                return True
+        _validate_github_auth(gh_path)
+        if cache.ttl > 0:
+            cache.store(key)
+        return True
+
+def _report_gh_missing():
+    console.print("[red]Error: GitHub CLI (gh) is not installed.[/]")
+    console.print("\nTo fix this:")
+    console.print("1. Install GitHub CLI:")
+    console.print("   brew install gh  # on macOS")
+    console.print("   For other platforms, see: https://cli.github.com/")
+    raise SystemExit(1)
+
+def _validate_github_auth(gh_path: str = 'gh'):
+    """Check that gh is installed and authenticated."""
     try:
         # Check if gh is installed
-        result = subprocess.run(['gh', '--version'], 
+        result = subprocess.run([gh_path, '--version'], 
                               capture_output=True, 
                               text=True)
         if result.returncode != 0:
-            console.print("[red]Error: GitHub CLI (gh) is not installed.[/]")
-            console.print("\nTo fix this:")
-            console.print("1. Install GitHub CLI:")
-            console.print("   brew install gh  # on macOS")
-            console.print("   For other platforms, see: https://cli.github.com/")
-            raise SystemExit(1)
+            _report_gh_missing()
 
         # Check if authenticated
-        result = subprocess.run(['gh', 'auth', 'status'], 
-                              capture_output=True, 
-                              text=True)
-        if result.returncode != 0:
+        if not _gh_authenticated(gh_path):
             console.print("[red]Error: Not authenticated with GitHub.[/]")
             console.print("\nTo fix this:")
             console.print("1. Run: gh auth login")
@@ -48,9 +165,4 @@ def validate_github_auth():
         
         return True
     except FileNotFoundError:
-        console.print("[red]Error: GitHub CLI (gh) is not installed.[/]")
-        console.print("\nTo fix this:")
-        console.print("1. Install GitHub CLI:")
-        console.print("   brew install gh  # on macOS")
-        console.print("   For other platforms, see: https://cli.github.com/")
-        raise SystemExit(1) 
\ No newline at end of file
+        _report_gh_missing()
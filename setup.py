@@ -15,7 +15,14 @@ setup(
         "gitpython",
         "rich",
         "openai",
+        "python-dotenv>=1.0.0",
+        "httpx>=0.23.0",
     ],
+    extras_require={
+        "tokenizer": ["tiktoken>=0.5.0"],
+        "http2": ["h2>=3,<5"],
+        "yaml": ["pyyaml>=5.1"],
+    },
     entry_points={
         "console_scripts": [
             "ghpush=ghpush.cli:main",
@@ -0,0 +1,210 @@
+"""Shared fixtures: an isolated ~/.ghpush and threaded stub HTTP servers."""
+import json
+import os
+import subprocess
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional
+
+import pytest
+
+import ghpush.config
+
+class Reply:
+    """What the stub server answers one request with.
+
+    ``chunks`` makes a streamed (connection-close delimited) body, written
+    ``chunk_delay`` seconds apart; ``delay`` holds the whole response back.
+    """
+
+    def __init__(self, status: int = 200, body=None, headers: dict = None,
+                 chunks: List[bytes] = None, delay: float = 0.0, chunk_delay: float = 0.0):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+        self.chunks = chunks
+        self.delay = delay
+        self.chunk_delay = chunk_delay
+
+class Request:
+    __slots__ = ('method', 'path', 'headers', 'json')
+
+    def __init__(self, method: str, path: str, headers: dict, body: Optional[dict]):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.json = body
+
+class StubServer:
+    """Threaded HTTP server answering each request from a script.
+
+    Replies queued with ``script`` are used in order; after that
+    ``responder(request)`` is called (default: 404). Every request is
+    recorded, and so is the highest number handled at once.
+    """
+
+    def __init__(self, responder: Callable[[Request], Reply] = None):
+        self.responder = responder or (lambda request: Reply(404, {'message': 'Not Found'}))
+        self.requests: List[Request] = []
+        self.max_in_flight = 0
+        self._queue: List[Reply] = []
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def script(self, *replies: Reply):
+        with self._lock:
+            self._queue.extend(replies)
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _next(self, request: Request) -> Reply:
+        with self._lock:
+            self.requests.append(request)
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+            if self._queue:
+                return self._queue.pop(0)
+        return self.responder(request)
+
+    def _done(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _serve(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length else b''
+                request = Request(self.command, self.path, dict(self.headers),
+                                  json.loads(raw) if raw else None)
+                reply = stub._next(request)
+                try:
+                    time.sleep(reply.delay)
+                    self.send_response(reply.status)
+                    for name, value in reply.headers.items():
+                        self.send_header(name, value)
+                    if reply.chunks is not None:
+                        self.send_header('Content-Type', 'text/event-stream')
+                        self.send_header('Connection', 'close')
+                        self.end_headers()
+                        for chunk in reply.chunks:
+                            self.wfile.write(chunk)
+                            self.wfile.flush()
+                            time.sleep(reply.chunk_delay)
+                        self.close_connection = True
+                        return
+                    body = json.dumps(reply.body).encode() if reply.body is not None else b''
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True
+                finally:
+                    stub._done()
+
+            do_GET = do_POST = do_PATCH = _serve
+
+        return Handler
+
+def completion(text: str) -> Reply:
+    """A non-streamed chat completion."""
+    return Reply(200, {
+        'id': 'stub', 'object': 'chat.completion', 'created': 0, 'model': 'stub',
+        'choices': [{'index': 0, 'finish_reason': 'stop',
+                     'message': {'role': 'assistant', 'content': text}}],
+        'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2},
+    })
+
+def sse(pieces: List[str], chunk_delay: float = 0.0, done: bool = True) -> Reply:
+    """A streamed chat completion delivering pieces as separate SSE events."""
+    chunks = []
+    for piece in pieces:
+        event = {'id': 'stub', 'object': 'chat.completion.chunk', 'created': 0, 'model': 'stub',
+                 'choices': [{'index': 0, 'delta': {'content': piece}, 'finish_reason': None}]}
+        chunks.append(f"data: {json.dumps(event)}\n\n".encode())
+    if done:
+        chunks.append(b"data: [DONE]\n\n")
+    return Reply(chunks=chunks, chunk_delay=chunk_delay)
+
+def error(status: int, retry_after: float = None) -> Reply:
+    headers = {'Retry-After': f"{retry_after:g}"} if retry_after is not None else {}
+    return Reply(status, {'error': {'message': f"stub error {status}"}}, headers)
+
+@pytest.fixture(autouse=True)
+def ghpush_home(tmp_path, monkeypatch):
+    """Run every test with its own ~/.ghpush and no settings from the environment."""
+    for name in list(os.environ):
+        if name.startswith('GHPUSH_') or name in ('OPENAI_API_KEY', 'OPENAI_BASE_URL', 'GITHUB_TOKEN'):
+            monkeypatch.delenv(name)
+    home = tmp_path / "home"
+    home.mkdir()
+    monkeypatch.setenv('HOME', str(home))
+    monkeypatch.setattr(ghpush.config, '_env_loaded', True)
+    monkeypatch.setenv('GHPUSH_CACHE', '0')
+    monkeypatch.setenv('GHPUSH_HTTP2', '0')
+    return home
+
+def git(repo, *args) -> str:
+    return subprocess.run(['git', *args], cwd=repo, check=True, capture_output=True, text=True).stdout
+
+def commit(repo, files: dict, message: str) -> str:
+    """Write files (path -> content) and commit them; returns the new HEAD."""
+    for path, content in files.items():
+        target = repo / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(content)
+    git(repo, 'add', '-A')
+    git(repo, 'commit', '-q', '-m', message)
+    return git(repo, 'rev-parse', 'HEAD').strip()
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """A repository (the working directory) with a commit on main and a
+    checked-out branch 'feature' one commit ahead, pushable to a bare
+    'origin'."""
+    for name in ('GIT_AUTHOR_NAME', 'GIT_COMMITTER_NAME'):
+        monkeypatch.setenv(name, 'Test')
+    for name in ('GIT_AUTHOR_EMAIL', 'GIT_COMMITTER_EMAIL'):
+        monkeypatch.setenv(name, 'test@example.com')
+    origin = tmp_path / "origin.git"
+    path = tmp_path / "repo"
+    git(tmp_path, 'init', '-q', '--bare', str(origin))
+    git(tmp_path, 'init', '-q', '-b', 'main', str(path))
+    git(path, 'remote', 'add', 'origin', str(origin))
+    commit(path, {'app.py': "def f(x):\n    return x\n"}, "Initial commit")
+    git(path, 'push', '-q', 'origin', 'main')
+    git(path, 'checkout', '-q', '-b', 'feature')
+    commit(path, {'app.py': "def f(x, y=1):\n    return x + y\n"}, "Add y to f")
+    monkeypatch.chdir(path)
+    return path
+
+@pytest.fixture
+def stub():
+    server = StubServer()
+    yield server
+    server.close()
+
+@pytest.fixture
+def llm(stub, monkeypatch):
+    """A stub OpenAI-compatible server configured as the only provider."""
+    monkeypatch.setenv('GHPUSH_PROVIDERS', json.dumps(
+        [{'name': 'stub', 'base_url': f"{stub.url}/v1", 'api_key': 'test'}]))
+    # Keep backoff short; Retry-After headers are still honored
+    from ghpush.ai_summarizer import AISummarizer
+    monkeypatch.setattr(AISummarizer, 'BACKOFF_BASE', 0.01)
+    return stub
@@ -0,0 +1,96 @@
+"""Batch manifests and a batch run that only generates the content."""
+import builtins
+import io
+import json
+
+import pytest
+
+from ghpush.batch import load_manifest, run_batch
+
+from conftest import completion
+
+def items(manifest):
+    return [(item.repo, item.branch, item.base) for item in load_manifest(manifest)]
+
+def test_a_json_list(tmp_path):
+    manifest = tmp_path / "branches.json"
+    manifest.write_text(json.dumps([
+        {'branch': 'feature/login'},
+        {'repo': 'service-b', 'branch': 'fix/timeout', 'base': 'release'},
+    ]))
+
+    assert items(manifest) == [
+        (tmp_path, 'feature/login', 'main'),
+        (tmp_path / "service-b", 'fix/timeout', 'release'),
+    ]
+
+def test_defaults_and_repo_paths(tmp_path):
+    (tmp_path / "manifests").mkdir()
+    manifest = tmp_path / "manifests" / "branches.json"
+    manifest.write_text(json.dumps({
+        'defaults': {'base': 'develop', 'repo': '../service-a'},
+        'items': [
+            {'branch': 'a'},
+            {'branch': 'b', 'base': 'release'},
+            {'branch': 'c', 'repo': str(tmp_path / "elsewhere")},
+        ],
+    }))
+
+    assert items(manifest) == [
+        (tmp_path / "service-a", 'a', 'develop'),
+        (tmp_path / "service-a", 'b', 'release'),
+        (tmp_path / "elsewhere", 'c', 'develop'),
+    ]
+
+def test_a_yaml_manifest(tmp_path):
+    pytest.importorskip('yaml')
+    manifest = tmp_path / "branches.yml"
+    manifest.write_text("defaults:\n"
+                        "  base: main\n"
+                        "items:\n"
+                        "  - repo: ../service-a\n"
+                        "    branch: feature/login\n"
+                        "  - branch: fix/timeout\n"
+                        "    base: release\n")
+
+    assert items(manifest) == [
+        (tmp_path.parent / "service-a", 'feature/login', 'main'),
+        (tmp_path, 'fix/timeout', 'release'),
+    ]
+
+def test_yaml_without_pyyaml(tmp_path, monkeypatch):
+    real_import = builtins.__import__
+
+    def no_yaml(name, *args, **kwargs):
+        if name == 'yaml':
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+    monkeypatch.setattr(builtins, '__import__', no_yaml)
+    manifest = tmp_path / "branches.yaml"
+    manifest.write_text("- branch: a\n")
+
+    with pytest.raises(RuntimeError, match=r"ghpush\[yaml\]"):
+        load_manifest(manifest)
+
+@pytest.mark.parametrize('entries', [[{'repo': '.'}], {'items': [{'branch': ''}]}])
+def test_entries_need_a_branch(tmp_path, entries):
+    manifest = tmp_path / "branches.json"
+    manifest.write_text(json.dumps(entries))
+
+    with pytest.raises(ValueError, match="without a branch"):
+        load_manifest(manifest)
+
+def test_a_run_without_pushing(repo, llm):
+    llm.responder = lambda request: completion("TITLE: Add y\nDESCRIPTION:\nf takes y")
+    manifest = repo.parent / "branches.json"
+    manifest.write_text(json.dumps([{'repo': 'repo', 'branch': 'feature'},
+                                    {'repo': 'repo', 'branch': 'missing'}]))
+    output = io.StringIO()
+
+    assert run_batch(manifest, output, workers=2, push=False) == 1
+
+    records = {record['branch']: record for record in map(json.loads, output.getvalue().splitlines())}
+    assert records['feature']['status'] == 'ok'
+    assert records['feature']['title'] == "Add y"
+    assert "/compare/main...feature?expand=1" in records['feature']['pr_url']
+    assert records['missing']['status'] == 'error'
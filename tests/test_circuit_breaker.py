@@ -0,0 +1,84 @@
+"""Circuit breaker: what counts as a failure, and when requests stop."""
+import pytest
+from openai import InternalServerError
+
+from ghpush.ai_summarizer import AISummarizer
+from ghpush.context_packer import PackedContext
+from ghpush.diff_summary import DiffSummary
+from ghpush.llm_providers import CircuitBreaker, CircuitOpenError, LatencyStats, Provider, ProviderRouter
+
+from conftest import completion, error
+
+SUMMARY = "TITLE: Stub\nDESCRIPTION:\nbody"
+
+def failures(name: str = 'stub') -> int:
+    return LatencyStats().data.get(name, {}).get('failures', 0)
+
+def test_rate_limited_map_chunks_are_retried_without_opening_the_circuit(llm):
+    llm.script(*[error(429, retry_after=0.2) for _ in range(4)])
+    llm.responder = lambda request: completion(SUMMARY)
+    summarizer = AISummarizer()
+
+    result = summarizer.generate_map_reduce_summary(
+        DiffSummary(), [PackedContext(text, 1, 1, 0) for text in "abcd"], [], concurrency=4)
+
+    assert result == ('Stub', 'body')
+    # 4 rate limited + 4 retried map requests + 1 reduce
+    assert len(llm.requests) == 9
+    assert failures() == 0
+    assert summarizer.router.breaker.state('stub') == CircuitBreaker.CLOSED
+
+def test_an_outage_counts_once_per_request_however_many_attempts(llm):
+    llm.responder = lambda request: error(503)
+    summarizer = AISummarizer()
+
+    with pytest.raises(InternalServerError):
+        summarizer._request_completion("prompt", 10)
+
+    assert len(llm.requests) == AISummarizer.MAX_ATTEMPTS
+    assert failures() == 1
+
+def test_a_success_after_retrying_counts_no_failure(llm):
+    llm.script(error(503), error(502))
+    llm.responder = lambda request: completion(SUMMARY)
+
+    assert AISummarizer()._request_completion("prompt", 10) == SUMMARY
+    assert failures() == 0
+
+def test_circuit_opens_after_threshold_failed_requests_and_later_runs_skip_the_provider(llm, monkeypatch):
+    monkeypatch.setenv('GHPUSH_CIRCUIT_FAILURE_THRESHOLD', '2')
+    llm.responder = lambda request: error(500)
+    summarizer = AISummarizer()
+    for _ in range(2):
+        with pytest.raises(InternalServerError):
+            summarizer._request_completion("prompt", 10)
+    sent = len(llm.requests)
+
+    # The next run falls back to the basic summary without a request
+    title, _ = AISummarizer().generate_summary(DiffSummary(), "diff", [])
+
+    assert title == "Update 0 files"
+    assert len(llm.requests) == sent
+
+def test_a_circuit_opened_by_this_run_does_not_stop_its_retries(monkeypatch):
+    monkeypatch.setenv('GHPUSH_CIRCUIT_FAILURE_THRESHOLD', '1')
+    provider = Provider('stub')
+    this_run = ProviderRouter([provider])
+    this_run.record_failure(provider)
+
+    assert this_run.closed([provider]) == [provider]
+    # Another run sees the circuit open and drops the provider
+    assert ProviderRouter([provider]).closed([provider]) == []
+
+def test_a_circuit_another_run_opens_later_is_seen(monkeypatch):
+    monkeypatch.setenv('GHPUSH_CIRCUIT_FAILURE_THRESHOLD', '1')
+    provider = Provider('stub')
+    # Both runs loaded the stats before either failed
+    this_run, other_run = ProviderRouter([provider]), ProviderRouter([provider])
+    providers = this_run.ordered()
+
+    other_run.record_failure(provider)
+
+    assert this_run.closed(providers) == []
+    with pytest.raises(CircuitOpenError):
+        this_run.ordered()
@@ -0,0 +1,39 @@
+"""Settings and the shared file helpers."""
+import json
+
+import pytest
+
+from ghpush import config
+from ghpush.config import atomic_write_json, get_setting
+
+def test_environment_settings_win_and_are_coerced(ghpush_home, monkeypatch):
+    (ghpush_home / ".ghpush").mkdir()
+    (ghpush_home / ".ghpush" / "config.json").write_text(json.dumps({'hedge': True, 'circuit_reset_s': 30}))
+    monkeypatch.setenv('GHPUSH_CIRCUIT_RESET_S', '45')
+
+    assert get_setting('hedge', False) is True
+    assert get_setting('circuit_reset_s', 60) == 45
+    assert get_setting('missing', 'default') == 'default'
+
+def test_atomic_write_json_replaces_the_file(tmp_path):
+    path = tmp_path / "state" / "entry.json"
+    atomic_write_json(path, {'n': 1})
+    atomic_write_json(path, {'n': 2})
+
+    assert json.loads(path.read_text()) == {'n': 2}
+    assert [child.name for child in path.parent.iterdir()] == ["entry.json"]
+
+def test_atomic_write_json_leaves_nothing_behind_when_it_fails(tmp_path, monkeypatch):
+    path = tmp_path / "state" / "entry.json"
+    atomic_write_json(path, {'n': 1})
+
+    def fail(src, dst):
+        raise OSError("disk full")
+    monkeypatch.setattr(config.os, 'replace', fail)
+    with pytest.raises(OSError):
+        atomic_write_json(path, {'n': 2})
+    with pytest.raises(TypeError):
+        atomic_write_json(path, {'n': object()})
+
+    assert json.loads(path.read_text()) == {'n': 1}
+    assert [child.name for child in path.parent.iterdir()] == ["entry.json"]
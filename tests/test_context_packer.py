@@ -0,0 +1,29 @@
+"""Token counting with and without a usable tokenizer."""
+import sys
+import types
+
+import pytest
+
+from ghpush import context_packer
+from ghpush.context_packer import count_tokens
+
+@pytest.fixture
+def tiktoken(monkeypatch):
+    """A tiktoken whose encodings can't be downloaded."""
+    module = types.ModuleType('tiktoken')
+    module.calls = 0
+
+    def unreachable(name):
+        module.calls += 1
+        raise OSError("Could not download the encoding")
+
+    module.encoding_for_model = module.get_encoding = unreachable
+    monkeypatch.setitem(sys.modules, 'tiktoken', module)
+    context_packer._get_encoder.cache_clear()
+    yield module
+    context_packer._get_encoder.cache_clear()
+
+def test_an_encoder_that_cannot_be_downloaded_falls_back_to_the_estimate(tiktoken):
+    assert count_tokens("x" * 40) == 10
+    assert count_tokens("x" * 41) == 11
+    assert tiktoken.calls == 1
@@ -0,0 +1,149 @@
+"""The daemon and its thin client, over a real Unix socket."""
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import webbrowser
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from ghpush import cli, validators
+from ghpush import daemon as ghpush_daemon
+from ghpush.daemon import Daemon, environment_fingerprint, request, run_client, socket_path
+
+from conftest import sse
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="needs Unix domain sockets")
+
+@pytest.fixture
+def served(repo, llm, monkeypatch):
+    """A daemon serving from a thread; PRs go through the compare page."""
+    # Unix socket paths are limited to about 100 characters
+    directory = tempfile.mkdtemp(prefix="ghpush-")
+    monkeypatch.setenv('GHPUSH_DAEMON_SOCKET', f"{directory}/daemon.sock")
+    monkeypatch.setenv('GHPUSH_PR_BACKEND', 'browser')
+    monkeypatch.setenv('GHPUSH_DAEMON_POLL_S', '3600')
+    monkeypatch.setattr(validators, 'validate_github_auth', lambda: True)
+    llm.responder = lambda request: sse(["TITLE: Add y\n", "DESCRIPTION:\nf takes y"])
+    opened = []
+    monkeypatch.setattr(webbrowser, 'open', opened.append)
+
+    server = Daemon()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while request({'command': 'ping'}) is None:
+        assert time.monotonic() < deadline, "the daemon did not start"
+        time.sleep(0.02)
+    server.opened = opened
+    yield server
+    request({'command': 'stop'})
+    thread.join(5)
+    shutil.rmtree(directory, ignore_errors=True)
+
+def exchange(message: dict, raw: bytes = None) -> list:
+    """The events the daemon answers message (or raw bytes) with, up to the last one."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(30)
+    sock.connect(str(socket_path()))
+    with sock, sock.makefile('rwb') as stream:
+        stream.write(raw if raw is not None else json.dumps(message).encode('utf-8') + b"\n")
+        stream.flush()
+        return [json.loads(line) for line in stream]
+
+def test_ping_and_bad_requests(served):
+    (ping,) = exchange({'command': 'ping'})
+    assert ping == {'event': 'result', 'pid': os.getpid(), 'repos': []}
+    assert exchange({'command': 'rebase'}) == [{'event': 'error', 'message': "Unknown command 'rebase'"}]
+    assert exchange(None, raw=b"not json\n") == [{'event': 'error', 'message': "Malformed request"}]
+
+def test_a_run_streams_events_then_the_result(served, repo):
+    events = exchange({'command': 'run', 'cwd': str(repo), 'base': 'main',
+                       'environment': environment_fingerprint()})
+
+    kinds = [event['event'] for event in events]
+    assert kinds[0] == 'accepted' and kinds[-1] == 'result'
+    assert kinds.index('stream_open') < kinds.index('delta') < kinds.index('stream_close')
+    started = [event['name'] for event in events if event['event'] == 'task_started']
+    finished = [event['name'] for event in events if event['event'] == 'task_finished']
+    assert started and sorted(started) == sorted(finished)
+    assert "".join(event['text'] for event in events if event['event'] == 'delta').startswith("TITLE: Add y")
+    result = events[-1]
+    assert result['ai_mode'] is True
+    assert "/compare/main...feature?expand=1" in result['open_url']
+    # The daemon leaves opening the browser to the client
+    assert served.opened == []
+
+def test_a_run_outside_a_repository_reports_an_error(served, tmp_path):
+    events = exchange({'command': 'run', 'cwd': str(tmp_path), 'base': 'main',
+                       'environment': environment_fingerprint()})
+
+    assert [event['event'] for event in events] == ['accepted', 'error']
+
+def test_a_mismatched_run_is_refused_before_any_work(served, llm):
+    assert exchange({'command': 'run', 'cwd': '/', 'environment': "other"}) == [
+        {'event': 'environment_mismatch'}]
+    assert llm.requests == []
+
+def test_without_a_daemon_the_client_steps_aside(monkeypatch, tmp_path):
+    monkeypatch.setenv('GHPUSH_DAEMON_SOCKET', str(tmp_path / "none.sock"))
+
+    assert request({'command': 'ping'}) is None
+    assert run_client('main') is False
+
+def test_a_run_is_served_and_the_client_opens_the_browser(served, llm, monkeypatch):
+    daemon_threads = []
+    monkeypatch.setattr(webbrowser, 'open', lambda url: (served.opened.append(url),
+                                                         daemon_threads.append(threading.current_thread())))
+
+    assert run_client('main') is True
+
+    assert len(llm.requests) == 1
+    assert len(served.opened) == 1
+    assert "/compare/main...feature?expand=1&title=Add%20y" in served.opened[0]
+    assert daemon_threads == [threading.main_thread()]
+
+def test_a_client_with_a_different_environment_runs_locally(served, llm, monkeypatch):
+    monkeypatch.setenv('OPENAI_API_KEY', "another key")
+
+    assert run_client('main') is False
+
+    assert llm.requests == []
+    assert served.opened == []
+
+def test_runs_from_a_subdirectory_share_the_repository_state(served, repo, monkeypatch):
+    assert run_client('main') is True
+    (repo / "src").mkdir()
+    monkeypatch.chdir(repo / "src")
+
+    assert run_client('main') is True
+
+    assert request({'command': 'ping'})['repos'] == [str(Path(repo).resolve())]
+
+def test_the_fingerprint_covers_provider_key_variables(monkeypatch):
+    monkeypatch.setenv('GHPUSH_PROVIDERS', '[{"name": "local", "api_key_env": "LOCAL_LLM_KEY"}]')
+    before = ghpush_daemon.environment_fingerprint()
+    monkeypatch.setenv('LOCAL_LLM_KEY', "secret")
+    assert ghpush_daemon.environment_fingerprint() != before
+    monkeypatch.setenv('UNRELATED', "value")
+    after = ghpush_daemon.environment_fingerprint()
+    assert after != before
+    monkeypatch.setenv('UNRELATED', "other value")
+    assert ghpush_daemon.environment_fingerprint() == after
+
+@pytest.mark.parametrize('setting, handed_over', [(None, False), ('1', True)])
+def test_runs_only_go_to_the_daemon_when_turned_on(monkeypatch, setting, handed_over):
+    if setting is not None:
+        monkeypatch.setenv('GHPUSH_DAEMON', setting)
+    clients, local = [], []
+    monkeypatch.setattr(ghpush_daemon, 'run_client', lambda base, full: clients.append(base) or True)
+    monkeypatch.setattr(cli, 'run', lambda base, full: local.append(base))
+
+    assert CliRunner().invoke(cli.main, []).exit_code == 0
+
+    assert (clients, local) == ((['main'], []) if handed_over else ([], ['main']))
@@ -0,0 +1,56 @@
+"""Per-attempt timeouts and the overall deadline, against a fault-injecting stub."""
+import time
+
+import pytest
+
+from ghpush.ai_summarizer import AIDeadlineExceeded, AISummarizer
+from ghpush.diff_summary import DiffSummary
+
+from conftest import Reply, completion, sse
+
+SUMMARY = "TITLE: Stub\nDESCRIPTION:\nbody"
+
+@pytest.fixture
+def short_timeouts(monkeypatch):
+    monkeypatch.setenv('GHPUSH_AI_REQUEST_TIMEOUT_S', '0.5')
+    monkeypatch.setenv('GHPUSH_AI_DEADLINE_S', '2')
+
+def test_a_stream_that_keeps_sending_is_cut_off_at_the_attempt_timeout(llm, short_timeouts):
+    llm.script(sse(["word "] * 100, chunk_delay=0.1))
+    received = []
+    started = time.monotonic()
+
+    with pytest.raises(AIDeadlineExceeded):
+        AISummarizer()._request_completion("prompt", 10, on_delta=received.append)
+
+    assert time.monotonic() - started < 1.5
+    assert received
+    # Text was already shown, so the partial stream is not retried
+    assert len(llm.requests) == 1
+
+def test_a_stream_with_no_text_before_the_timeout_is_retried(llm, short_timeouts):
+    # Keep-alive chunks without content, then nothing useful
+    llm.script(sse([""] * 100, chunk_delay=0.1), sse([SUMMARY]))
+    received = []
+
+    assert AISummarizer()._request_completion("prompt", 10, on_delta=received.append) == SUMMARY
+    assert "".join(received) == SUMMARY
+    assert len(llm.requests) == 2
+
+def test_a_hung_request_times_out_and_is_retried(llm, short_timeouts):
+    llm.script(Reply(delay=3, body={}))
+    llm.responder = lambda request: completion(SUMMARY)
+    started = time.monotonic()
+
+    assert AISummarizer()._request_completion("prompt", 10) == SUMMARY
+    assert time.monotonic() - started < 1.5
+    assert len(llm.requests) == 2
+
+def test_the_overall_deadline_bounds_all_attempts(llm, short_timeouts):
+    llm.responder = lambda request: Reply(delay=5, body={})
+    started = time.monotonic()
+
+    title, _ = AISummarizer().generate_summary(DiffSummary(), "diff", [])
+
+    assert title == "Update 0 files"
+    assert time.monotonic() - started < 3
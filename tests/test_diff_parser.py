@@ -0,0 +1,199 @@
+"""The streaming unified diff parser and the --numstat parser."""
+import pytest
+
+from ghpush.diff_parser import parse_diff, parse_numstat
+from ghpush.git_operations import GitOperations
+
+from conftest import commit, git
+
+def parse(text: str, **kwargs):
+    return list(parse_diff(text.splitlines(keepends=True), **kwargs))
+
+MODIFIED = """\
+diff --git a/app.py b/app.py
+index 1111111..2222222 100644
+--- a/app.py
++++ b/app.py
+@@ -1,2 +1,2 @@
+-def f(x):
++def f(x, y=1):
+     return x
+"""
+
+# Removed and added lines whose content starts with "--" / "++" look like
+# file headers; the hunk's line counts say they are content
+HEADER_LIKE_CONTENT = """\
+diff --git a/notes.md b/notes.md
+index 1111111..2222222 100644
+--- a/notes.md
++++ b/notes.md
+@@ -1,3 +1,3 @@
+ # Notes
+--- a/old.txt
++++ b/new.txt
+ end
+diff --git a/other.md b/other.md
+index 3333333..4444444 100644
+--- a/other.md
++++ b/other.md
+@@ -1 +1 @@
+-a
++b
+"""
+
+BINARY = """\
+diff --git a/logo.png b/logo.png
+index 1111111..2222222 100644
+Binary files a/logo.png and b/logo.png differ
+diff --git a/icon.png b/icon.png
+new file mode 100644
+index 0000000..2222222
+GIT binary patch
+literal 4
+LcmZQzWMT#Y01f~L
+
+literal 0
+HcmV?d00001
+
+"""
+
+PURE_RENAME = """\
+diff --git a/old name.py b/new name.py
+similarity index 100%
+rename from old name.py
+rename to new name.py
+"""
+
+RENAME_WITH_CHANGES = """\
+diff --git a/src/old.py b/src/new.py
+similarity index 80%
+rename from src/old.py
+rename to src/new.py
+index 1111111..2222222 100644
+--- a/src/old.py
++++ b/src/new.py
+@@ -1 +1,2 @@
+ x = 1
++y = 2
+"""
+
+ADDED_AND_DELETED = """\
+diff --git a/added.txt b/added.txt
+new file mode 100644
+index 0000000..1111111
+--- /dev/null
++++ b/added.txt
+@@ -0,0 +1,2 @@
++one
++two
+diff --git a/gone.txt b/gone.txt
+deleted file mode 100644
+index 1111111..0000000
+--- a/gone.txt
++++ /dev/null
+@@ -1 +0,0 @@
+-only
+"""
+
+QUOTED = """\
+diff --git "a/caf\\303\\251.txt" "b/caf\\303\\251.txt"
+index 1111111..2222222 100644
+--- "a/caf\\303\\251.txt"
++++ "b/caf\\303\\251.txt"
+@@ -1 +1 @@
+-a
++b
+"""
+
+NO_NEWLINE = """\
+diff --git a/a.txt b/a.txt
+index 1111111..2222222 100644
+--- a/a.txt
++++ b/a.txt
+@@ -1 +1 @@
+-a
+\\ No newline at end of file
++b
+\\ No newline at end of file
+"""
+
+@pytest.mark.parametrize('diff, expected', [
+    (MODIFIED, [('app.py', None, 1, 1, False)]),
+    (HEADER_LIKE_CONTENT, [('notes.md', None, 1, 1, False), ('other.md', None, 1, 1, False)]),
+    (BINARY, [('logo.png', None, 0, 0, True), ('icon.png', None, 0, 0, True)]),
+    (PURE_RENAME, [('new name.py', 'old name.py', 0, 0, False)]),
+    (RENAME_WITH_CHANGES, [('src/new.py', 'src/old.py', 1, 0, False)]),
+    (ADDED_AND_DELETED, [('added.txt', None, 2, 0, False), ('gone.txt', None, 0, 1, False)]),
+    (QUOTED, [('café.txt', None, 1, 1, False)]),
+    (NO_NEWLINE, [('a.txt', None, 1, 1, False)]),
+    ("", []),
+])
+def test_parse_diff(diff, expected):
+    assert [(f.path, f.old_path, f.additions, f.deletions, f.binary) for f in parse(diff)] == expected
+
+def test_header_like_content_stays_in_the_hunk():
+    notes, other = parse(HEADER_LIKE_CONTENT)
+    assert notes.patch == "@@ -1,3 +1,3 @@\n # Notes\n--- a/old.txt\n+++ b/new.txt\n end\n"
+    assert other.patch == "@@ -1 +1 @@\n-a\n+b\n"
+
+def test_patch_text_is_truncated_but_counts_are_complete():
+    lines = "".join(f"+line {n}\n" for n in range(100))
+    diff = ("diff --git a/big.txt b/big.txt\n--- /dev/null\n+++ b/big.txt\n"
+            f"@@ -0,0 +1,100 @@\n{lines}")
+
+    (big,) = parse(diff, max_patch_chars=200)
+
+    assert big.truncated
+    assert big.additions == 100
+    assert len(big.patch) <= 200
+    assert big.patch.startswith("@@ -0,0 +1,100 @@\n+line 0\n")
+    assert big.words == len(diff.split())
+    (whole,) = parse(diff)
+    assert not whole.truncated
+    assert whole.patch.count("\n") == 101
+
+def test_excluded_files_are_counted_without_patch_text():
+    (excluded, other) = parse(HEADER_LIKE_CONTENT, exclude=lambda path: path == 'notes.md')
+    assert excluded.excluded and excluded.hunks == []
+    assert (excluded.additions, excluded.deletions) == (1, 1)
+    assert not other.excluded and other.hunks
+
+@pytest.mark.parametrize('output, expected', [
+    ("1\t1\tapp.py\0", [('app.py', None, 1, 1, False)]),
+    ("3\t0\tREADME.md\x002\t5\tsrc/main.py\0",
+     [('README.md', None, 3, 0, False), ('src/main.py', None, 2, 5, False)]),
+    # Renames and copies: empty path, then old and new paths
+    ("0\t0\t\0old.py\0new.py\0", [('new.py', 'old.py', 0, 0, False)]),
+    ("4\t1\t\0src/a.py\0lib/a.py\x001\t0\tz.py\0",
+     [('lib/a.py', 'src/a.py', 4, 1, False), ('z.py', None, 1, 0, False)]),
+    ("-\t-\tlogo.png\0", [('logo.png', None, 0, 0, True)]),
+    ("-\t-\t\0img/a.png\0img/b.png\0", [('img/b.png', 'img/a.png', 0, 0, True)]),
+    # -z leaves paths unquoted, tabs and all
+    ("1\t0\tmy file.txt\0", [('my file.txt', None, 1, 0, False)]),
+    ("1\t0\ttab\there.txt\0", [('tab\there.txt', None, 1, 0, False)]),
+    ("2\t2\t\0old name.txt\0new\tname.txt\0", [('new\tname.txt', 'old name.txt', 2, 2, False)]),
+    ("", []),
+])
+def test_parse_numstat(output, expected):
+    assert [(s.path, s.old_path, s.additions, s.deletions, s.binary) for s in parse_numstat(output)] == expected
+
+def test_numstat_and_the_patch_agree_on_real_git_output(repo):
+    commit(repo, {'lib.py': "".join(f"X{n} = {n}\n" for n in range(20))}, "Add lib")
+    git(repo, 'branch', 'before')
+    git(repo, 'mv', 'lib.py', 'renamed lib.py')
+    (repo / "renamed lib.py").write_text("".join(f"X{n} = {n}\n" for n in range(19)) + "X19 = 0\n")
+    (repo / "logo.png").write_bytes(b"\x89PNG\0\x01\x02")
+    commit(repo, {'tab\tname.txt': "one\ntwo\n", 'notes.md': "--- a/x\n+++ b/y\n"}, "Rename, binary and odd names")
+    git_ops = GitOperations(repo)
+
+    stats = git_ops.get_diff_stats('before')
+    files = list(git_ops.iter_diff('before'))
+    git_ops.close()
+
+    summary = lambda records: sorted((r.path, r.old_path, r.additions, r.deletions, r.binary) for r in records)
+    assert summary(stats) == summary(files) == [
+        ('logo.png', None, 0, 0, True),
+        ('notes.md', None, 2, 0, False),
+        ('renamed lib.py', 'lib.py', 1, 1, False),
+        ('tab\tname.txt', None, 2, 0, False),
+    ]
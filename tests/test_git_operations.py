@@ -0,0 +1,87 @@
+"""HEAD lookups go through the backend's refs instead of a git process per call."""
+import subprocess
+
+import pytest
+
+from ghpush import git_backend, git_operations
+from ghpush.git_operations import GitOperations
+
+from conftest import commit, git
+
+@pytest.fixture
+def git_calls(monkeypatch):
+    """The git subcommands run through subprocess.run."""
+    calls = []
+    real_run = subprocess.run
+
+    def run(args, *rest, **kwargs):
+        calls.append(args[1])
+        return real_run(args, *rest, **kwargs)
+
+    git_operations._configured_backend.cache_clear()
+    for module in (git_operations, git_backend):
+        monkeypatch.setattr(module.subprocess, 'run', run)
+    return calls
+
+def test_head_comes_from_the_cached_refs(repo, git_calls):
+    git(repo, 'config', 'ghpush.backend', 'plumbing')
+    expected = git(repo, 'rev-parse', 'HEAD').strip()
+    git_calls.clear()
+
+    git_ops = GitOperations(repo)
+    assert [git_ops.head_sha() for _ in range(3)] == [expected] * 3
+    assert git_ops.current_branch == 'feature'
+    GitOperations(repo).close()
+    git_ops.close()
+
+    assert git_calls.count('config') == 1
+    assert 'rev-parse' not in git_calls
+    # One symbolic-ref and one for-each-ref per instance that read its refs
+    assert git_calls.count('symbolic-ref') == 1
+
+@pytest.mark.parametrize('backend', ['gitpython', 'plumbing'])
+def test_refresh_sees_new_commits(repo, backend):
+    git_ops = GitOperations(repo, backend=backend)
+    before = git_ops.head_sha()
+    after = commit(repo, {'app.py': "def f(x, y=2):\n    return x + y\n"}, "Change the default")
+
+    git_ops.refresh()
+    assert git_ops.head_sha() == after != before
+    git_ops.close()
+
+@pytest.mark.parametrize('backend', ['gitpython', 'plumbing'])
+def test_a_detached_head_still_resolves(repo, backend):
+    expected = git(repo, 'rev-parse', 'HEAD~1').strip()
+    git(repo, 'checkout', '-q', '--detach', 'HEAD~1')
+
+    git_ops = GitOperations(repo, backend=backend)
+    assert git_ops.head_sha() == expected
+    with pytest.raises(TypeError):
+        git_ops.current_branch
+    git_ops.close()
+
+@pytest.mark.parametrize('pathspec_limit', [git_operations.MAX_PATHSPEC_CHARS, 0])
+def test_excluded_files_keep_no_patch_text(repo, monkeypatch, pathspec_limit):
+    # Over the limit, git produces the patch and only the parser drops it
+    monkeypatch.setattr(git_operations, 'MAX_PATHSPEC_CHARS', pathspec_limit)
+    commit(repo, {'schema.gen.py': "A = 1\n"}, "Generate the schema")
+    git_ops = GitOperations(repo)
+
+    files = {file_diff.path: file_diff for file_diff in git_ops.iter_diff('main', exclude=['schema.gen.py'])}
+    git_ops.close()
+
+    assert files['app.py'].hunks and not files['app.py'].excluded
+    if pathspec_limit:
+        assert 'schema.gen.py' not in files
+    else:
+        assert files['schema.gen.py'].excluded
+        assert files['schema.gen.py'].hunks == []
+
+def test_the_gitpython_repo_needs_that_backend(repo):
+    git_ops = GitOperations(repo, backend='gitpython')
+    assert git_ops.repo.working_tree_dir == str(repo)
+    git_ops.close()
+    git_ops = GitOperations(repo, backend='plumbing')
+    with pytest.raises(RuntimeError, match="needs the gitpython backend, not 'plumbing'"):
+        git_ops.repo
+    git_ops.close()
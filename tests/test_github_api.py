@@ -0,0 +1,61 @@
+"""Creating and updating pull requests against a stub GitHub API."""
+import pytest
+
+from ghpush.github_api import GitHubAPIError, GitHubClient
+
+from conftest import Reply
+
+PULLS = "/repos/octo/app/pulls"
+
+def pull(number: int, title: str = "Title") -> dict:
+    return {'number': number, 'title': title, 'html_url': f"https://github.test/octo/app/pull/{number}"}
+
+@pytest.fixture
+def github(stub, monkeypatch):
+    monkeypatch.setenv('GHPUSH_GITHUB_API_URL', stub.url)
+    client = GitHubClient("secret")
+    yield client
+    client.close()
+
+def calls(stub) -> list:
+    return [(request.method, request.path.split('?')[0]) for request in stub.requests]
+
+def test_a_new_branch_gets_a_new_pull_request(stub, github):
+    stub.script(Reply(200, []), Reply(201, pull(7, "Add y")))
+
+    pr, created = github.create_or_update_pull_request('octo', 'app', 'feature', 'main', "Add y", "Body")
+
+    assert (pr['number'], created) == (7, True)
+    assert calls(stub) == [('GET', PULLS), ('POST', PULLS)]
+    assert stub.requests[0].path == f"{PULLS}?head=octo%3Afeature&state=open"
+    assert stub.requests[1].json == {'title': "Add y", 'body': "Body", 'head': 'feature', 'base': 'main',
+                                     'draft': False}
+    assert stub.requests[1].headers['Authorization'] == "Bearer secret"
+
+def test_an_open_pull_request_is_updated_in_place(stub, github):
+    stub.script(Reply(200, [pull(3, "Old")]), Reply(200, pull(3, "New")))
+
+    pr, created = github.create_or_update_pull_request('octo', 'app', 'feature', 'main', "New", "Body")
+
+    assert (pr['title'], created) == ("New", False)
+    assert calls(stub) == [('GET', PULLS), ('PATCH', f"{PULLS}/3")]
+    assert stub.requests[1].json == {'title': "New", 'body': "Body", 'base': 'main'}
+
+def test_a_pull_request_created_concurrently_is_updated_instead(stub, github):
+    already_exists = {'message': "Validation Failed",
+                      'errors': [{'message': "A pull request already exists for octo:feature."}]}
+    stub.script(Reply(200, []), Reply(422, already_exists), Reply(200, [pull(5)]), Reply(200, pull(5, "New")))
+
+    pr, created = github.create_or_update_pull_request('octo', 'app', 'feature', 'main', "New", "Body")
+
+    assert (pr['number'], created) == (5, False)
+    assert calls(stub) == [('GET', PULLS), ('POST', PULLS), ('GET', PULLS), ('PATCH', f"{PULLS}/5")]
+
+def test_a_rejected_pull_request_that_does_not_exist_raises(stub, github):
+    invalid = {'message': "Validation Failed", 'errors': [{'message': "No commits between main and feature"}]}
+    stub.script(Reply(200, []), Reply(422, invalid), Reply(200, []))
+
+    with pytest.raises(GitHubAPIError, match="No commits between main and feature") as raised:
+        github.create_or_update_pull_request('octo', 'app', 'feature', 'main', "New", "Body")
+
+    assert raised.value.status_code == 422
@@ -0,0 +1,73 @@
+"""Installing and removing the precompute hooks."""
+import os
+import subprocess
+
+import pytest
+
+from ghpush.hooks import BEGIN_MARKER, HOOK_NAMES, hooks_dir, install_hooks, uninstall_hooks
+
+from conftest import git
+
+def hooks(repo):
+    return {name: repo / ".git" / "hooks" / name for name in HOOK_NAMES}
+
+def test_install_writes_executable_shell_hooks(repo):
+    installed = install_hooks('main')
+
+    assert installed == list(hooks(repo).values())
+    for path in installed:
+        text = path.read_text()
+        assert text.startswith("#!/bin/sh\n" + BEGIN_MARKER)
+        assert "-m ghpush.cli --base main hook run </dev/null" in text
+        assert os.access(path, os.X_OK)
+        subprocess.run(['sh', '-n', str(path)], check=True)
+
+def test_reinstalling_replaces_the_block(repo):
+    install_hooks('main')
+    install_hooks('develop')
+
+    for path in hooks(repo).values():
+        text = path.read_text()
+        assert text.count(BEGIN_MARKER) == 1
+        assert "--base develop" in text and "--base main" not in text
+
+def test_existing_hooks_are_kept(repo):
+    post_commit = hooks(repo)['post-commit']
+    post_commit.parent.mkdir(exist_ok=True)
+    original = "#!/usr/bin/env bash\necho committed"
+    post_commit.write_text(original)
+
+    install_hooks('main')
+    assert post_commit.read_text().startswith(original + "\n" + BEGIN_MARKER)
+
+    assert set(uninstall_hooks()) == set(hooks(repo).values())
+    assert post_commit.read_text() == original + "\n"
+    assert not hooks(repo)['pre-push'].exists()
+
+def test_hooks_in_other_languages_are_left_alone(repo, capsys):
+    pre_push = hooks(repo)['pre-push']
+    pre_push.parent.mkdir(exist_ok=True)
+    pre_push.write_text("#!/usr/bin/env python3\nprint('pushing')\n")
+
+    assert install_hooks('main') == [hooks(repo)['post-commit']]
+
+    assert pre_push.read_text() == "#!/usr/bin/env python3\nprint('pushing')\n"
+    assert "Skipping" in capsys.readouterr().err
+    assert uninstall_hooks() == [hooks(repo)['post-commit']]
+
+def test_uninstall_without_hooks_changes_nothing(repo):
+    assert uninstall_hooks() == []
+
+def test_core_hooks_path_is_honoured(repo, monkeypatch):
+    git(repo, 'config', 'core.hooksPath', 'githooks')
+    (repo / "src").mkdir()
+    monkeypatch.chdir(repo / "src")
+
+    assert hooks_dir() == (repo / "githooks").resolve()
+    install_hooks('main')
+    assert sorted(path.name for path in (repo / "githooks").iterdir()) == sorted(HOOK_NAMES)
+    assert not hooks(repo)['post-commit'].exists()
+
+def test_outside_a_repository(tmp_path):
+    with pytest.raises(RuntimeError, match="Not a git repository"):
+        install_hooks('main', repo_path=tmp_path)
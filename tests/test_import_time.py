@@ -0,0 +1,19 @@
+"""Startup cost of the ghpush entry point (see benchmarks/import_time.py)."""
+import importlib.util
+from pathlib import Path
+
+def load_benchmark():
+    path = Path(__file__).resolve().parent.parent / "benchmarks" / "import_time.py"
+    spec = importlib.util.spec_from_file_location("import_time", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+benchmark = load_benchmark()
+
+def test_heavy_dependencies_are_imported_lazily():
+    assert benchmark.eagerly_imported() == []
+
+def test_cli_import_stays_within_budget():
+    best_ms = min(benchmark.measure() for _ in range(3)) / 1000
+    assert best_ms <= benchmark.BUDGET_MS, f"ghpush.cli took {best_ms:.1f} ms to import"
@@ -0,0 +1,101 @@
+"""Map-reduce summaries of diffs that don't fit one prompt."""
+import re
+import time
+
+import pytest
+
+from ghpush.diff_analyzer import DiffAnalyzer
+
+from conftest import completion, error
+
+def make_diff(sizes: dict) -> str:
+    """A diff adding lines to each file; sizes maps path -> lines added."""
+    parts = []
+    for path, lines in sizes.items():
+        parts.append(f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n@@ -1,0 +1,{lines} @@\n")
+        parts.extend(f"+{path} line {index} {'x' * 40}\n" for index in range(lines))
+    return "".join(parts)
+
+def files_in(request) -> list:
+    return re.findall(r"^diff --git a/\S+ b/(\S+)$", request.json['messages'][-1]['content'], re.M)
+
+def answer(request):
+    """Per-file sections for map prompts, a title for the reduce prompt."""
+    prompt = request.json['messages'][-1]['content']
+    if prompt.startswith("The following is one part"):
+        paths = files_in(request)
+        return completion("".join(f"### {path}\n- {prompt.count(f'+{path} line')} lines in {path}\n"
+                                  for path in paths))
+    return completion("TITLE: Many files\nDESCRIPTION:\nall of them")
+
+@pytest.fixture
+def mapped(llm, monkeypatch):
+    """Small prompts, so a few files need map-reduce; returns the map requests."""
+    monkeypatch.setenv('GHPUSH_PROMPT_TOKEN_BUDGET', '600')
+    monkeypatch.setenv('GHPUSH_SEMANTIC_DIFF', '0')
+    llm.responder = answer
+    return lambda: [request for request in llm.requests
+                    if request.json['messages'][-1]['content'].startswith("The following is one part")]
+
+def test_unchanged_files_are_not_summarized_again_when_chunks_shift(llm, mapped, monkeypatch):
+    monkeypatch.setenv('GHPUSH_CACHE', '1')
+    sizes = {f"pkg/m{index}.py": 10 for index in range(8)}
+    assert DiffAnalyzer().analyze_diff(make_diff(sizes), []) == ("Many files", "all of them")
+    first_run = len(mapped())
+    assert first_run > 1
+
+    # A bigger first file moves every chunk boundary after it
+    sizes["pkg/m0.py"] = 25
+    DiffAnalyzer().analyze_diff(make_diff(sizes), [])
+
+    new_maps = mapped()[first_run:]
+    assert len(new_maps) == 1
+    assert "pkg/m0.py" in new_maps[0].json['messages'][-1]['content']
+    reduce_prompt = llm.requests[-1].json['messages'][-1]['content']
+    assert "- 25 lines in pkg/m0.py" in reduce_prompt
+    assert all(f"- 10 lines in pkg/m{index}.py" in reduce_prompt for index in range(1, 8))
+
+def test_a_large_diff_is_split_into_chunks_covering_every_file_once(mapped):
+    sizes = {f"pkg/m{index}.py": 10 for index in range(8)}
+
+    DiffAnalyzer().analyze_diff(make_diff(sizes), [])
+
+    chunks = [files_in(request) for request in mapped()]
+    assert len(chunks) > 1
+    assert sorted(path for chunk in chunks for path in chunk) == sorted(sizes)
+
+def test_the_number_of_chunks_is_bounded(mapped, monkeypatch):
+    monkeypatch.setenv('GHPUSH_MAP_REDUCE_MAX_CHUNKS', '3')
+    sizes = {f"pkg/m{index}.py": 10 for index in range(20)}
+
+    DiffAnalyzer().analyze_diff(make_diff(sizes), [])
+
+    assert len(mapped()) == 3
+
+def test_map_requests_run_concurrently_up_to_the_limit(llm, mapped, monkeypatch):
+    monkeypatch.setenv('GHPUSH_MAP_REDUCE_CONCURRENCY', '2')
+
+    def slow(request):
+        reply = answer(request)
+        reply.delay = 0.2
+        return reply
+    llm.responder = slow
+    sizes = {f"pkg/m{index}.py": 10 for index in range(16)}
+
+    assert DiffAnalyzer().analyze_diff(make_diff(sizes), []) == ("Many files", "all of them")
+
+    assert len(mapped()) > 2
+    assert llm.max_in_flight == 2
+
+def test_rate_limited_map_requests_wait_for_retry_after(llm, mapped):
+    llm.script(error(429, retry_after=0.5))
+    sizes = {f"pkg/m{index}.py": 10 for index in range(8)}
+    started = time.monotonic()
+
+    assert DiffAnalyzer().analyze_diff(make_diff(sizes), []) == ("Many files", "all of them")
+
+    assert time.monotonic() - started >= 0.5
+    chunks = [tuple(files_in(request)) for request in mapped()]
+    # The rejected chunk is sent once more
+    assert len(chunks) == len(set(chunks)) + 1
+    assert sorted(path for chunk in set(chunks) for path in chunk) == sorted(sizes)
@@ -0,0 +1,104 @@
+"""Generated/vendored path rules: glob translation, .gitattributes and .ghpushignore."""
+import re
+
+import pytest
+
+from ghpush.path_filter import DEFAULT_FILTER, PathFilter, glob_to_regex, parse_gitattributes
+
+@pytest.mark.parametrize('pattern, path, matches', [
+    ('*.min.js', 'app.min.js', True),
+    ('*.min.js', 'static/js/app.min.js', True),
+    ('*.min.js', 'app.js', False),
+    ('*.lock', 'dir/x.lock/inner.txt', True),
+    ('vendor/', 'vendor/lib.py', True),
+    ('vendor/', 'src/vendor/lib.py', True),
+    ('vendor/', 'vendor', False),
+    ('/build/', 'build/out.js', True),
+    ('/build/', 'src/build/gen.py', False),
+    ('docs/*.md', 'docs/a.md', True),
+    ('docs/*.md', 'docs/sub/a.md', False),
+    ('docs/*.md', 'src/docs/a.md', False),
+    ('docs/**/*.md', 'docs/sub/deeper/a.md', True),
+    ('**/gen/*.py', 'a/b/gen/x.py', True),
+    ('**/gen/*.py', 'gen/x.py', True),
+    ('file?.txt', 'file1.txt', True),
+    ('file?.txt', 'file/.txt', False),
+    ('[!a]*.py', 'b.py', True),
+    ('[!a]*.py', 'a.py', False),
+    ('[ab].py', 'b.py', True),
+    ('\\*.py', '*.py', True),
+    ('\\*.py', 'x.py', False),
+    ('a+b.txt', 'a+b.txt', True),
+    ('a+b.txt', 'aab.txt', False),
+])
+def test_glob_to_regex(pattern, path, matches):
+    assert bool(re.fullmatch(glob_to_regex(pattern), path, re.DOTALL)) is matches
+
+@pytest.mark.parametrize('path, excluded', [
+    ('poetry.lock', True),
+    ('web/package-lock.json', True),
+    ('proto/api_pb2.py', True),
+    ('node_modules/left-pad/index.js', True),
+    ('dist/ghpush.whl', True),
+    ('build/lib/ghpush/cli.py', True),
+    ('src/build/gen.py', False),
+    ('tools/dist/release.py', False),
+    ('ghpush/cli.py', False),
+])
+def test_default_rules(path, excluded):
+    assert DEFAULT_FILTER.excluded(path) is excluded
+
+def test_gitattributes_set_and_unset():
+    assert parse_gitattributes(
+        "# comment\n"
+        "\n"
+        "*.gen.py linguist-generated\n"
+        "third_party/** linguist-vendored=true text\n"
+        "third_party/ours/** -linguist-vendored\n"
+        "api.gen.py linguist-generated=false\n"
+        "legacy/** !linguist-generated\n"
+        "*.py diff=python\n"
+    ) == [('*.gen.py', True), ('third_party/**', True), ('third_party/ours/**', False),
+          ('api.gen.py', False), ('legacy/**', False)]
+
+@pytest.fixture
+def repo_rules(tmp_path):
+    def write(gitattributes: str = "", ghpushignore: str = "") -> PathFilter:
+        root = tmp_path / "rules"
+        root.mkdir(exist_ok=True)
+        (root / ".gitattributes").write_text(gitattributes)
+        (root / ".ghpushignore").write_text(ghpushignore)
+        return PathFilter.for_repo(root)
+    return write
+
+def test_gitattributes_override_the_defaults(repo_rules):
+    rules = repo_rules(gitattributes="*.gen.py linguist-generated\n"
+                                     "yarn.lock -linguist-generated\n"
+                                     "api.gen.py linguist-generated=false\n")
+
+    assert rules.excluded('models.gen.py')
+    assert not rules.excluded('api.gen.py')
+    # Unset in .gitattributes re-includes a default
+    assert not rules.excluded('yarn.lock')
+    assert rules.excluded('poetry.lock')
+
+@pytest.mark.parametrize('path, excluded', [
+    ('fixtures/big.json', True),
+    ('fixtures/keep/small.json', False),
+    ('fixtures/keep/huge.json', True),
+    ('snapshots/a.snap', False),
+    ('models.gen.py', False),
+    ('!important.txt', True),
+])
+def test_ghpushignore_negation_and_precedence(repo_rules, path, excluded):
+    rules = repo_rules(
+        gitattributes="*.gen.py linguist-generated\n",
+        ghpushignore="# generated test data\n"
+                     "fixtures/\n"
+                     "!fixtures/keep/\n"
+                     "fixtures/keep/huge.json\n"
+                     "!*.snap\n"
+                     "!models.gen.py\n"
+                     "\\!important.txt\n",
+    )
+    assert rules.excluded(path) is excluded
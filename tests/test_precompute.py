@@ -0,0 +1,94 @@
+"""Summaries precomputed by the git hook."""
+import ctypes
+import json
+import subprocess
+import sys
+
+from ghpush import branch_state, cli
+from ghpush.branch_state import PrecomputedSummaryStore
+from ghpush.diff_analyzer import DiffAnalyzer
+from ghpush.git_operations import GitOperations
+from ghpush.hooks import precompute
+
+from conftest import commit, git, sse
+
+def test_precompute_stores_the_model_summary_under_head(repo, llm):
+    llm.responder = lambda request: sse(["TITLE: Add y\n", "DESCRIPTION:\nf takes y"])
+    head = git(repo, 'rev-parse', 'HEAD').strip()
+
+    assert precompute('main') is True
+
+    entry = PrecomputedSummaryStore().load(repo, head)
+    assert (entry['title'], entry['description']) == ("Add y", "f takes y")
+    assert entry['base_sha'] == git(repo, 'rev-parse', 'main').strip()
+
+def test_precompute_stores_nothing_when_the_model_is_unreachable(repo, monkeypatch):
+    # Nothing listens on port 9 (discard) on the loopback interface
+    monkeypatch.setenv('GHPUSH_PROVIDERS', json.dumps(
+        [{'name': 'down', 'base_url': "http://127.0.0.1:9/v1", 'api_key': 'test'}]))
+    monkeypatch.setenv('GHPUSH_AI_DEADLINE_S', '2')
+    head = git(repo, 'rev-parse', 'HEAD').strip()
+
+    assert precompute('main') is False
+    assert PrecomputedSummaryStore().load(repo, head) is None
+
+def test_a_run_from_a_subdirectory_uses_what_the_hook_stored(repo, llm, monkeypatch):
+    commit(repo, {'src/util.py': "def g():\n    return 1\n"}, "Add g")
+    llm.responder = lambda request: sse(["TITLE: Add y and g\n", "DESCRIPTION:\nf takes y"])
+    # Git runs hooks from the top level
+    assert precompute('main') is True
+    requests = len(llm.requests)
+
+    monkeypatch.chdir(repo / "src")
+    monkeypatch.setattr(cli, 'create_pull_request', lambda *args, **kwargs: "https://github.test/pr/1")
+    git_ops = GitOperations()
+    try:
+        result = cli.publish_branch(git_ops, DiffAnalyzer(path_filter=git_ops.path_filter), 'main', True,
+                                    validate_gh=lambda: None)
+    finally:
+        git_ops.close()
+
+    assert result['title'] == "Add y and g"
+    assert len(llm.requests) == requests
+
+def claim_for(store, repo, head, pid):
+    store._path(repo, head, ".pending").parent.mkdir(parents=True, exist_ok=True)
+    store._path(repo, head, ".pending").write_text(str(pid))
+
+def test_a_claim_is_pending_while_its_process_runs(repo):
+    store = PrecomputedSummaryStore()
+    process = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+    try:
+        claim_for(store, repo, 'a' * 40, process.pid)
+        assert store.pending(repo, 'a' * 40)
+    finally:
+        process.kill()
+        process.wait()
+    assert not store.pending(repo, 'a' * 40)
+
+def test_liveness_on_windows_does_not_signal_the_process(monkeypatch):
+    """os.kill(pid, 0) sends CTRL_C_EVENT on Windows; OpenProcess is asked instead."""
+    live = 4242
+
+    class Kernel32:
+        def OpenProcess(self, access, inherit, pid):
+            return 1 if pid == live else 0
+
+        def GetExitCodeProcess(self, handle, code):
+            code._obj.value = branch_state.STILL_ACTIVE
+            return 1
+
+        def CloseHandle(self, handle):
+            return 1
+
+    def kill(pid, sig):
+        raise AssertionError("os.kill must not be used on Windows")
+
+    monkeypatch.setattr(branch_state.os, 'kill', kill)
+    monkeypatch.setattr(ctypes, 'WinDLL', lambda name, use_last_error: Kernel32(), raising=False)
+    monkeypatch.setattr(ctypes, 'get_last_error', lambda: 87, raising=False)
+    # Only around the check: pathlib picks its flavour from os.name
+    with monkeypatch.context() as windows:
+        windows.setattr(branch_state.os, 'name', 'nt')
+        assert branch_state._process_alive(live)
+        assert not branch_state._process_alive(live + 1)
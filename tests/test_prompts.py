@@ -0,0 +1,50 @@
+"""The full, reduce and update prompts share their context sections and
+response format, as sent to a stub API."""
+from ghpush.ai_summarizer import RESPONSE_FORMAT, STRUCTURE_HEADER, AISummarizer
+from ghpush.context_packer import PackedContext
+from ghpush.diff_summary import DiffSummary
+
+from conftest import completion
+
+COMMITS = ["Add y to f", "Document f\n\nWith an example."]
+STRUCTURE = "app.py: modified function f\n"
+SUMMARY = "TITLE: Title\nDESCRIPTION:\nDescription"
+
+def prompt(request) -> str:
+    return request.json['messages'][-1]['content']
+
+def assert_shared_parts(text: str, header: str = "Commit Messages:"):
+    assert text.endswith(RESPONSE_FORMAT)
+    assert text.count(RESPONSE_FORMAT) == 1
+    assert f"{header}\n- Add y to f\n- Document f\n\nWith an example.\n\n" in text
+    assert STRUCTURE_HEADER + STRUCTURE + "\n" in text
+
+def test_the_full_and_update_prompts(llm):
+    llm.script(completion(SUMMARY), completion(SUMMARY))
+    summarizer = AISummarizer()
+
+    summarizer.generate_summary(DiffSummary(), "DIFF", COMMITS, truncated=True, structure=STRUCTURE)
+    summarizer.generate_update_summary("Old title", "Old description", "NEW DIFF", COMMITS,
+                                       structure=STRUCTURE)
+
+    full, update = (prompt(request) for request in llm.requests)
+    assert_shared_parts(full)
+    assert "Git Diff Summary:\n(Only the most relevant hunks" in full
+    assert_shared_parts(update, header="New Commit Messages:")
+    assert "Current Title: Old title\n" in update
+    assert "Git Diff of the New Commits:\nNEW DIFF" in update
+    assert "(Only the most relevant hunks" not in update
+
+def test_the_reduce_prompt(llm):
+    llm.responder = lambda request: completion(
+        SUMMARY if "Summaries of the changes" in prompt(request) else "### a.py\n- Changed a")
+    chunks = [PackedContext(f"diff --git a/{name} b/{name}\n", 10, 1, 0, files=[(name, name)])
+              for name in ("a.py", "b.py")]
+
+    AISummarizer().generate_map_reduce_summary(DiffSummary(), chunks, COMMITS, structure=STRUCTURE)
+
+    reduce = prompt(llm.requests[-1])
+    assert_shared_parts(reduce)
+    assert "Summaries of the changes in each file of the diff:\n" in reduce
+    # Map prompts summarize their chunk only
+    assert not any(RESPONSE_FORMAT in prompt(request) for request in llm.requests[:-1])
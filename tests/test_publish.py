@@ -0,0 +1,74 @@
+"""publish_branch: the push, summary and PR pipeline."""
+import json
+import threading
+
+import pytest
+
+from ghpush import cli
+from ghpush.branch_state import BranchSummaryStore
+from ghpush.diff_analyzer import DiffAnalyzer
+from ghpush.git_operations import GitOperations
+
+from conftest import commit, git, sse
+
+@pytest.fixture
+def publish(repo, monkeypatch):
+    """Runs publish_branch on the repo against main, without GitHub."""
+    monkeypatch.setattr(cli, 'create_pull_request', lambda *args, **kwargs: "https://github.test/pr/1")
+
+    def run(is_ai_mode: bool = True, **kwargs) -> dict:
+        git_ops = GitOperations()
+        try:
+            return cli.publish_branch(git_ops, DiffAnalyzer(path_filter=git_ops.path_filter), 'main',
+                                      is_ai_mode, validate_gh=lambda: None, **kwargs)
+        finally:
+            git_ops.close()
+    return run
+
+def test_a_model_summary_is_recorded_for_the_next_run(repo, llm, publish):
+    llm.responder = lambda request: sse(["TITLE: Add y\n", "DESCRIPTION:\nf takes y"])
+
+    result = publish()
+
+    assert (result['title'], result['description']) == ("Add y", "f takes y")
+    assert BranchSummaryStore().load(repo, 'feature')['title'] == "Add y"
+
+def test_a_basic_summary_after_a_failed_request_is_not_recorded(repo, monkeypatch, publish):
+    monkeypatch.setenv('GHPUSH_PROVIDERS', json.dumps(
+        [{'name': 'down', 'base_url': "http://127.0.0.1:9/v1", 'api_key': 'test'}]))
+    monkeypatch.setenv('GHPUSH_AI_DEADLINE_S', '2')
+
+    result = publish()
+
+    assert result['title'] == "Update py files"
+    assert BranchSummaryStore().load(repo, 'feature') is None
+
+def test_commit_messages_are_those_the_push_sends(repo, llm, monkeypatch, publish):
+    git(repo, 'push', '-q', '--set-upstream', 'origin', 'feature')
+    commit(repo, {'app.py': "def f(x, y=2):\n    return x + y\n"}, "Default y to 2")
+    llm.responder = lambda request: sse(["TITLE: Default y\n", "DESCRIPTION:\nto 2"])
+    # Read the commit messages only once the push moved the tracking branch
+    pushed = threading.Event()
+    push_branch, get_commit_messages = GitOperations.push_branch, GitOperations.get_commit_messages
+    monkeypatch.setattr(GitOperations, 'push_branch',
+                        lambda self, *args: (push_branch(self, *args), pushed.set()))
+    monkeypatch.setattr(GitOperations, 'get_commit_messages',
+                        lambda self, *args, **kwargs: pushed.wait(5) and get_commit_messages(self, *args, **kwargs))
+
+    publish()
+
+    prompt = llm.requests[0].json['messages'][-1]['content']
+    assert "Default y to 2" in prompt
+    assert "Add y to f" not in prompt
+
+def test_a_run_from_a_subdirectory_amends_the_summary_from_the_top_level(repo, llm, monkeypatch, publish):
+    llm.responder = lambda request: sse(["TITLE: Add y\n", "DESCRIPTION:\nf takes y"])
+    publish()
+    commit(repo, {'src/util.py': "def g():\n    return 1\n"}, "Add g")
+    monkeypatch.chdir(repo / "src")
+
+    publish()
+
+    prompt = llm.requests[-1].json['messages'][-1]['content']
+    assert "Current Title: Add y\n" in prompt
+    assert "Add y to f" not in prompt
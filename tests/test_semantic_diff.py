@@ -0,0 +1,17 @@
+"""Function and class level changes read from a repository."""
+import pytest
+
+from ghpush.git_operations import GitOperations
+from ghpush.semantic_diff import structural_diff
+
+@pytest.mark.parametrize('backend', ['gitpython', 'plumbing'])
+def test_working_tree_files_are_found_from_a_subdirectory(repo, monkeypatch, backend):
+    (repo / "docs").mkdir()
+    monkeypatch.chdir(repo / "docs")
+    git_ops = GitOperations(backend=backend)
+    try:
+        changes = structural_diff(git_ops, 'main', git_ops.get_diff_stats('main')).get('app.py')
+    finally:
+        git_ops.close()
+
+    assert [(change.name, change.change) for change in changes] == [('f', 'signature')]
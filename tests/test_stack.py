@@ -0,0 +1,59 @@
+"""Finding the stack of branches between the base and the top."""
+import pytest
+
+from ghpush.git_operations import GitOperations
+from ghpush.stack import find_stack
+
+from conftest import commit, git
+
+def branch(repo, name, files, start=None):
+    git(repo, 'checkout', '-q', '-b', name, *([start] if start else []))
+    commit(repo, files, f"Work on {name}")
+
+@pytest.fixture
+def stacked(repo):
+    """main → feature → feature-b → feature-c, with feature checked out."""
+    branch(repo, 'feature-b', {'b.py': "B = 1\n"})
+    branch(repo, 'feature-c', {'c.py': "C = 1\n"})
+    git(repo, 'checkout', '-q', 'feature')
+    return repo
+
+def layers(repo, top=None):
+    git_ops = GitOperations(repo)
+    try:
+        return [(layer.branch, layer.base) for layer in find_stack(git_ops, 'main', top)]
+    finally:
+        git_ops.close()
+
+STACK = [('feature', 'main'), ('feature-b', 'feature'), ('feature-c', 'feature-b')]
+
+@pytest.mark.parametrize('current', ['feature', 'feature-b', 'feature-c'])
+def test_the_stack_is_found_from_any_layer(stacked, current):
+    git(stacked, 'checkout', '-q', current)
+    assert layers(stacked) == STACK
+
+def test_an_explicit_top_ends_the_stack(stacked):
+    assert layers(stacked, top='feature-b') == STACK[:2]
+
+def test_a_fork_stops_at_the_current_branch(stacked, capsys):
+    branch(stacked, 'feature-d', {'d.py': "D = 1\n"}, start='feature-b')
+    git(stacked, 'checkout', '-q', 'feature-b')
+
+    assert layers(stacked) == STACK[:2]
+    assert "fork; stacking up to 'feature-b' only" in capsys.readouterr().err
+    # Runs from further down stop at their own branch too
+    git(stacked, 'checkout', '-q', 'feature')
+    assert layers(stacked) == [('feature', 'main')]
+
+def test_branches_at_the_same_commit_make_one_layer(stacked):
+    git(stacked, 'branch', 'alias-b', 'feature-b')
+    git(stacked, 'branch', 'alias-c', 'feature-c')
+
+    assert layers(stacked, top='feature-c') == [('feature', 'main'), ('alias-b', 'feature'),
+                                                ('feature-c', 'alias-b')]
+
+def test_the_top_must_be_a_local_branch_ahead_of_the_base(stacked):
+    with pytest.raises(ValueError, match="not a local branch"):
+        layers(stacked, top='origin/main')
+    with pytest.raises(ValueError, match="no commits on top of 'main'"):
+        layers(stacked, top='main')
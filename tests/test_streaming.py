@@ -0,0 +1,47 @@
+"""Streamed responses: incremental parsing and retries, against an SSE stub."""
+import time
+
+from ghpush.ai_summarizer import AISummarizer, StreamingResponseParser
+from ghpush.diff_summary import DiffSummary
+
+from conftest import error, sse
+
+def test_the_title_is_shown_before_the_description_has_streamed(llm):
+    llm.script(sse(["TITLE: Stream", "ed title\nDESCRIPTION:\n", "line 1\n", "line 2\n", "line 3"],
+                   chunk_delay=0.2))
+    events = []
+    parser = StreamingResponseParser(
+        on_title=lambda title: events.append(('title', title, time.monotonic())),
+        on_description_line=lambda line: events.append(('line', line, time.monotonic())))
+
+    result = AISummarizer().generate_summary(DiffSummary(), "diff", [], on_delta=parser.feed)
+    parser.close()
+    finished = time.monotonic()
+
+    assert result == ("Streamed title", "line 1\nline 2\nline 3")
+    assert [event[:2] for event in events] == [('title', "Streamed title"), ('line', "line 1"),
+                                               ('line', "line 2"), ('line', "line 3")]
+    # Three more chunks were still to come when the title was complete
+    assert finished - events[0][2] >= 0.5
+
+def test_a_stream_that_fails_before_any_text_is_retried(llm):
+    llm.script(error(503), sse(["TITLE: Second\nDESCRIPTION:\n", "try"]))
+    parser = StreamingResponseParser()
+
+    result = AISummarizer().generate_summary(DiffSummary(), "diff", [], on_delta=parser.feed)
+
+    assert result == ("Second", "try")
+    assert len(llm.requests) == 2
+
+def test_a_stream_that_fails_after_the_title_was_shown_is_not_retried(llm, monkeypatch):
+    monkeypatch.setenv('GHPUSH_AI_REQUEST_TIMEOUT_S', '0.5')
+    llm.script(sse(["TITLE: Partial\n", "DESCRIPTION:\n"] + ["more "] * 50, chunk_delay=0.1))
+    titles = []
+    parser = StreamingResponseParser(on_title=titles.append)
+
+    title, _ = AISummarizer().generate_summary(DiffSummary(), "diff", [], on_delta=parser.feed)
+
+    assert titles == ["Partial"]
+    # The basic summary replaces the broken one rather than a second stream
+    assert title == "Update 0 files"
+    assert len(llm.requests) == 1
@@ -0,0 +1,58 @@
+"""GitHub CLI authentication checks and their cache."""
+import json
+import subprocess
+import threading
+import time
+
+import pytest
+
+from ghpush import validators
+from ghpush.validators import GhAuthCache, validate_github_auth
+
+def test_a_stale_cache_entry_is_rechecked_without_holding_up_exit(tmp_path, monkeypatch):
+    gh = tmp_path / "gh"
+    gh.write_text("")
+    monkeypatch.setattr(validators.shutil, 'which', lambda name: str(gh))
+    cache = GhAuthCache()
+    cache.store(cache.key(str(gh)))
+    entry = json.loads(cache.path.read_text())
+    entry['validated_at'] = time.time() - cache.ttl * 0.75
+    cache.path.write_text(json.dumps(entry))
+    release = threading.Event()
+
+    def gh_auth_status(gh_path):
+        release.wait(5)
+        return subprocess.CompletedProcess([gh_path], 0)
+    monkeypatch.setattr(validators, '_gh_auth_status', gh_auth_status)
+
+    assert validate_github_auth() is True
+
+    recheck = next(thread for thread in threading.enumerate() if thread.name == 'gh-auth-recheck')
+    assert recheck.daemon
+    release.set()
+    recheck.join(5)
+    assert cache.age(cache.key(str(gh))) < 60
+
+def hanging_gh(gh_path):
+    raise subprocess.TimeoutExpired([gh_path, 'auth', 'status'], 30)
+
+def test_a_hanging_gh_fails_the_check(tmp_path, monkeypatch):
+    gh = tmp_path / "gh"
+    gh.write_text("")
+    monkeypatch.setattr(validators.shutil, 'which', lambda name: str(gh))
+    monkeypatch.setattr(validators.subprocess, 'run', lambda *args, **kwargs: subprocess.CompletedProcess(args, 0))
+    monkeypatch.setattr(validators, '_gh_auth_status', hanging_gh)
+
+    with pytest.raises(SystemExit):
+        validate_github_auth()
+    assert GhAuthCache().age(GhAuthCache().key(str(gh))) is None
+
+def test_a_hanging_gh_drops_the_cached_result(tmp_path, monkeypatch):
+    monkeypatch.setattr(validators, '_gh_auth_status', hanging_gh)
+    cache = GhAuthCache()
+    key = cache.key(str(tmp_path / "gh"))
+    cache.store(key)
+
+    validators._recheck_github_auth(cache, str(tmp_path / "gh"), key)
+
+    assert cache.age(key) is None